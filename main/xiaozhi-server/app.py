@@ -1,7 +1,9 @@
 import sys
+import time
 import uuid
 import signal
 import asyncio
+import argparse
 from aioconsole import ainput
 from config.settings import load_config
 from config.logger import setup_logging
@@ -10,19 +12,26 @@ from core.http_server import SimpleHttpServer
 from core.websocket_server import WebSocketServer
 from core.utils.util import check_ffmpeg_installed
 from core.utils.gc_manager import get_gc_manager
+from core.inference_pool import start_inference_pool, stop_inference_pool
+from core.worker_supervisor import reuse_port_supported
+from core.graceful_restart import (
+    GracefulRestarter,
+    hot_restart_supported,
+    notify_predecessor,
+)
 
 TAG = __name__
 logger = setup_logging()
 
 
-async def wait_for_exit() -> None:
+async def wait_for_exit(stop_event: asyncio.Event = None) -> None:
     """
-    阻塞直到收到 Ctrl‑C / SIGTERM。
+    阻塞直到收到 Ctrl‑C / SIGTERM，或优雅下线完成（stop_event被置位）。
     - Unix: 使用 add_signal_handler
     - Windows: 依赖 KeyboardInterrupt
     """
     loop = asyncio.get_running_loop()
-    stop_event = asyncio.Event()
+    stop_event = stop_event or asyncio.Event()
 
     if sys.platform != "win32":  # Unix / macOS
         for sig in (signal.SIGINT, signal.SIGTERM):
@@ -43,10 +52,27 @@ async def monitor_stdin():
         await ainput()  # 异步等待输入，消费回车
 
 
-async def main():
-    check_ffmpeg_installed()
-    config = load_config()
+async def report_worker_status(ws_server, worker_id, status_board):
+    """多进程模式下定期向共享状态表写入本worker的心跳和连接数"""
+    # 下线中的worker已被新worker替换，不再写入状态表
+    while not ws_server.draining:
+        status_board.update(
+            worker_id,
+            heartbeat=time.time(),
+            active_connections=ws_server.active_connections,
+            total_connections=ws_server.total_connections,
+            ready=1 if ws_server.listening.is_set() else 0,
+        )
+        await asyncio.sleep(2)
 
+
+async def announce_ready(ws_server):
+    """监听端口后通知热重启前的旧进程开始优雅下线"""
+    await ws_server.listening.wait()
+    notify_predecessor()
+
+
+def resolve_auth_key(config):
     # auth_key优先级：配置文件server.auth_key > manager-api.secret > 自动生成
     # auth_key用于jwt认证，比如视觉分析接口的jwt认证、ota接口的token生成与websocket认证
     # 获取配置文件中的auth_key
@@ -61,19 +87,78 @@ async def main():
     
     config["server"]["auth_key"] = auth_key
 
+
+def reload_worker_config():
+    """
+    滚动重启前在父进程中重新读取配置：配置缓存没有过期时间，会被fork出的新worker继承，
+    不清除时新worker拿到的仍是启动时的配置。auth_key沿用启动时确定的值，保证新旧worker签发的token一致
+    """
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    old_config = load_config()
+    cache_manager.delete(CacheType.CONFIG, "main_config")
+    try:
+        config = load_config()
+    except Exception:
+        cache_manager.set(CacheType.CONFIG, "main_config", old_config)
+        raise
+    config["server"]["auth_key"] = old_config["server"]["auth_key"]
+    logger.bind(tag=TAG).info("已重新读取配置，新worker将使用最新配置")
+
+
+async def main(worker_id=None, status_board=None):
+    check_ffmpeg_installed()
+    config = load_config()
+    resolve_auth_key(config)
+    # 多进程模式下由父进程统一监控，worker不读取标准输入
+    is_worker = worker_id is not None
+
     # 添加 stdin 监控任务
-    stdin_task = asyncio.create_task(monitor_stdin())
+    stdin_task = asyncio.create_task(monitor_stdin()) if not is_worker else None
+    status_task = None
 
     # 启动全局GC管理器（5分钟清理一次）
     gc_manager = get_gc_manager(interval_seconds=300)
     await gc_manager.start()
 
+    # 单进程模式只有开启server.hot_restart时才通过SO_REUSEPORT监听，便于新旧进程交接端口；
+    # 未开启时误启动的第二个服务会因端口占用而失败，不会悄悄分走连接
+    can_hot_restart = (
+        hot_restart_supported()
+        and reuse_port_supported()
+        and (is_worker or bool(config["server"].get("hot_restart", False)))
+    )
+    reuse_port = is_worker or can_hot_restart
+    stop_event = asyncio.Event()
+
+    # 推理进程池需在加载VAD和ASR之前启动
+    start_inference_pool(config)
+
     # 启动 WebSocket 服务器
-    ws_server = WebSocketServer(config)
+    ws_server = WebSocketServer(config, reuse_port=reuse_port)
     ws_task = asyncio.create_task(ws_server.start())
     # 启动 Simple http 服务器
-    ota_server = SimpleHttpServer(config)
+    ota_server = SimpleHttpServer(
+        config, ws_server, status_board, reuse_port=reuse_port
+    )
     ota_task = asyncio.create_task(ota_server.start())
+    ready_task = None
+    if can_hot_restart:
+        restarter = GracefulRestarter(
+            ws_server,
+            ota_server,
+            stop_event,
+            drain_timeout=int(config["server"].get("drain_timeout", 60)),
+            worker_mode=is_worker,
+        )
+        restarter.install_signal_handlers()
+        ws_server.restarter = restarter
+        ready_task = asyncio.create_task(announce_ready(ws_server))
+    if is_worker:
+        status_task = asyncio.create_task(
+            report_worker_status(ws_server, worker_id, status_board)
+        )
+        logger.bind(tag=TAG).info(f"worker-{worker_id} 启动完成")
 
     read_config_from_api = config.get("read_config_from_api", False)
     port = int(config["server"].get("http_port", 8003))
@@ -123,7 +208,7 @@ async def main():
     )
 
     try:
-        await wait_for_exit()  # 阻塞直到收到退出信号
+        await wait_for_exit(stop_event)  # 阻塞直到收到退出信号或优雅下线完成
     except asyncio.CancelledError:
         print("任务被取消，清理资源中...")
     finally:
@@ -131,21 +216,55 @@ async def main():
         await gc_manager.stop()
 
         # 取消所有任务（关键修复点）
-        stdin_task.cancel()
-        ws_task.cancel()
-        if ota_task:
-            ota_task.cancel()
+        tasks = [
+            t for t in (stdin_task, ws_task, ota_task, status_task, ready_task) if t
+        ]
+        for task in tasks:
+            task.cancel()
 
         # 等待任务终止（必须加超时）
         await asyncio.wait(
-            [stdin_task, ws_task, ota_task] if ota_task else [stdin_task, ws_task],
+            tasks,
             timeout=3.0,
             return_when=asyncio.ALL_COMPLETED,
         )
+        stop_inference_pool()
         print("服务器已关闭，程序退出。")
 
 
+def run_worker(worker_id, status_board):
+    """多进程模式下的worker入口，fork之后各自加载模型"""
+    try:
+        asyncio.run(main(worker_id, status_board))
+    except KeyboardInterrupt:
+        pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="xiaozhi-esp32-server")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="worker进程数量，大于1时通过SO_REUSEPORT启动多个进程共享端口（仅支持Linux/macOS）",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.workers > 1:
+        from core.worker_supervisor import run_workers
+
+        if reuse_port_supported():
+            # 父进程只加载配置并确定auth_key，保证所有worker签发和校验的token一致
+            # 模型在fork之后由各worker独立加载，避免推理运行时的线程状态被fork复制
+            check_ffmpeg_installed()
+            resolve_auth_key(load_config())
+            logger.bind(tag=TAG).info(f"以多进程模式启动，worker数量: {args.workers}")
+            run_workers(args.workers, run_worker, reload_worker_config)
+            sys.exit(0)
+        logger.bind(tag=TAG).warning("当前平台不支持SO_REUSEPORT，使用单进程模式启动")
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -77,6 +77,17 @@ async def get_config_from_api_async(config):
             "http_port": config["server"].get("http_port", ""),
             "vision_explain": config["server"].get("vision_explain", ""),
             "auth_key": config["server"].get("auth_key", ""),
+            "session_pipeline": config["server"].get("session_pipeline", "thread"),
+            "llm_scheduler": config["server"].get("llm_scheduler", {}),
+            "admission": config["server"].get("admission", {}),
+            "hibernate_idle_seconds": config["server"].get("hibernate_idle_seconds", 0),
+            "session_resume": config["server"].get("session_resume", {}),
+            "drain_timeout": config["server"].get("drain_timeout", 60),
+            "pre_init_audio_ms": config["server"].get("pre_init_audio_ms", 3000),
+            "jitter_buffer": config["server"].get("jitter_buffer", {}),
+            "private_config_cache": config["server"].get("private_config_cache", {}),
+            "speculative_asr": config["server"].get("speculative_asr", {}),
+            "inference_pool": config["server"].get("inference_pool", {}),
         }
     config_data["server"]["auth"] = {"enabled": auth_enabled}
     # 如果服务器没有prompt_template，则从本地配置读取
@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import time
+from aiohttp import web
+from core.api.base_handler import BaseHandler
+from core.utils.llm_scheduler import get_llm_scheduler
+from core.utils.private_config_cache import get_private_config_cache
+from core.utils.speculative_asr import get_speculation_stats
+from core.inference_pool import get_inference_pool
+from core.providers.asr.warm_pool import get_warm_pool_metrics
+from core.providers.asr.hedged import get_hedged_asr_metrics
+
+TAG = __name__
+
+# 依赖onnxruntime、funasr、sherpa_onnx的provider模块及其指标函数，
+# 只读取已由工厂方法加载的模块，未启用的provider不会因健康检查被导入
+PROVIDER_METRICS = (
+    ("vad_pre_gate", "core.providers.vad.silero", "get_pre_gate_metrics"),
+    ("funasr_batcher", "core.providers.asr.fun_local", "get_batcher_metrics"),
+    (
+        "sherpa_onnx_stream",
+        "core.providers.asr.sherpa_onnx_stream",
+        "get_shared_recognizer_metrics",
+    ),
+)
+
+
+class HealthHandler(BaseHandler):
+    """服务健康状态接口，多进程模式下返回所有worker的汇总视图"""
+
+    def __init__(self, config: dict, ws_server=None, status_board=None):
+        super().__init__(config)
+        self.ws_server = ws_server
+        self.status_board = status_board
+        self.started_at = time.time()
+
+    def _local_status(self) -> dict:
+        active = self.ws_server.active_connections if self.ws_server else 0
+        total = self.ws_server.total_connections if self.ws_server else 0
+        return {
+            "workers": [
+                {
+                    "worker_id": 0,
+                    "pid": os.getpid(),
+                    "alive": True,
+                    "uptime": int(time.time() - self.started_at),
+                    "active_connections": active,
+                    "total_connections": total,
+                    "restarts": 0,
+                }
+            ],
+            "alive_workers": 1,
+            "active_connections": active,
+            "total_connections": total,
+        }
+
+    async def handle_get(self, request):
+        try:
+            if self.status_board is not None:
+                status = self.status_board.snapshot()
+            else:
+                status = self._local_status()
+            status["status"] = "ok" if status["alive_workers"] > 0 else "down"
+            # LLM调度器指标为当前进程的数据
+            status["llm_scheduler"] = get_llm_scheduler().get_metrics()
+            status["private_config_cache"] = get_private_config_cache().get_metrics()
+            status["speculative_asr"] = get_speculation_stats().get_metrics()
+            inference_pool = get_inference_pool()
+            if inference_pool is not None:
+                status["inference_pool"] = inference_pool.get_metrics()
+            warm_pools = get_warm_pool_metrics()
+            if warm_pools:
+                status["asr_warm_pools"] = warm_pools
+            hedged_asr = get_hedged_asr_metrics()
+            if hedged_asr:
+                status["hedged_asr"] = hedged_asr
+            for key, module_name, getter in PROVIDER_METRICS:
+                module = sys.modules.get(module_name)
+                metrics = getattr(module, getter)() if module is not None else None
+                if metrics:
+                    status[key] = metrics
+            if self.ws_server is not None:
+                status["admission"] = self.ws_server.admission.get_metrics()
+            response = web.Response(
+                text=json.dumps(status, separators=(",", ":")),
+                content_type="application/json",
+            )
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"健康检查接口异常: {e}")
+            response = web.Response(
+                text=json.dumps({"status": "error", "message": str(e)}),
+                content_type="application/json",
+                status=500,
+            )
+        self._add_cors_headers(response)
+        return response
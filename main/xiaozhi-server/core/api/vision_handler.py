@@ -5,7 +5,7 @@ from config.logger import setup_logging
 from core.api.base_handler import BaseHandler
 from core.utils.util import get_vision_url, is_valid_image_file
 from core.utils.vllm import create_instance
-from config.config_loader import get_private_config_from_api
+from core.utils.private_config_cache import get_private_config_cache
 from core.utils.auth import AuthToken
 import base64
 from typing import Tuple, Optional
@@ -104,7 +104,7 @@ class VisionHandler(BaseHandler):
             current_config = copy.deepcopy(self.config)
             read_config_from_api = current_config.get("read_config_from_api", False)
             if read_config_from_api:
-                current_config = await get_private_config_from_api(
+                current_config = await get_private_config_cache().get(
                     current_config,
                     device_id,
                     client_id,
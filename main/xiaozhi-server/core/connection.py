@@ -1,6 +1,5 @@
 import os
 import sys
-import copy
 import json
 import uuid
 import time
@@ -16,15 +15,15 @@ from core.utils.util import (
     check_vad_update,
     check_asr_update,
     filter_sensitive_info,
+    join_threads,
 )
 from typing import Dict, Any
-from collections import deque
 from core.utils.modules_initialize import (
     initialize_modules,
     initialize_tts,
     initialize_asr,
 )
-from core.handle.reportHandle import report
+from core.handle.reportHandle import report, build_report_audio, upload_report
 from core.providers.tts.default import DefaultTTS
 from concurrent.futures import ThreadPoolExecutor
 from core.utils.dialogue import Message, Dialogue
@@ -34,13 +33,22 @@ from core.providers.tools.unified_tool_handler import UnifiedToolHandler
 from plugins_func.loadplugins import auto_import_modules
 from plugins_func.register import Action
 from core.auth import AuthenticationError
-from config.config_loader import get_private_config_from_api
 from core.providers.tts.dto.dto import ContentType, TTSMessageDTO, SentenceType
 from config.logger import setup_logging, build_module_string, create_connection_logger
 from config.manage_api_client import DeviceNotFoundException, DeviceBindException
 from core.utils.prompt_manager import PromptManager
 from core.utils.voiceprint_provider import VoiceprintProvider
 from core.utils.util import get_system_error_response
+from core.utils.loop_queue import LoopQueue
+from core.utils.layered_config import LayeredConfig
+from core.utils.llm_scheduler import get_llm_scheduler
+from core.utils.session_resume import SessionResumeCache
+from core.utils.private_config_cache import get_private_config_cache
+from core.utils.pre_init_buffer import PreInitBuffer
+from core.utils.jitter_buffer import JitterBuffer
+from core.utils.uplink_audio import UplinkDecoder
+from core.utils.vad_framer import VADFramer, VoiceWindow
+from core.utils.speculative_asr import SpeculativeASR
 from core.utils import textUtils
 
 
@@ -97,7 +105,8 @@ class ConnectionHandler:
             server=None,
     ):
         self.common_config = config
-        self.config = copy.deepcopy(config)
+        # 共享服务配置，本连接的私有配置只写入覆盖层
+        self.config = LayeredConfig(config)
         self.session_id = str(uuid.uuid4())
         self.logger = setup_logging()
         self.server = server  # 保存server实例的引用
@@ -107,6 +116,13 @@ class ConnectionHandler:
         self.bind_code = None  # 绑定设备的验证码
         self.last_bind_prompt_time = 0  # 上次播放绑定提示的时间戳(秒)
         self.bind_prompt_interval = 60  # 绑定提示播放间隔(秒)
+        # 组件初始化结束（无论成功与否）后置位，之后才能处理音频
+        self.components_ready_event = asyncio.Event()
+        # 初始化完成前收到的消息暂存在这里，完成后按顺序补处理
+        self.pre_init_buffer = PreInitBuffer(
+            self.config["server"].get("pre_init_audio_ms", 3000)
+        )
+        self.pre_init_task = None
 
         self.read_config_from_api = self.config.get("read_config_from_api", False)
 
@@ -129,11 +145,46 @@ class ConnectionHandler:
         # 线程任务相关
         self.loop = None  # 在 handle_connection 中获取运行中的事件循环
         self.stop_event = threading.Event()
+        # 休眠时让各阶段线程和协程退出，不影响以stop_event判断连接是否关闭的其他逻辑
+        self.hibernate_stop_event = threading.Event()
         self.executor = ThreadPoolExecutor(max_workers=5)
+        # 会话流水线模式：thread（每个阶段独立线程）或 asyncio（协程 + LoopQueue）
+        self.async_pipeline = (
+            str(self.config["server"].get("session_pipeline", "thread")).lower()
+            == "asyncio"
+        )
+        self.pipeline_tasks = []
+        self.active_chats = 0
+        # 全局LLM调度器，所有连接共享并发上限并按设备公平排队
+        self.llm_scheduler = get_llm_scheduler(
+            self.config["server"].get("llm_scheduler")
+        )
+        # 准入控制凭证，初始化完成后释放初始化名额
+        self.admission_ticket = None
+        # 空闲休眠：超过该秒数没有收到设备消息，则释放TTS/ASR等组件，0表示不休眠
+        self.hibernate_idle_seconds = int(
+            self.config["server"].get("hibernate_idle_seconds", 0) or 0
+        )
+        self.hibernated = False
+        self.hibernation_lock = asyncio.Lock()
+        self.last_message_time = 0.0  # 最近一次收到设备非心跳消息的时间（毫秒）
+        # 断线重连会话恢复
+        self.session_resume = SessionResumeCache(
+            self.config["server"].get("session_resume")
+        )
+        self.resumed_snapshot = None
+        # 断线重连前尚未保存到记忆的对话，关闭时与本次连接新增的消息一起保存
+        self.memory_carryover = []
+        self.memory_saved_ids = set()
+        self.private_config = None  # 从接口获取的差异化配置
+        self.private_modules = {}  # 根据差异化配置为本连接创建的LLM/记忆/意图实例
 
         # 添加上报线程池
         self.report_queue = queue.Queue()
         self.report_thread = None
+        self.report_task = None
+        # asyncio流水线模式下进行中的上报请求
+        self.report_uploads = set()
         # 未来可以通过修改此处，调节asr的上报和tts的上报，目前默认都开启
         self.report_asr_enable = self.read_config_from_api
         self.report_tts_enable = self.read_config_from_api
@@ -152,9 +203,9 @@ class ConnectionHandler:
         self.voiceprint_provider = None
 
         # vad相关变量
-        self.client_audio_buffer = bytearray()
+        self.client_audio_buffer = VADFramer()
         self.client_have_voice = False
-        self.client_voice_window = deque(maxlen=5)
+        self.client_voice_window = VoiceWindow(maxlen=5)
         self.first_activity_time = 0.0  # 记录首次活动的时间（毫秒）
         self.last_activity_time = 0.0  # 统一的活动时间戳（毫秒）
         self.client_voice_stop = False
@@ -164,8 +215,14 @@ class ConnectionHandler:
         # 因为实际部署时可能会用到公共的本地ASR，不能把变量暴露给公共ASR
         # 所以涉及到ASR的变量，需要在这里定义，属于connection的私有变量
         self.asr_audio = []
+        # 上行音频解码器，每个音频包只解码一次
+        self.uplink_decoder = UplinkDecoder()
         self.asr_audio_queue = queue.Queue()
         self.current_speaker = None  # 存储当前说话人
+        # 静音达到临时阈值时先行识别
+        self.speculative_asr = SpeculativeASR(
+            self.config["server"].get("speculative_asr")
+        )
 
         # llm相关变量
         self.dialogue = Dialogue()
@@ -202,6 +259,9 @@ class ConnectionHandler:
 
         # 标记连接是否来自MQTT
         self.conn_from_mqtt_gateway = False
+        # MQTT网关音频的抖动缓冲，收到第一个带时间戳的音频包时创建
+        self.jitter_buffer = None
+        self.jitter_flush_handle = None
 
         # 初始化提示词管理器
         self.prompt_manager = PromptManager(self.config, self.logger)
@@ -210,6 +270,11 @@ class ConnectionHandler:
         try:
             # 获取运行中的事件循环（必须在异步上下文中）
             self.loop = asyncio.get_running_loop()
+            if self.async_pipeline:
+                self.asr_audio_queue = LoopQueue.from_queue(
+                    self.asr_audio_queue, self.loop
+                )
+                self.report_queue = LoopQueue.from_queue(self.report_queue, self.loop)
 
             # 获取并验证headers
             self.headers = dict(ws.request.headers)
@@ -238,11 +303,13 @@ class ConnectionHandler:
             # 初始化活动时间戳
             self.first_activity_time = time.time() * 1000
             self.last_activity_time = time.time() * 1000
+            self.last_message_time = time.time() * 1000
 
             # 启动超时检查任务
             self.timeout_task = asyncio.create_task(self._check_timeout())
 
-            self.welcome_msg = self.config["xiaozhi"]
+            # 浅拷贝，避免修改共享配置中的欢迎消息
+            self.welcome_msg = dict(self.config["xiaozhi"])
             self.welcome_msg["session_id"] = self.session_id
 
             # 从配置中读取采样率
@@ -280,29 +347,20 @@ class ConnectionHandler:
 
     async def _save_and_close(self, ws):
         """保存记忆并关闭连接"""
+        snapshot_saved = False
+        on_expire = None
         try:
-            if self.memory:
-                # 使用线程池异步保存记忆
-                def save_memory_task():
-                    try:
-                        # 创建新事件循环（避免与主循环冲突）
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        loop.run_until_complete(
-                            self.memory.save_memory(
-                                self.dialogue.dialogue, self.session_id
-                            )
-                        )
-                    except Exception as e:
-                        self.logger.bind(tag=TAG).error(f"保存记忆失败: {e}")
-                    finally:
-                        try:
-                            loop.close()
-                        except Exception:
-                            pass
-
-                # 启动线程保存记忆，不等待完成
-                threading.Thread(target=save_memory_task, daemon=True).start()
+            # 保存会话快照，设备短时间内重连时可直接恢复；
+            # 连接独有的记忆实例推迟到快照到期未被使用时再保存，避免与重连后的会话重复保存。
+            # 服务共用的记忆实例（本地记忆）会被之后连接的init_memory改写，只能立即保存
+            if self.memory and self.private_modules.get("memory") is self.memory:
+                on_expire = self._make_memory_saver()
+            snapshot_saved = self.session_resume.save(self, on_expire=on_expire)
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"保存会话快照失败: {e}")
+        try:
+            if self.memory and not (snapshot_saved and on_expire):
+                self._make_memory_saver()()
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"保存记忆失败: {e}")
         finally:
@@ -325,18 +383,72 @@ class ConnectionHandler:
 
             asyncio.create_task(check_bind_device(self))
 
+    def _is_ready_for(self, message) -> bool:
+        """文本消息需要等到获取绑定状态，音频需要等到VAD/ASR初始化结束"""
+        if isinstance(message, bytes):
+            return self.components_ready_event.is_set()
+        return (
+            self.bind_completed_event.is_set()
+            or self.components_ready_event.is_set()
+        )
+
     async def _route_message(self, message):
         """消息路由"""
-        # 检查是否已经获取到真实的绑定状态
-        if not self.bind_completed_event.is_set():
-            # 还没有获取到真实状态，等待直到获取到真实状态或超时
-            try:
-                await asyncio.wait_for(self.bind_completed_event.wait(), timeout=1)
-            except asyncio.TimeoutError:
-                # 超时仍未获取到真实状态，丢弃消息
-                await self._discard_message_with_bind_prompt()
-                return
+        # 初始化尚未完成，或仍有更早的消息在等待处理时，先暂存以保证顺序，不阻塞接收循环
+        if self.pre_init_task is not None or not self._is_ready_for(message):
+            self._buffer_pre_init_message(message)
+            return
+        await self._handle_message(message)
 
+    def _buffer_pre_init_message(self, message):
+        if isinstance(message, bytes):
+            audio_params = self.welcome_msg.get("audio_params") or {}
+            self.pre_init_buffer.push_audio(
+                message, audio_params.get("frame_duration")
+            )
+        else:
+            self.pre_init_buffer.push_text(message)
+        if self.pre_init_task is None:
+            self.pre_init_task = asyncio.create_task(self._replay_pre_init_messages())
+
+    async def _replay_pre_init_messages(self):
+        """等待初始化完成后，按到达顺序处理暂存的消息"""
+        buffer = self.pre_init_buffer
+        try:
+            while len(buffer):
+                message = buffer.peek()
+                if not self._is_ready_for(message):
+                    if isinstance(message, bytes):
+                        await self.components_ready_event.wait()
+                    else:
+                        waiters = [
+                            asyncio.create_task(self.bind_completed_event.wait()),
+                            asyncio.create_task(self.components_ready_event.wait()),
+                        ]
+                        try:
+                            await asyncio.wait(
+                                waiters, return_when=asyncio.FIRST_COMPLETED
+                            )
+                        finally:
+                            for waiter in waiters:
+                                waiter.cancel()
+                    # 等待期间队首的音频可能因超出上限被丢弃，重新检查
+                    continue
+                try:
+                    await self._handle_message(buffer.popleft())
+                except Exception as e:
+                    self.logger.bind(tag=TAG).error(f"处理初始化期间缓存的消息失败: {e}")
+            if buffer.buffered_count:
+                self.logger.bind(tag=TAG).info(
+                    f"已处理初始化期间缓存的{buffer.buffered_count}条消息，"
+                    f"因超出上限丢弃{buffer.dropped_audio_ms}ms音频"
+                )
+                buffer.buffered_count = 0
+                buffer.dropped_audio_ms = 0
+        finally:
+            self.pre_init_task = None
+
+    async def _handle_message(self, message):
         # 已经获取到真实状态，检查是否需要绑定
         if self.need_bind:
             # 需要绑定，丢弃消息
@@ -345,6 +457,12 @@ class ConnectionHandler:
 
         # 不需要绑定，继续处理消息
 
+        if self.hibernate_idle_seconds and not self._is_ping_message(message):
+            self.last_message_time = time.time() * 1000
+            # 休眠中收到音频或文本消息，先恢复组件再处理
+            if self.hibernated:
+                await self._wake_up()
+
         if isinstance(message, str):
             await handleTextMessage(self, message)
         elif isinstance(message, bytes):
@@ -394,35 +512,36 @@ class ConnectionHandler:
         return False
 
     def _process_websocket_audio(self, audio_data, timestamp):
-        """处理WebSocket格式的音频包"""
-        # 初始化时间戳序列管理
-        if not hasattr(self, "audio_timestamp_buffer"):
-            self.audio_timestamp_buffer = {}
-            self.last_processed_timestamp = 0
-            self.max_timestamp_buffer_size = 20
-
-        # 如果时间戳是递增的，直接处理
-        if timestamp >= self.last_processed_timestamp:
-            self.asr_audio_queue.put(audio_data)
-            self.last_processed_timestamp = timestamp
-
-            # 处理缓冲区中的后续包
-            processed_any = True
-            while processed_any:
-                processed_any = False
-                for ts in sorted(self.audio_timestamp_buffer.keys()):
-                    if ts > self.last_processed_timestamp:
-                        buffered_audio = self.audio_timestamp_buffer.pop(ts)
-                        self.asr_audio_queue.put(buffered_audio)
-                        self.last_processed_timestamp = ts
-                        processed_any = True
-                        break
-        else:
-            # 乱序包，暂存
-            if len(self.audio_timestamp_buffer) < self.max_timestamp_buffer_size:
-                self.audio_timestamp_buffer[timestamp] = audio_data
-            else:
-                self.asr_audio_queue.put(audio_data)
+        """处理WebSocket格式的音频包，经抖动缓冲按时间戳重排后送入ASR队列"""
+        if self.jitter_buffer is None:
+            audio_params = self.welcome_msg.get("audio_params") or {}
+            jitter_config = self.config["server"].get("jitter_buffer") or {}
+            self.jitter_buffer = JitterBuffer(
+                playout_delay=jitter_config.get("playout_delay", 120),
+                frame_duration=audio_params.get("frame_duration"),
+                max_packets=jitter_config.get("max_packets", 50),
+            )
+        for data in self.jitter_buffer.push(timestamp, audio_data):
+            self.asr_audio_queue.put(data)
+        self._schedule_jitter_flush()
+
+    def _schedule_jitter_flush(self):
+        """有等待空缺的包时，到期后即使没有新包到达也要输出"""
+        if self.jitter_flush_handle is not None:
+            return
+        deadline = self.jitter_buffer.next_deadline()
+        if deadline is None:
+            return
+        delay = max(0.0, deadline - time.monotonic())
+        self.jitter_flush_handle = self.loop.call_later(delay, self._flush_jitter_buffer)
+
+    def _flush_jitter_buffer(self):
+        self.jitter_flush_handle = None
+        if self.stop_event.is_set():
+            return
+        for data in self.jitter_buffer.pop_ready():
+            self.asr_audio_queue.put(data)
+        self._schedule_jitter_flush()
 
     async def handle_restart(self, message):
         """处理服务器重启请求"""
@@ -442,6 +561,13 @@ class ConnectionHandler:
                 )
             )
 
+            # 支持热重启时，由新进程接管端口后旧进程优雅下线，不中断进行中的对话
+            restarter = getattr(self.server, "restarter", None)
+            if restarter is not None:
+                if not restarter.request_restart():
+                    self.logger.bind(tag=TAG).info("热重启已在进行中")
+                return
+
             # 异步执行重启操作
             def restart_server():
                 """实际执行重启的方法"""
@@ -489,7 +615,18 @@ class ConnectionHandler:
             self.logger = create_connection_logger(self.selected_module_str)
 
             """初始化组件"""
-            if self.config.get("prompt") is not None:
+            snapshot = self.resumed_snapshot
+            resumed_prompt = snapshot is not None and snapshot.prompt is not None
+            if resumed_prompt:
+                # 断线重连：延续之前的对话和已增强的提示词
+                self.dialogue = snapshot.dialogue
+                self.memory_carryover = snapshot.pending_memory or []
+                self.memory_saved_ids = snapshot.saved_memory_ids or set()
+                self.change_system_prompt(snapshot.prompt)
+                self.logger.bind(tag=TAG).info(
+                    f"已恢复会话，对话消息数: {len(self.dialogue.dialogue)}"
+                )
+            elif self.config.get("prompt") is not None:
                 user_prompt = self.config["prompt"]
                 # 使用快速提示词进行初始化
                 prompt = self.prompt_manager.get_quick_prompt(user_prompt)
@@ -512,16 +649,90 @@ class ConnectionHandler:
             )
 
             """加载记忆"""
-            self._initialize_memory()
+            # 从快照恢复的记忆实例已经完成初始化
+            if "memory" not in self.resumed_modules():
+                self._initialize_memory()
             """加载意图识别"""
             self._initialize_intent()
             """初始化上报线程"""
             self._init_report_threads()
             """更新系统提示词"""
-            self._init_prompt_enhancement()
+            if not resumed_prompt:
+                self._init_prompt_enhancement()
+            self.resumed_snapshot = None
 
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"实例化组件失败: {e}")
+        finally:
+            self._mark_initialized()
+
+    def memory_messages(self) -> list:
+        """需要保存到记忆的对话：断线重连前尚未保存的消息加上本次连接新增的消息"""
+        if not self.memory_carryover and not self.memory_saved_ids:
+            return self.dialogue.dialogue
+        skipped = self.memory_saved_ids | {
+            message.uniq_id for message in self.memory_carryover
+        }
+        return self.memory_carryover + [
+            message
+            for message in self.dialogue.dialogue
+            if message.uniq_id not in skipped and message.role != "system"
+        ]
+
+    def _make_memory_saver(self):
+        """
+        返回在后台线程中保存记忆的回调，参数为会话快照时保存快照中尚未保存的对话，
+        只引用记忆实例等必要对象，快照保留期间不持有整个连接
+        """
+        memory, session_id, server, log = (
+            self.memory,
+            self.session_id,
+            self.server,
+            self.logger,
+        )
+        messages = list(self.memory_messages())
+
+        def save(snapshot=None):
+            dialogue = snapshot.pending_memory if snapshot is not None else messages
+
+            def save_memory_task():
+                try:
+                    # 创建新事件循环（避免与主循环冲突）
+                    loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(loop)
+                    loop.run_until_complete(memory.save_memory(dialogue, session_id))
+                except Exception as e:
+                    log.bind(tag=TAG).error(f"保存记忆失败: {e}")
+                finally:
+                    try:
+                        loop.close()
+                    except Exception:
+                        pass
+
+            # 启动线程保存记忆，不等待完成
+            save_thread = threading.Thread(target=save_memory_task, daemon=True)
+            save_thread.start()
+            if server:
+                # 优雅下线时需要等待记忆保存完成
+                server.track_background_thread(save_thread)
+
+        return save
+
+    def _mark_initialized(self):
+        """通知初始化阶段结束，可在任意线程调用"""
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._on_initialized)
+
+    def _on_initialized(self):
+        self.components_ready_event.set()
+        if self.admission_ticket:
+            self.admission_ticket.mark_initialized()
+
+    def resumed_modules(self) -> dict:
+        """从会话快照中恢复的模块实例"""
+        if self.resumed_snapshot is None:
+            return {}
+        return self.resumed_snapshot.modules
 
     def _init_prompt_enhancement(self):
 
@@ -540,6 +751,9 @@ class ConnectionHandler:
             return
         if self.chat_history_conf == 0:
             return
+        if self.async_pipeline:
+            self.loop.call_soon_threadsafe(self._start_report_task)
+            return
         if self.report_thread is None or not self.report_thread.is_alive():
             self.report_thread = threading.Thread(
                 target=self._report_worker, daemon=True
@@ -600,24 +814,37 @@ class ConnectionHandler:
             self.executor.submit(self._initialize_components)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"后台初始化失败: {e}")
+            self._mark_initialized()
 
     async def _initialize_private_config_async(self):
         """从接口异步获取差异化配置（异步版本，不阻塞主循环）"""
+        # 设备短时间内重连时，直接使用断开前保存的会话快照
+        self.resumed_snapshot = self.session_resume.take(self.device_id)
         if not self.read_config_from_api:
             self.need_bind = False
             self.bind_completed_event.set()
             return
         try:
             begin_time = time.time()
-            private_config = await get_private_config_from_api(
-                self.config,
-                self.headers.get("device-id"),
-                self.headers.get("client-id", self.headers.get("device-id")),
-            )
-            private_config["delete_audio"] = bool(self.config.get("delete_audio", True))
-            self.logger.bind(tag=TAG).info(
-                f"{time.time() - begin_time} 秒，异步获取差异化配置成功: {json.dumps(filter_sensitive_info(private_config), ensure_ascii=False)}"
-            )
+            if (
+                self.resumed_snapshot is not None
+                and self.resumed_snapshot.private_config is not None
+            ):
+                private_config = self.resumed_snapshot.private_config
+                self.logger.bind(tag=TAG).info("使用会话快照中的差异化配置")
+            else:
+                private_config = await get_private_config_cache().get(
+                    self.config,
+                    self.headers.get("device-id"),
+                    self.headers.get("client-id", self.headers.get("device-id")),
+                )
+                private_config["delete_audio"] = bool(
+                    self.config.get("delete_audio", True)
+                )
+                self.logger.bind(tag=TAG).info(
+                    f"{time.time() - begin_time} 秒，异步获取差异化配置成功: {json.dumps(filter_sensitive_info(private_config), ensure_ascii=False)}"
+                )
+            self.private_config = private_config
             self.need_bind = False
             self.bind_completed_event.set()
         except DeviceNotFoundException as e:
@@ -639,52 +866,45 @@ class ConnectionHandler:
             False,
         )
 
+        resumed_modules = self.resumed_modules()
         init_vad = check_vad_update(self.common_config, private_config)
         init_asr = check_asr_update(self.common_config, private_config)
+        # selected_module为共享配置中的嵌套字典，修改前先复制到本连接的覆盖层
+        selected_module = self.config.section("selected_module")
 
         if init_vad:
             self.config["VAD"] = private_config["VAD"]
-            self.config["selected_module"]["VAD"] = private_config["selected_module"][
-                "VAD"
-            ]
+            selected_module["VAD"] = private_config["selected_module"]["VAD"]
         if init_asr:
             self.config["ASR"] = private_config["ASR"]
-            self.config["selected_module"]["ASR"] = private_config["selected_module"][
-                "ASR"
-            ]
+            selected_module["ASR"] = private_config["selected_module"]["ASR"]
         if private_config.get("TTS", None) is not None:
             init_tts = True
             self.config["TTS"] = private_config["TTS"]
-            self.config["selected_module"]["TTS"] = private_config["selected_module"][
-                "TTS"
-            ]
+            selected_module["TTS"] = private_config["selected_module"]["TTS"]
         if private_config.get("LLM", None) is not None:
-            init_llm = True
+            init_llm = "llm" not in resumed_modules
             self.config["LLM"] = private_config["LLM"]
-            self.config["selected_module"]["LLM"] = private_config["selected_module"][
-                "LLM"
-            ]
+            selected_module["LLM"] = private_config["selected_module"]["LLM"]
         if private_config.get("VLLM", None) is not None:
             self.config["VLLM"] = private_config["VLLM"]
-            self.config["selected_module"]["VLLM"] = private_config["selected_module"][
-                "VLLM"
-            ]
+            selected_module["VLLM"] = private_config["selected_module"]["VLLM"]
         if private_config.get("Memory", None) is not None:
-            init_memory = True
+            init_memory = "memory" not in resumed_modules
             self.config["Memory"] = private_config["Memory"]
-            self.config["selected_module"]["Memory"] = private_config[
-                "selected_module"
-            ]["Memory"]
+            selected_module["Memory"] = private_config["selected_module"]["Memory"]
         if private_config.get("Intent", None) is not None:
-            init_intent = True
+            init_intent = "intent" not in resumed_modules
             self.config["Intent"] = private_config["Intent"]
             model_intent = private_config.get("selected_module", {}).get("Intent", {})
-            self.config["selected_module"]["Intent"] = model_intent
+            selected_module["Intent"] = model_intent
             # 加载插件配置
             if model_intent != "Intent_nointent":
-                plugin_from_server = private_config.get("plugins", {})
-                for plugin, config_str in plugin_from_server.items():
-                    plugin_from_server[plugin] = json.loads(config_str)
+                # 不修改原始配置，会话快照中的差异化配置需要能够再次解析
+                plugin_from_server = {
+                    plugin: json.loads(config_str)
+                    for plugin, config_str in private_config.get("plugins", {}).items()
+                }
                 self.config["plugins"] = plugin_from_server
                 self.config["Intent"][self.config["selected_module"]["Intent"]][
                     "functions"
@@ -722,6 +942,12 @@ class ConnectionHandler:
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"初始化组件失败: {e}")
             modules = {}
+        modules.update(resumed_modules)
+        self.private_modules = {
+            name: modules[name]
+            for name in ("llm", "memory", "intent")
+            if modules.get(name) is not None
+        }
         if modules.get("tts", None) is not None:
             self.tts = modules["tts"]
         if modules.get("vad", None) is not None:
@@ -801,7 +1027,10 @@ class ConnectionHandler:
                 "llm"
             ]
 
-            if intent_llm_name and intent_llm_name in self.config["LLM"]:
+            if "intent" in self.resumed_modules():
+                # 从快照恢复的意图识别实例已经设置过LLM
+                pass
+            elif intent_llm_name and intent_llm_name in self.config["LLM"]:
                 # 如果配置了专用LLM，则创建独立的LLM实例
                 from core.utils import llm as llm_utils
 
@@ -822,16 +1051,48 @@ class ConnectionHandler:
         """加载统一工具处理器"""
         self.func_handler = UnifiedToolHandler(self)
 
+        # 断线重连时先使用快照中的工具列表，工具注册完成后会自动刷新
+        snapshot = self.resumed_snapshot
+        if snapshot is not None and snapshot.functions:
+            self.func_handler.tool_manager.prime_function_descriptions(
+                snapshot.functions
+            )
+
         # 异步初始化工具处理器
         if hasattr(self, "loop") and self.loop:
             asyncio.run_coroutine_threadsafe(self.func_handler._initialize(), self.loop)
 
+    def submit_llm_task(self, fn, *args):
+        """提交LLM相关任务到全局调度器，返回Future；协程函数需在事件循环线程中提交"""
+        provider = self.config.get("selected_module", {}).get("LLM")
+        return self.llm_scheduler.submit(
+            self.device_id, self.session_id, provider, fn, *args
+        )
+
     def change_system_prompt(self, prompt):
         self.prompt = prompt
         # 更新系统prompt至上下文
         self.dialogue.update_system_message(self.prompt)
 
     def chat(self, query, depth=0):
+        """同步对话入口，供运行在工作线程中的调用方使用，实际在事件循环中执行achat"""
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            # 在事件循环线程中同步等待achat会造成死锁
+            raise RuntimeError("不能在事件循环线程中调用chat()，请使用 await achat()")
+        # 不经过LLM调度器的对话单独计数，供优雅下线和休眠判断
+        self.active_chats += 1
+        try:
+            return asyncio.run_coroutine_threadsafe(
+                self.achat(query, depth), self.loop
+            ).result()
+        finally:
+            self.active_chats -= 1
+
+    async def achat(self, query, depth=0):
         if query is not None:
             self.logger.bind(tag=TAG).info(f"大模型收到用户消息: {query}")
 
@@ -940,14 +1201,11 @@ class ConnectionHandler:
             memory_str = None
             # 仅当query非空（代表用户询问）时查询记忆
             if self.memory is not None and query:
-                future = asyncio.run_coroutine_threadsafe(
-                    self.memory.query_memory(query), self.loop
-                )
-                memory_str = future.result()
+                memory_str = await self.memory.query_memory(query)
 
             if self.intent_type == "function_call" and functions is not None:
-                # 使用支持functions的streaming接口
-                llm_responses = self.llm.response_with_functions(
+                # 使用支持functions的streaming接口，未实现原生异步的LLM会在独立线程中运行
+                llm_responses = self.llm.aresponse_with_functions(
                     self.session_id,
                     self.dialogue.get_llm_dialogue_with_memory(
                         memory_str, self.config.get("voiceprint", {})
@@ -955,7 +1213,7 @@ class ConnectionHandler:
                     functions=functions,
                 )
             else:
-                llm_responses = self.llm.response(
+                llm_responses = self.llm.aresponse(
                     self.session_id,
                     self.dialogue.get_llm_dialogue_with_memory(
                         memory_str, self.config.get("voiceprint", {})
@@ -973,7 +1231,7 @@ class ConnectionHandler:
         self.client_abort = False
         emotion_flag = True
         try:
-            for response in llm_responses:
+            async for response in llm_responses:
                 if self.client_abort:
                     break
                 if self.intent_type == "function_call" and functions is not None:
@@ -996,10 +1254,7 @@ class ConnectionHandler:
 
                 # 在llm回复中获取情绪表情，一轮对话只在开头获取一次
                 if emotion_flag and content is not None and content.strip():
-                    asyncio.run_coroutine_threadsafe(
-                        textUtils.get_emotion(self, content),
-                        self.loop,
-                    )
+                    asyncio.create_task(textUtils.get_emotion(self, content))
                     emotion_flag = False
 
                 if content is not None and len(content) > 0:
@@ -1013,6 +1268,13 @@ class ConnectionHandler:
                                 content_detail=content,
                             )
                         )
+        except asyncio.CancelledError:
+            # 客户端打断时调度器取消本任务，保留已播报的部分回复
+            if response_message and not tool_call_flag:
+                self.dialogue.put(
+                    Message(role="assistant", content="".join(response_message))
+                )
+            raise
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"LLM stream processing error: {e}")
             self.tts.tts_text_queue.put(
@@ -1032,6 +1294,9 @@ class ConnectionHandler:
                     )
                 )
             return
+        finally:
+            # 被打断时及时结束上游流式请求
+            await llm_responses.aclose()
         # 处理function call
         if tool_call_flag:
             bHasError = False
@@ -1083,30 +1348,23 @@ class ConnectionHandler:
                     f"检测到 {len(tool_calls_list)} 个工具调用"
                 )
 
-                # 收集所有工具调用的 Future
-                futures_with_data = []
+                # 并发执行所有工具调用
                 for tool_call_data in tool_calls_list:
                     self.logger.bind(tag=TAG).debug(
                         f"function_name={tool_call_data['name']}, function_id={tool_call_data['id']}, function_arguments={tool_call_data['arguments']}"
                     )
-
-                    future = asyncio.run_coroutine_threadsafe(
-                        self.func_handler.handle_llm_function_call(
-                            self, tool_call_data
-                        ),
-                        self.loop,
-                    )
-                    futures_with_data.append((future, tool_call_data))
-
                 # 等待协程结束（实际等待时长为最慢的那个）
-                tool_results = []
-                for future, tool_call_data in futures_with_data:
-                    result = future.result()
-                    tool_results.append((result, tool_call_data))
+                results = await asyncio.gather(
+                    *(
+                        self.func_handler.handle_llm_function_call(self, tool_call_data)
+                        for tool_call_data in tool_calls_list
+                    )
+                )
+                tool_results = list(zip(results, tool_calls_list))
 
                 # 统一处理所有工具调用结果
                 if tool_results:
-                    self._handle_function_result(tool_results, depth=depth)
+                    await self._handle_function_result(tool_results, depth=depth)
 
         # 存储对话内容
         if len(response_message) > 0:
@@ -1166,7 +1424,7 @@ class ConnectionHandler:
         result = "、".join(datas)
         return result
 
-    def _handle_function_result(self, tool_results, depth):
+    async def _handle_function_result(self, tool_results, depth):
         need_llm_tools = []
 
         for result, tool_call_data in tool_results:
@@ -1218,11 +1476,11 @@ class ConnectionHandler:
                         )
                     )
 
-            self.chat(None, depth=depth + 1)
+            await self.achat(None, depth=depth + 1)
 
     def _report_worker(self):
         """聊天记录上报工作线程"""
-        while not self.stop_event.is_set():
+        while not self.pipeline_stopped():
             try:
                 # 从队列获取数据，设置超时以便定期检查停止事件
                 item = self.report_queue.get(timeout=1)
@@ -1243,6 +1501,68 @@ class ConnectionHandler:
 
         self.logger.bind(tag=TAG).info("聊天记录上报线程已退出")
 
+    def _start_report_task(self):
+        """启动上报协程（asyncio流水线模式），必须在事件循环线程中调用"""
+        if self.report_task is None or self.report_task.done():
+            self.report_task = self.start_pipeline_task(self._report_loop())
+            self.logger.bind(tag=TAG).info("TTS上报协程已启动")
+
+    async def _report_loop(self):
+        """
+        聊天记录上报协程：音频转换（含Opus解码）在线程池中执行，
+        上传在事件循环中进行且不等待完成，慢上传不阻塞后续上报
+        """
+        while not self.pipeline_stopped():
+            try:
+                item = await self.report_queue.get()
+                if item is None:
+                    break
+                report_type, text, opus_data, report_time = item
+                try:
+                    audio_data = await self.loop.run_in_executor(
+                        self.executor, build_report_audio, self, opus_data
+                    )
+                except Exception as e:
+                    self.logger.bind(tag=TAG).error(f"聊天记录上报失败: {e}")
+                    continue
+                upload = asyncio.create_task(
+                    upload_report(self, report_type, text, audio_data, report_time)
+                )
+                self.report_uploads.add(upload)
+                upload.add_done_callback(self.report_uploads.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.bind(tag=TAG).error(f"聊天记录上报协程异常: {e}")
+
+    def pipeline_stopped(self) -> bool:
+        """各阶段线程和协程的退出条件：连接关闭或进入休眠"""
+        return self.stop_event.is_set() or self.hibernate_stop_event.is_set()
+
+    def llm_in_flight(self) -> bool:
+        """本会话是否有排队或执行中的LLM任务（含工具调用）"""
+        return self.llm_scheduler.pending_jobs(self.session_id) > 0
+
+    def start_pipeline_task(self, coro):
+        """在事件循环中启动流水线协程，连接关闭时统一取消"""
+        task = asyncio.create_task(coro)
+        self.pipeline_tasks.append(task)
+        return task
+
+    async def _cancel_pipeline_tasks(self):
+        # close 可能由流水线协程自身触发（如播放结束后关闭连接），当前协程会在stop_event置位后自行退出
+        current = asyncio.current_task()
+        tasks = [
+            task
+            for task in self.pipeline_tasks
+            if not task.done() and task is not current
+        ]
+        self.pipeline_tasks = []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     def _process_report(self, type, text, audio_data, report_time):
         """处理上报任务"""
         try:
@@ -1258,9 +1578,44 @@ class ConnectionHandler:
         self.client_is_speaking = False
         self.logger.bind(tag=TAG).debug(f"清除服务端讲话状态")
 
+    def turn_in_progress(self) -> bool:
+        """
+        本轮对话是否仍在进行：设备在说话、大模型或工具调用尚未结束、
+        还有待处理的音频或待合成、待播放的内容
+        """
+        if self.client_is_speaking or self.client_have_voice:
+            return True
+        if self.active_chats or self.llm_in_flight():
+            return True
+        if self.asr_audio_queue.qsize():
+            return True
+        tts = self.tts
+        return tts is not None and bool(
+            tts.tts_text_queue.qsize() or tts.tts_audio_queue.qsize()
+        )
+
+    def start_drain(self):
+        """服务优雅下线：空闲连接立即关闭，正在进行的对话在本轮播放结束后关闭"""
+        if self.turn_in_progress():
+            self.close_after_chat = True
+        else:
+            asyncio.create_task(self.close(self.websocket))
+
+    async def _flush_reports(self, timeout=5):
+        """等待聊天记录上报队列清空、进行中的上报完成"""
+        deadline = time.time() + timeout
+        while (
+            self.report_queue.qsize() > 0 or self.report_uploads
+        ) and time.time() < deadline:
+            await asyncio.sleep(0.1)
+
     async def close(self, ws=None):
         """资源清理方法"""
         try:
+            # 优雅下线时，先让已入队的聊天记录上报完成
+            if self.server and self.server.draining and not self.stop_event.is_set():
+                await self._flush_reports()
+
             # 清理 VAD 连接资源
             if (
                     hasattr(self, "vad")
@@ -1273,6 +1628,23 @@ class ConnectionHandler:
             if hasattr(self, "audio_buffer"):
                 self.audio_buffer.clear()
 
+            # 取消抖动缓冲的定时输出，并记录本次会话的乱序和丢包情况
+            if self.jitter_flush_handle is not None:
+                self.jitter_flush_handle.cancel()
+                self.jitter_flush_handle = None
+            if self.jitter_buffer is not None:
+                self.logger.bind(tag=TAG).info(
+                    f"MQTT音频抖动缓冲统计: {self.jitter_buffer.stats}"
+                )
+
+            # 取消进行中的推测识别
+            self.speculative_asr.cancel()
+
+            # 丢弃初始化期间缓存且尚未处理的消息
+            if self.pre_init_task and not self.pre_init_task.done():
+                self.pre_init_task.cancel()
+            self.pre_init_buffer.clear()
+
             # 取消超时任务
             if self.timeout_task and not self.timeout_task.done():
                 self.timeout_task.cancel()
@@ -1295,6 +1667,12 @@ class ConnectionHandler:
             if self.stop_event:
                 self.stop_event.set()
 
+            # 取消asyncio流水线中的协程
+            await self._cancel_pipeline_tasks()
+
+            # 取消全局调度器中该连接排队和执行中的LLM任务
+            self.llm_scheduler.cancel(self.session_id)
+
             # 清空任务队列
             self.clear_queues()
 
@@ -1399,6 +1777,7 @@ class ConnectionHandler:
 
         # Clear ASR buffers
         self.asr_audio.clear()
+        self.speculative_asr.cancel()
 
         self.logger.bind(tag=TAG).debug("All audio states reset.")
 
@@ -1437,6 +1816,8 @@ class ConnectionHandler:
                                     f"超时关闭连接时出错: {close_error}"
                                 )
                         break
+                    if self._should_hibernate():
+                        await self._hibernate()
                 # 每10秒检查一次，避免过于频繁
                 await asyncio.sleep(10)
         except Exception as e:
@@ -1444,6 +1825,110 @@ class ConnectionHandler:
         finally:
             self.logger.bind(tag=TAG).info("超时检查任务已退出")
 
+    @staticmethod
+    def _is_ping_message(message):
+        if not isinstance(message, str):
+            return False
+        try:
+            return json.loads(message).get("type") == "ping"
+        except Exception:
+            return False
+
+    def _should_hibernate(self):
+        """会话是否空闲到可以休眠"""
+        if not self.hibernate_idle_seconds or self.hibernated or self.need_bind:
+            return False
+        # 组件尚未初始化完成
+        if self.tts is None or self.asr is None:
+            return False
+        # 正在说话、大模型回复或工具调用尚未结束，或还有待处理的数据
+        if self.turn_in_progress():
+            return False
+        current_time = time.time() * 1000
+        idle_since = max(self.last_message_time, self.last_activity_time)
+        return current_time - idle_since > self.hibernate_idle_seconds * 1000
+
+    async def _hibernate(self):
+        """
+        空闲休眠：释放TTS、ASR、VAD状态和各阶段线程，只保留对话上下文和WebSocket连接
+        下一次收到音频或listen等消息时由 _wake_up 按需重建
+        """
+        async with self.hibernation_lock:
+            if not self._should_hibernate():
+                return
+            self.hibernated = True
+            begin_time = time.time()
+            tts, asr = self.tts, self.asr
+            threads = [
+                thread
+                for thread in (
+                    getattr(self, "asr_priority_thread", None),
+                    getattr(tts, "tts_priority_thread", None),
+                    getattr(tts, "audio_play_priority_thread", None),
+                    self.report_thread,
+                )
+                if thread is not None and thread.is_alive()
+            ]
+
+            # 置位休眠停止信号让各阶段线程和协程按原有逻辑退出，stop_event保持不变
+            self.hibernate_stop_event.set()
+            await self._cancel_pipeline_tasks()
+            alive = await self.loop.run_in_executor(None, join_threads, threads, 5)
+            self.hibernate_stop_event.clear()
+            if alive:
+                self.logger.bind(tag=TAG).warning(
+                    f"休眠时有 {len(alive)} 个线程未能及时退出"
+                )
+
+            self.tts = None
+            self.asr = None
+            self.report_thread = None
+            if tts:
+                await tts.close()
+            # 本地ASR为所有连接共享，不能关闭
+            if asr and asr is not self._asr:
+                await asr.close()
+            if self.vad and hasattr(self.vad, "release_conn_resources"):
+                self.vad.release_conn_resources(self)
+            if hasattr(self, "audio_rate_controller"):
+                self.audio_rate_controller.stop_sending()
+            self.reset_audio_states()
+
+            # 线程池中的空闲线程也一并释放，恢复时按需重新创建
+            if self.executor:
+                self.executor.shutdown(wait=False)
+                self.executor = ThreadPoolExecutor(max_workers=5)
+
+            self.logger.bind(tag=TAG).info(
+                f"会话空闲超过{self.hibernate_idle_seconds}秒，已进入休眠，耗时{time.time() - begin_time:.3f}秒"
+            )
+
+    def _build_session_components(self):
+        """创建TTS和ASR实例，在线程池中执行"""
+        return self._initialize_tts(), self._initialize_asr()
+
+    async def _wake_up(self):
+        """从休眠中恢复，重建TTS、ASR和上报线程"""
+        async with self.hibernation_lock:
+            if not self.hibernated:
+                return
+            begin_time = time.time()
+            try:
+                tts, asr = await self.loop.run_in_executor(
+                    self.executor, self._build_session_components
+                )
+                self.tts, self.asr = tts, asr
+                await self.tts.open_audio_channels(self)
+                await self.asr.open_audio_channels(self)
+                self._init_report_threads()
+                self.hibernated = False
+                self.logger.bind(tag=TAG).info(
+                    f"会话已从休眠中恢复，耗时{time.time() - begin_time:.3f}秒"
+                )
+            except Exception as e:
+                # 保持休眠状态，下一条消息到来时重试
+                self.logger.bind(tag=TAG).error(f"会话从休眠中恢复失败: {e}")
+
     def _merge_tool_calls(self, tool_calls_list, tools_call):
         """合并工具调用列表
 
@@ -0,0 +1,140 @@
+"""
+优雅下线与热重启
+1. 热重启：启动一个新的服务进程，新进程通过SO_REUSEPORT绑定同一端口，就绪后用SIGUSR1通知旧进程
+2. 优雅下线：旧进程收到SIGUSR1后不再接受新连接，空闲连接立即关闭（设备重连到新进程），
+   正在进行的对话在本轮结束后关闭，最长等待drain_timeout秒，并等待记忆保存和聊天记录上报完成后退出
+
+信号约定（仅Linux/macOS）：
+- SIGUSR2: 请求热重启，单进程模式下由当前进程拉起新进程，多进程模式下由父进程逐个滚动替换worker
+- SIGUSR1: 继任进程已就绪，当前进程开始优雅下线
+"""
+
+import os
+import sys
+import signal
+import asyncio
+import subprocess
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 新进程通过该环境变量得知需要通知的旧进程pid
+PREDECESSOR_PID_ENV = "XIAOZHI_PREDECESSOR_PID"
+# 等待新进程就绪的最长时间，新进程需要加载模型
+SUCCESSOR_READY_TIMEOUT = 180
+DEFAULT_DRAIN_TIMEOUT = 60
+
+
+def hot_restart_supported() -> bool:
+    """当前平台是否支持热重启"""
+    return (
+        sys.platform != "win32"
+        and hasattr(signal, "SIGUSR1")
+        and hasattr(signal, "SIGUSR2")
+    )
+
+
+def notify_predecessor():
+    """新进程就绪后通知旧进程开始优雅下线"""
+    pid = os.environ.pop(PREDECESSOR_PID_ENV, None)
+    if not pid:
+        return
+    try:
+        os.kill(int(pid), signal.SIGUSR1)
+        logger.bind(tag=TAG).info(f"已通知旧进程 {pid} 开始优雅下线")
+    except (ProcessLookupError, ValueError) as e:
+        logger.bind(tag=TAG).warning(f"通知旧进程失败: {e}")
+
+
+class GracefulRestarter:
+    """单个服务进程内的热重启和优雅下线控制"""
+
+    def __init__(
+        self,
+        ws_server,
+        http_server,
+        stop_event: asyncio.Event,
+        drain_timeout=DEFAULT_DRAIN_TIMEOUT,
+        worker_mode=False,
+    ):
+        """
+        Args:
+            ws_server: WebSocketServer实例
+            http_server: SimpleHttpServer实例
+            stop_event: 置位后主流程退出
+            drain_timeout: 等待进行中的对话结束的最长秒数
+            worker_mode: 是否为多进程模式下的worker
+        """
+        self.ws_server = ws_server
+        self.http_server = http_server
+        self.stop_event = stop_event
+        self.drain_timeout = drain_timeout
+        self.worker_mode = worker_mode
+        self._successor_ready = asyncio.Event()
+        self._restarting = False
+        self._drain_task = None
+
+    def install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGUSR1, self._on_successor_ready)
+        if not self.worker_mode:
+            loop.add_signal_handler(signal.SIGUSR2, self.request_restart)
+
+    def _on_successor_ready(self):
+        self._successor_ready.set()
+        if not self._restarting:
+            # 多进程模式下由父进程拉起继任worker，这里直接进入下线流程
+            self.start_drain()
+
+    def request_restart(self) -> bool:
+        """请求热重启，返回是否已受理"""
+        if self._restarting or self.ws_server.draining:
+            return False
+        if self.worker_mode:
+            # 交给父进程滚动替换所有worker，保证配置一致
+            os.kill(os.getppid(), signal.SIGUSR2)
+            return True
+        self._restarting = True
+        asyncio.create_task(self._hot_restart())
+        return True
+
+    async def _hot_restart(self):
+        env = dict(os.environ)
+        env[PREDECESSOR_PID_ENV] = str(os.getpid())
+        logger.bind(tag=TAG).info("开始热重启，正在启动新进程...")
+        successor = subprocess.Popen(
+            [sys.executable] + sys.argv,
+            stdin=sys.stdin,
+            stdout=sys.stdout,
+            stderr=sys.stderr,
+            env=env,
+            start_new_session=True,
+        )
+        try:
+            await asyncio.wait_for(
+                self._successor_ready.wait(), SUCCESSOR_READY_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.bind(tag=TAG).error(
+                f"新进程 {successor.pid} 在{SUCCESSOR_READY_TIMEOUT}秒内未就绪，放弃本次热重启"
+            )
+            if successor.poll() is None:
+                successor.terminate()
+            self._restarting = False
+            return
+        logger.bind(tag=TAG).info(f"新进程 {successor.pid} 已就绪")
+        self.start_drain()
+
+    def start_drain(self):
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        try:
+            await self.http_server.stop()
+            await self.ws_server.drain(self.drain_timeout)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"优雅下线出错: {e}")
+        finally:
+            self.stop_event.set()
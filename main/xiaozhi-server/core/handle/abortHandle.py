@@ -10,6 +10,8 @@ async def handleAbortMessage(conn: "ConnectionHandler"):
     conn.logger.bind(tag=TAG).info("Abort message received")
     # 设置成打断状态，会自动打断llm、tts任务
     conn.client_abort = True
+    # 取消全局调度器中排队和执行中的LLM任务，释放并发名额并结束上游请求
+    conn.llm_scheduler.cancel(conn.session_id)
     conn.clear_queues()
     # 打断客户端说话状态
     await conn.websocket.send(
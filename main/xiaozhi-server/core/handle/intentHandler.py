@@ -71,6 +71,10 @@ async def analyze_intent_with_llm(conn: "ConnectionHandler", text):
     # 对话历史记录
     dialogue = conn.dialogue
     try:
+        # 静音期间已经开始的推测意图识别
+        speculative_task = conn.speculative_asr.take_intent(text)
+        if speculative_task is not None:
+            return await speculative_task
         intent_result = await conn.intent.detect_intent(conn, dialogue.dialogue, text)
         return intent_result
     except Exception as e:
@@ -118,9 +122,12 @@ async def process_intent_result(
                                         请根据以上信息回答用户的问题：{original_text}"""
 
                     response = conn.intent.replyResult(context_prompt, original_text)
+                    # 等待回复期间客户端已打断
+                    if conn.llm_scheduler.current_job_cancelled():
+                        return
                     speak_txt(conn, response)
 
-                conn.executor.submit(process_context_result)
+                conn.submit_llm_task(process_context_result)
                 return True
 
             function_args = {}
@@ -159,6 +166,9 @@ async def process_intent_result(
                         action=Action.ERROR, result=str(e), response=str(e)
                     )
 
+                # 工具执行期间客户端已打断
+                if conn.llm_scheduler.current_job_cancelled():
+                    return
                 if result:
                     if result.action == Action.RESPONSE:  # 直接回复前端
                         text = result.response
@@ -168,6 +178,8 @@ async def process_intent_result(
                         text = result.result
                         conn.dialogue.put(Message(role="tool", content=text))
                         llm_result = conn.intent.replyResult(text, original_text)
+                        if conn.llm_scheduler.current_job_cancelled():
+                            return
                         if llm_result is None:
                             llm_result = text
                         speak_txt(conn, llm_result)
@@ -187,8 +199,8 @@ async def process_intent_result(
                         if text is not None:
                             speak_txt(conn, text)
 
-            # 将函数执行放在线程池中
-            conn.executor.submit(process_function_call)
+            # 将函数执行放到全局LLM调度器中
+            conn.submit_llm_task(process_function_call)
             return True
         return False
     except json.JSONDecodeError as e:
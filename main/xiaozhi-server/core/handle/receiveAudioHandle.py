@@ -15,8 +15,10 @@ TAG = __name__
 
 
 async def handleAudioMessage(conn: "ConnectionHandler", audio):
+    # 音频包在这里统一解码一次，VAD、ASR、声纹识别和上报共用解码结果
+    audio = conn.uplink_decoder.decode(audio, conn.audio_format)
     # 当前片段是否有人说话
-    have_voice = conn.vad.is_vad(conn, audio)
+    have_voice = await conn.vad.is_vad_async(conn, audio)
     # 如果设备刚刚被唤醒，短暂忽略VAD检测
     if hasattr(conn, "just_woken_up") and conn.just_woken_up:
         have_voice = False
@@ -92,7 +94,7 @@ async def startToChat(conn: "ConnectionHandler", text):
 
     # 意图未被处理，继续常规聊天流程，使用实际文本内容
     await send_stt_message(conn, actual_text)
-    conn.executor.submit(conn.chat, actual_text)
+    conn.submit_llm_task(conn.achat, actual_text)
 
 
 async def no_voice_close_connect(conn: "ConnectionHandler", have_voice):
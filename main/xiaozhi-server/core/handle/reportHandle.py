@@ -12,6 +12,7 @@ TTS上报功能已集成到ConnectionHandler类中。
 import time
 import opuslib_next
 from typing import TYPE_CHECKING
+from core.utils.uplink_audio import frame_pcm
 
 if TYPE_CHECKING:
     from core.connection import ConnectionHandler
@@ -32,11 +33,23 @@ async def report(conn: "ConnectionHandler", type, text, opus_data, report_time):
         report_time: 上报时间
     """
     try:
-        if opus_data:
-            audio_data = opus_to_wav(conn, opus_data)
-        else:
-            audio_data = None
-        # 执行异步上报
+        audio_data = build_report_audio(conn, opus_data)
+    except Exception as e:
+        conn.logger.bind(tag=TAG).error(f"聊天记录上报失败: {e}")
+        return
+    await upload_report(conn, type, text, audio_data, report_time)
+
+
+def build_report_audio(conn: "ConnectionHandler", opus_data):
+    """把上报的opus音频转成WAV，包含完整的Opus解码，耗CPU，不应在事件循环中执行"""
+    if not opus_data:
+        return None
+    return opus_to_wav(conn, opus_data)
+
+
+async def upload_report(conn: "ConnectionHandler", type, text, audio_data, report_time):
+    """上传一条聊天记录，audio_data为build_report_audio的结果"""
+    try:
         await manage_report(
             mac_address=conn.device_id,
             session_id=conn.session_id,
@@ -61,10 +74,16 @@ def opus_to_wav(conn: "ConnectionHandler", opus_data):
     """
     decoder = None
     try:
-        decoder = opuslib_next.Decoder(16000, 1)  # 16kHz, 单声道
         pcm_data = []
 
         for opus_packet in opus_data:
+            # 设备上传的音频在连接入口已解码过，直接复用
+            pcm_frame = frame_pcm(opus_packet)
+            if pcm_frame is not None:
+                pcm_data.append(pcm_frame)
+                continue
+            if decoder is None:
+                decoder = opuslib_next.Decoder(16000, 1)  # 16kHz, 单声道
             try:
                 pcm_frame = decoder.decode(opus_packet, 960)  # 960 samples = 60ms
                 pcm_data.append(pcm_frame)
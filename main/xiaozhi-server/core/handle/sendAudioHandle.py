@@ -84,17 +84,20 @@ async def _send_to_mqtt_gateway(
         timestamp: 时间戳
         sequence: 序列号
     """
-    # 为opus数据包添加16字节头部
+    # 发送包含头部的完整数据包
+    complete_packet = build_mqtt_audio_packet(opus_packet, timestamp, sequence)
+    await conn.websocket.send(complete_packet)
+
+
+def build_mqtt_audio_packet(opus_packet, timestamp, sequence) -> bytes:
+    """为opus数据包添加mqtt_gateway要求的16字节头部"""
     header = bytearray(16)
     header[0] = 1  # type
     header[2:4] = len(opus_packet).to_bytes(2, "big")  # payload length
     header[4:8] = sequence.to_bytes(4, "big")  # sequence
     header[8:12] = timestamp.to_bytes(4, "big")  # 时间戳
     header[12:16] = len(opus_packet).to_bytes(4, "big")  # opus长度
-
-    # 发送包含头部的完整数据包
-    complete_packet = bytes(header) + opus_packet
-    await conn.websocket.send(complete_packet)
+    return bytes(header) + opus_packet
 
 
 async def sendAudio(
@@ -3,16 +3,22 @@ from aiohttp import web
 from config.logger import setup_logging
 from core.api.ota_handler import OTAHandler
 from core.api.vision_handler import VisionHandler
+from core.api.health_handler import HealthHandler
 
 TAG = __name__
 
 
 class SimpleHttpServer:
-    def __init__(self, config: dict):
+    def __init__(
+        self, config: dict, ws_server=None, status_board=None, reuse_port=False
+    ):
         self.config = config
         self.logger = setup_logging()
+        self.reuse_port = reuse_port
+        self.site = None
         self.ota_handler = OTAHandler(config)
         self.vision_handler = VisionHandler(config)
+        self.health_handler = HealthHandler(config, ws_server, status_board)
 
     def _get_websocket_url(self, local_ip: str, port: int) -> str:
         """获取websocket地址
@@ -72,14 +78,17 @@ class SimpleHttpServer:
                         web.options(
                             "/mcp/vision/explain", self.vision_handler.handle_options
                         ),
+                        web.get("/xiaozhi/health", self.health_handler.handle_get),
                     ]
                 )
 
                 # 运行服务
                 runner = web.AppRunner(app)
                 await runner.setup()
-                site = web.TCPSite(runner, host, port)
-                await site.start()
+                self.site = web.TCPSite(
+                    runner, host, port, reuse_port=self.reuse_port
+                )
+                await self.site.start()
 
                 # 保持服务运行
                 while True:
@@ -90,3 +99,9 @@ class SimpleHttpServer:
 
             self.logger.bind(tag=TAG).error(f"错误堆栈: {traceback.format_exc()}")
             raise
+
+    async def stop(self):
+        """停止监听，优雅下线时调用，已建立的请求不受影响"""
+        if self.site is not None:
+            await self.site.stop()
+            self.site = None
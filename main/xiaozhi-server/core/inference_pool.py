@@ -0,0 +1,499 @@
+"""
+本地推理进程池
+Silero VAD和本地ASR（fun_local、sherpa_onnx_local、vosk）默认在服务进程内推理，
+即使底层推理释放了GIL，每次调用前后的Python代码仍需竞争GIL，识别负载高时事件循环会明显卡顿。
+开启后由若干推理进程各自加载模型：
+1. 音频和模型输入写入预先分配的共享内存块，只通过队列传递共享内存名和数据布局，不再序列化音频
+2. 推理结果（文本、语音概率和模型状态）通过各推理进程独立的结果管道返回，由收集线程分发给等待方，
+   推理进程在写入结果途中被杀死时只影响它自己的管道
+3. 任务按各进程进行中的任务数分配，收集线程按固定间隔检查推理进程是否存活，
+   推理进程异常退出时其任务立即失败并自动重启该进程
+"""
+
+import os
+import time
+import queue
+import signal
+import asyncio
+import itertools
+import threading
+import multiprocessing
+import concurrent.futures
+from multiprocessing.connection import wait
+from multiprocessing import shared_memory
+import numpy as np
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 可在推理进程中运行的本地ASR类型
+POOLED_ASR_TYPES = ("fun_local", "sherpa_onnx_local", "vosk")
+# 共享内存中各数组的起始位置按该字节数对齐
+ALIGNMENT = 64
+# 推理进程存活检查间隔（秒），与是否有结果返回无关
+HEALTH_CHECK_INTERVAL = 0.5
+
+
+def _aligned(size):
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _attach(name):
+    """
+    推理进程按名称打开父进程创建的共享内存，生命周期由父进程管理
+    spawn出的推理进程与父进程共用同一个resource_tracker，重复登记不会导致共享内存被提前删除
+    """
+    return shared_memory.SharedMemory(name=name)
+
+
+def _create_asr_runner(spec):
+    from core.utils import asr
+
+    provider = asr.create_instance(spec["type"], spec["config"], spec["delete_audio"])
+    loop = asyncio.new_event_loop()
+
+    def run(arrays, meta):
+        pcm = arrays[0].tobytes()
+        text, _ = loop.run_until_complete(
+            provider.speech_to_text_wrapper(
+                [], meta["session_id"], "pcm", pcm=([pcm], pcm)
+            )
+        )
+        return text
+
+    return run
+
+
+def _create_vad_runner(spec):
+    import onnxruntime
+
+    opts = onnxruntime.SessionOptions()
+    opts.inter_op_num_threads = 1
+    opts.intra_op_num_threads = int(spec.get("threads", 1))
+    session = onnxruntime.InferenceSession(
+        spec["model_path"], providers=["CPUExecutionProvider"], sess_options=opts
+    )
+    sr = np.array(16000, dtype=np.int64)
+
+    def run(arrays, meta):
+        audio_input, state = arrays
+        return session.run(None, {"input": audio_input, "state": state, "sr": sr})
+
+    return run
+
+
+RUNNER_FACTORIES = {"asr": _create_asr_runner, "vad": _create_vad_runner}
+
+
+def _worker_main(index, specs, job_queue, result_conn):
+    """推理进程入口"""
+    # 由父进程负责退出，忽略终端的Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    runners = {}
+    for kind, spec in specs.items():
+        try:
+            runners[kind] = RUNNER_FACTORIES[kind](spec)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"推理进程{index}加载{kind}模型失败: {e}")
+    logger.bind(tag=TAG).info(
+        f"推理进程{index}已就绪，pid={os.getpid()}，模型: {list(runners)}"
+    )
+
+    slabs = {}
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        job_id, kind, slab_name, temporary, layout, meta = job
+        shm = None
+        arrays = None
+        try:
+            shm = slabs.get(slab_name)
+            if shm is None:
+                shm = _attach(slab_name)
+                if not temporary:
+                    slabs[slab_name] = shm
+            arrays = [
+                np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+                for dtype, shape, offset in layout
+            ]
+            runner = runners.get(kind)
+            if runner is None:
+                raise RuntimeError(f"推理进程未加载{kind}模型")
+            result_conn.send((job_id, runner(arrays, meta), None))
+        except Exception as e:
+            result_conn.send((job_id, None, f"{type(e).__name__}: {e}"))
+        finally:
+            # 先释放对共享内存的引用才能关闭
+            arrays = None
+            if temporary and shm is not None:
+                shm.close()
+
+    for shm in slabs.values():
+        shm.close()
+    result_conn.close()
+
+
+class _Worker:
+    __slots__ = ("index", "process", "jobs", "results", "inflight", "restarts")
+
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.jobs = None
+        # 只由该推理进程写入的结果管道读端
+        self.results = None
+        self.inflight = set()
+        self.restarts = 0
+
+
+class InferencePool:
+    """推理进程池，可以在任意线程中提交任务"""
+
+    def __init__(
+        self, specs: dict, workers=2, slab_count=8, slab_size_kb=2048, timeout=60
+    ):
+        """
+        Args:
+            specs: {"asr": ASR配置, "vad": VAD配置}，只包含需要在推理进程中运行的模型
+            workers: 推理进程数
+            slab_count: 预先分配的共享内存块数量
+            slab_size_kb: 每个共享内存块的大小，超过该大小的任务临时分配共享内存
+            timeout: 单个任务的超时秒数
+        """
+        self.specs = specs
+        self.timeout = float(timeout)
+        # spawn方式启动，推理进程不继承服务进程的线程和已加载的模型
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slab_size = int(slab_size_kb) * 1024
+        self._slabs = {}
+        self._free_slabs = queue.Queue()
+        for _ in range(max(1, int(slab_count))):
+            shm = shared_memory.SharedMemory(create=True, size=self._slab_size)
+            self._slabs[shm.name] = shm
+            self._free_slabs.put(shm)
+        self._lock = threading.Lock()
+        # job_id -> (future, worker, 共享内存, 是否临时, 提交时间, 任务类型)
+        self._jobs = {}
+        self._job_ids = itertools.count()
+        self._workers = [_Worker(i) for i in range(max(1, int(workers)))]
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "temporary_slabs": 0,
+            "busy_seconds": 0.0,
+        }
+        self._closed = False
+        for worker in self._workers:
+            self._spawn(worker)
+        self._collector = threading.Thread(
+            target=self._collect, name="inference-pool-results", daemon=True
+        )
+        self._collector.start()
+
+    def handles(self, kind) -> bool:
+        return kind in self.specs
+
+    def handles_asr(self, asr_type, asr_config) -> bool:
+        """ASR类型和配置都与推理进程中加载的一致时才能使用进程池"""
+        spec = self.specs.get("asr")
+        return (
+            spec is not None
+            and spec["type"] == asr_type
+            and spec["config"] == asr_config
+        )
+
+    def _spawn(self, worker):
+        if worker.results is not None:
+            worker.results.close()
+        if worker.jobs is None:
+            worker.jobs = self._ctx.Queue()
+        worker.results, result_conn = self._ctx.Pipe(duplex=False)
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.index, self.specs, worker.jobs, result_conn),
+            name=f"xiaozhi-inference-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        # 父进程不持有写端，推理进程退出后读端能立即收到EOF
+        result_conn.close()
+
+    def submit(self, kind, arrays, meta=None) -> concurrent.futures.Future:
+        """
+        提交推理任务，数组写入共享内存后立即返回
+
+        Args:
+            kind: 任务类型，asr或vad
+            arrays: numpy数组列表，推理进程中按相同顺序和形状读取
+            meta: 随任务传递的少量参数
+        """
+        future = concurrent.futures.Future()
+        if self._closed:
+            future.set_exception(RuntimeError("推理进程池已关闭"))
+            return future
+
+        layout = []
+        size = 0
+        for array in arrays:
+            layout.append((array.dtype.str, array.shape, size))
+            size = _aligned(size + array.nbytes)
+        shm = None
+        if size <= self._slab_size:
+            try:
+                shm = self._free_slabs.get_nowait()
+            except queue.Empty:
+                pass
+        # 数据超过共享内存块大小或共享内存块都在使用中时，临时分配，不阻塞调用方
+        temporary = shm is None
+        if temporary:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        for array, (dtype, shape, offset) in zip(arrays, layout):
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = array
+
+        with self._lock:
+            job_id = next(self._job_ids)
+            worker = min(self._workers, key=lambda w: len(w.inflight))
+            worker.inflight.add(job_id)
+            self._jobs[job_id] = (
+                future,
+                worker,
+                shm,
+                temporary,
+                time.monotonic(),
+                kind,
+            )
+            self._stats["submitted"] += 1
+            if temporary:
+                self._stats["temporary_slabs"] += 1
+            worker.jobs.put((job_id, kind, shm.name, temporary, layout, meta or {}))
+        return future
+
+    async def run(self, kind, arrays, meta=None):
+        """在事件循环中提交任务并等待结果"""
+        future = self.submit(kind, arrays, meta)
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def _finish(self, job_id):
+        """从任务表中移除任务并归还共享内存，返回任务信息"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return None
+            future, worker, shm, temporary, submitted_at, _ = job
+            worker.inflight.discard(job_id)
+            self._stats["busy_seconds"] += time.monotonic() - submitted_at
+        if temporary:
+            shm.close()
+            shm.unlink()
+        else:
+            self._free_slabs.put(shm)
+        return future
+
+    def _collect(self):
+        next_check = time.monotonic() + HEALTH_CHECK_INTERVAL
+        while not self._closed:
+            readers = {worker.results: worker for worker in self._workers}
+            timeout = max(0.0, next_check - time.monotonic())
+            for conn in wait(list(readers), timeout=timeout):
+                if self._closed:
+                    break
+                worker = readers[conn]
+                try:
+                    job_id, result, error = conn.recv()
+                except Exception as e:
+                    # 推理进程已退出或写入途中被杀死，该管道中的数据不再可信
+                    self._restart(worker, f"结果管道不可用({type(e).__name__})")
+                    continue
+                self._dispatch(job_id, result, error)
+            # 结果持续返回时也按固定间隔检查，不依赖结果管道空闲
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + HEALTH_CHECK_INTERVAL
+
+    def _dispatch(self, job_id, result, error):
+        future = self._finish(job_id)
+        if future is None:
+            return
+        if error is None:
+            self._stats["completed"] += 1
+            future.set_result(result)
+        else:
+            self._stats["failed"] += 1
+            future.set_exception(RuntimeError(error))
+
+    def _check_workers(self):
+        """推理进程异常退出时，其进行中的任务立即失败，然后重启该进程"""
+        for worker in self._workers:
+            if self._closed or worker.process.is_alive():
+                continue
+            self._restart(worker, "异常退出")
+
+    def _restart(self, worker, reason):
+        if self._closed:
+            return
+        process = worker.process
+        # 结果管道损坏时进程可能仍在运行，先结束它再重启
+        if process.is_alive():
+            process.join(timeout=1)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        logger.bind(tag=TAG).error(
+            f"推理进程{worker.index}(pid={process.pid}){reason}，"
+            f"退出码={process.exitcode}，正在重启"
+        )
+        # 与提交任务互斥地换上新的任务队列，之后提交的任务不会落入旧队列而丢失
+        with self._lock:
+            job_ids = list(worker.inflight)
+            worker.jobs = self._ctx.Queue()
+        for job_id in job_ids:
+            future = self._finish(job_id)
+            if future is not None:
+                self._stats["failed"] += 1
+                future.set_exception(RuntimeError("推理进程异常退出"))
+        worker.restarts += 1
+        self._spawn(worker)
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._jobs)
+            stats["workers"] = [
+                {
+                    "pid": worker.process.pid,
+                    "alive": worker.process.is_alive(),
+                    "inflight": len(worker.inflight),
+                    "restarts": worker.restarts,
+                }
+                for worker in self._workers
+            ]
+        stats["free_slabs"] = self._free_slabs.qsize()
+        stats["busy_seconds"] = round(stats["busy_seconds"], 3)
+        return stats
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            try:
+                worker.jobs.put(None)
+            except Exception:
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            future = self._finish(job_id)
+            if future is not None:
+                future.set_exception(RuntimeError("推理进程池已关闭"))
+        self._collector.join(timeout=HEALTH_CHECK_INTERVAL * 2)
+        for worker in self._workers:
+            worker.results.close()
+        for shm in self._slabs.values():
+            shm.close()
+            shm.unlink()
+        logger.bind(tag=TAG).info("推理进程池已关闭")
+
+
+class PooledVADSession:
+    """
+    与onnxruntime.InferenceSession用法一致的Silero推理会话，实际推理在进程池中执行
+    供VAD批量推理使用
+    """
+
+    def __init__(self, pool: InferencePool):
+        self.pool = pool
+
+    def run_async(self, output_names, inputs) -> concurrent.futures.Future:
+        return self.pool.submit("vad", [inputs["input"], inputs["state"]])
+
+    def run(self, output_names, inputs):
+        return self.run_async(output_names, inputs).result(self.pool.timeout)
+
+
+_pool = None
+
+
+def get_inference_pool():
+    """返回已启动的推理进程池，未开启时返回None"""
+    return _pool
+
+
+def _get_asr_spec(config):
+    select_asr_module = config["selected_module"].get("ASR")
+    if not select_asr_module:
+        return None
+    asr_config = config["ASR"][select_asr_module]
+    asr_type = asr_config.get("type", select_asr_module)
+    if asr_type not in POOLED_ASR_TYPES:
+        return None
+    return {
+        "type": asr_type,
+        "config": asr_config,
+        "delete_audio": str(config.get("delete_audio", True)).lower()
+        in ("true", "1", "yes"),
+    }
+
+
+def _get_vad_spec(config):
+    select_vad_module = config["selected_module"].get("VAD")
+    if not select_vad_module:
+        return None
+    vad_config = config["VAD"][select_vad_module]
+    if vad_config.get("type", select_vad_module) != "silero":
+        return None
+    # 只有批量推理会把窗口交给进程池
+    if not (vad_config.get("batch") or {}).get("enabled", False):
+        return None
+    return {
+        "model_path": os.path.join(
+            vad_config["model_dir"], "src", "silero_vad", "data", "silero_vad.onnx"
+        ),
+        "threads": (vad_config.get("batch") or {}).get("threads", 1),
+    }
+
+
+def start_inference_pool(config):
+    """按 server.inference_pool 配置启动推理进程池，需在初始化VAD和ASR之前调用"""
+    global _pool
+    pool_config = config["server"].get("inference_pool") or {}
+    if _pool is not None or not pool_config.get("enabled", False):
+        return _pool
+    specs = {}
+    if pool_config.get("asr", True):
+        asr_spec = _get_asr_spec(config)
+        if asr_spec:
+            specs["asr"] = asr_spec
+    if pool_config.get("vad", True):
+        vad_spec = _get_vad_spec(config)
+        if vad_spec:
+            specs["vad"] = vad_spec
+    if not specs:
+        logger.bind(tag=TAG).warning("当前选择的VAD和ASR都不需要推理进程池，不启动")
+        return None
+    _pool = InferencePool(
+        specs,
+        workers=pool_config.get("workers", 2),
+        slab_count=pool_config.get("slab_count", 8),
+        slab_size_kb=pool_config.get("slab_size_kb", 2048),
+        timeout=pool_config.get("timeout", 60),
+    )
+    logger.bind(tag=TAG).info(
+        f"推理进程池已启动，进程数: {len(_pool._workers)}，模型: {list(specs)}"
+    )
+    return _pool
+
+
+def stop_inference_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
@@ -13,6 +13,7 @@ from datetime import datetime
 from config.logger import setup_logging
 from core.providers.asr.base import ASRProviderBase
 from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.warm_pool import UpstreamSession, get_warm_pool
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -87,7 +88,9 @@ class ASRProvider(ASRProviderBase):
         self.token = config.get("token")
         self.host = config.get("host", "nls-gateway-cn-shanghai.aliyuncs.com")
         # 如果配置的是内网地址（包含-internal.aliyuncs.com），则使用ws协议，默认是wss协议
-        if "-internal." in self.host:
+        if config.get("ws_url"):
+            self.ws_url = config.get("ws_url")
+        elif "-internal." in self.host:
             self.ws_url = f"ws://{self.host}/ws/v1"
         else:
             # 默认使用wss协议
@@ -106,6 +109,14 @@ class ASRProvider(ASRProviderBase):
         elif not self.token:
             raise ValueError("必须提供access_key_id+access_key_secret或者直接提供token")
 
+        # 同一配置的连接共用上游会话预热池
+        self.pool = get_warm_pool("aliyun_stream", config, self._pool_opener)
+
+    @classmethod
+    def _pool_opener(cls, config):
+        """预热池使用独立实例建立会话，只依赖配置，不持有任何连接的识别状态"""
+        return cls(config, False)._open_session
+
     def _refresh_token(self):
         """刷新Token"""
         self.token, expire_time_str = AccessToken.create_token(self.access_key_id, self.access_key_secret)
@@ -128,6 +139,7 @@ class ASRProvider(ASRProviderBase):
 
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
+        self.pool.start()
 
     async def receive_audio(self, conn, audio, audio_have_voice):
         # 先调用父类方法处理基础逻辑
@@ -140,24 +152,24 @@ class ASRProvider(ASRProviderBase):
             except Exception as e:
                 logger.bind(tag=TAG).error(f"开始识别失败: {str(e)}")
                 await self._cleanup()
-                return
+            return
 
         if self.asr_ws and self.is_processing and self.server_ready:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
+                pcm_frame = self.decode_frame(audio)
                 await self.asr_ws.send(pcm_frame)
             except Exception as e:
                 logger.bind(tag=TAG).warning(f"发送音频失败: {str(e)}")
                 await self._cleanup()
 
-    async def _start_recognition(self, conn: "ConnectionHandler"):
-        """开始识别会话"""
+    async def _open_session(self) -> UpstreamSession:
+        """建立连接并完成StartTranscription，返回可以直接发送音频的会话"""
         if self._is_token_expired():
-            self._refresh_token()
-        
+            await asyncio.to_thread(self._refresh_token)
+
         # 建立连接
         headers = {"X-NLS-Token": self.token}
-        self.asr_ws = await websockets.connect(
+        ws = await websockets.connect(
             self.ws_url,
             additional_headers=headers,
             max_size=1000000000,
@@ -166,13 +178,8 @@ class ASRProvider(ASRProviderBase):
             close_timeout=5,
         )
 
-        self.task_id = uuid.uuid4().hex
-
-        logger.bind(tag=TAG).debug(f"WebSocket连接建立成功, task_id: {self.task_id}")
-
-        self.is_processing = True
-        self.server_ready = False  # 重置服务器准备状态
-        self.forward_task = asyncio.create_task(self._forward_results(conn))
+        task_id = uuid.uuid4().hex
+        logger.bind(tag=TAG).debug(f"WebSocket连接建立成功, task_id: {task_id}")
 
         # 发送开始请求
         start_request = {
@@ -180,7 +187,7 @@ class ASRProvider(ASRProviderBase):
                 "namespace": "SpeechTranscriber",
                 "name": "StartTranscription",
                 "message_id": uuid.uuid4().hex,
-                "task_id": self.task_id,
+                "task_id": task_id,
                 "appkey": self.appkey
             },
             "payload": {
@@ -193,8 +200,41 @@ class ASRProvider(ASRProviderBase):
                 "enable_voice_detection": False,
             }
         }
-        await self.asr_ws.send(json.dumps(start_request, ensure_ascii=False))
-        logger.bind(tag=TAG).debug("已发送开始请求，等待服务器准备...")
+        try:
+            await ws.send(json.dumps(start_request, ensure_ascii=False))
+            # 收到TranscriptionStarted表示服务器准备好接收音频数据
+            while True:
+                result = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+                header = result.get("header", {})
+                status = header.get("status", 20000000)
+                if status != 20000000:
+                    raise Exception(
+                        f"开始识别失败，状态码: {status}, 消息: {header.get('status_text', '')}"
+                    )
+                if header.get("name") == "TranscriptionStarted":
+                    break
+        except Exception:
+            await ws.close()
+            raise
+
+        return UpstreamSession(ws, task_id=task_id)
+
+    async def _start_recognition(self, conn: "ConnectionHandler"):
+        """开始识别会话，优先取用已完成握手的预热会话"""
+        onset_time = time.monotonic()
+        self.is_processing = True
+        session = await self.pool.acquire()
+        self.asr_ws = session.ws
+        self.task_id = session.context["task_id"]
+        self.forward_task = asyncio.create_task(self._forward_results(conn))
+
+        # 发送检测到说话前缓存的音频，其中已包含当前音频
+        for index, cached_audio in enumerate(conn.asr_audio):
+            await self.asr_ws.send(self.decode_frame(cached_audio))
+            if index == 0:
+                self.pool.record_first_audio(onset_time)
+        self.server_ready = True
+        logger.bind(tag=TAG).debug("服务器已准备，缓存音频已发送")
 
     async def _forward_results(self, conn: "ConnectionHandler"):
         """转发识别结果"""
@@ -225,22 +265,7 @@ class ASRProvider(ASRProviderBase):
                             logger.bind(tag=TAG).error(f"识别错误，状态码: {status}, 消息: {header.get('status_text', '')}")
                             continue
 
-                    # 收到TranscriptionStarted表示服务器准备好接收音频数据
-                    if message_name == "TranscriptionStarted":
-                        self.server_ready = True
-                        logger.bind(tag=TAG).debug("服务器已准备，开始发送缓存音频...")
-
-                        # 发送缓存音频
-                        if conn.asr_audio:
-                            for cached_audio in conn.asr_audio[-10:]:
-                                try:
-                                    pcm_frame = self.decoder.decode(cached_audio, 960)
-                                    await self.asr_ws.send(pcm_frame)
-                                except Exception as e:
-                                    logger.bind(tag=TAG).warning(f"发送缓存音频失败: {e}")
-                                    break
-                        continue
-                    elif message_name == "SentenceEnd":
+                    if message_name == "SentenceEnd":
                         # 句子结束（每个句子都会触发）
                         text = payload.get("result", "")
                         if text:
@@ -1,4 +1,5 @@
 import json
+import time
 import uuid
 import asyncio
 import websockets
@@ -11,6 +12,7 @@ if TYPE_CHECKING:
 from config.logger import setup_logging
 from core.providers.asr.base import ASRProviderBase
 from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.warm_pool import UpstreamSession, get_warm_pool
 
 TAG = __name__
 logger = setup_logging()
@@ -47,13 +49,22 @@ class ASRProvider(ASRProviderBase):
         self.inverse_text_normalization_enabled = config.get("inverse_text_normalization_enabled", True)
 
         # WebSocket URL
-        self.ws_url = "wss://dashscope.aliyuncs.com/api-ws/v1/inference"
+        self.ws_url = config.get("ws_url") or "wss://dashscope.aliyuncs.com/api-ws/v1/inference"
 
         self.output_dir = config.get("output_dir", "./audio_output")
         self.delete_audio_file = delete_audio_file
 
+        # 同一配置的连接共用上游会话预热池
+        self.pool = get_warm_pool("aliyunbl_stream", config, self._pool_opener)
+
+    @classmethod
+    def _pool_opener(cls, config):
+        """预热池使用独立实例建立会话，只依赖配置，不持有任何连接的识别状态"""
+        return cls(config, False)._open_session
+
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
+        self.pool.start()
 
     async def receive_audio(self, conn, audio, audio_have_voice):
         # 先调用父类方法处理基础逻辑
@@ -66,68 +77,88 @@ class ASRProvider(ASRProviderBase):
             except Exception as e:
                 logger.bind(tag=TAG).error(f"开始识别失败: {str(e)}")
                 await self._cleanup()
-                return
+            return
 
         # 发送音频数据
         if self.asr_ws and self.is_processing and self.server_ready:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
+                pcm_frame = self.decode_frame(audio)
                 # 直接发送PCM音频数据(二进制)
                 await self.asr_ws.send(pcm_frame)
             except Exception as e:
                 logger.bind(tag=TAG).warning(f"发送音频失败: {str(e)}")
                 await self._cleanup()
 
-    async def _start_recognition(self, conn: "ConnectionHandler"):
-        """开始识别会话"""
-        try:
-            # 如果为手动模式,设置超时时长为最大值
-            if conn.client_listen_mode == "manual":
-                self.max_sentence_silence = 6000
-
-            self.is_processing = True
-            self.task_id = uuid.uuid4().hex
-
-            # 建立WebSocket连接
-            headers = {
-                "Authorization": f"Bearer {self.api_key}"
-            }
-
-            logger.bind(tag=TAG).debug(f"正在连接阿里百炼ASR服务, task_id: {self.task_id}")
-
-            self.asr_ws = await websockets.connect(
-                self.ws_url,
-                additional_headers=headers,
-                max_size=1000000000,
-                ping_interval=None,
-                ping_timeout=None,
-                close_timeout=5,
-            )
+    async def _open_session(self, manual: bool = False) -> UpstreamSession:
+        """建立连接并完成run-task，返回可以直接发送音频的会话"""
+        task_id = uuid.uuid4().hex
 
-            logger.bind(tag=TAG).debug("WebSocket连接建立成功")
+        # 建立WebSocket连接
+        headers = {
+            "Authorization": f"Bearer {self.api_key}"
+        }
 
-            self.server_ready = False
-            self.forward_task = asyncio.create_task(self._forward_results(conn))
+        logger.bind(tag=TAG).debug(f"正在连接阿里百炼ASR服务, task_id: {task_id}")
 
-            # 发送run-task指令
-            run_task_msg = self._build_run_task_message()
-            await self.asr_ws.send(json.dumps(run_task_msg, ensure_ascii=False))
-            logger.bind(tag=TAG).debug("已发送run-task指令，等待服务器准备...")
+        ws = await websockets.connect(
+            self.ws_url,
+            additional_headers=headers,
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=5,
+        )
 
-        except Exception as e:
-            logger.bind(tag=TAG).error(f"建立ASR连接失败: {str(e)}")
-            if self.asr_ws:
-                await self.asr_ws.close()
-                self.asr_ws = None
-            self.is_processing = False
+        try:
+            # 发送run-task指令，手动模式下设置超时时长为最大值
+            max_sentence_silence = 6000 if manual else self.max_sentence_silence
+            run_task_msg = self._build_run_task_message(task_id, max_sentence_silence)
+            await ws.send(json.dumps(run_task_msg, ensure_ascii=False))
+
+            # 等待task-started事件
+            while True:
+                result = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+                header = result.get("header", {})
+                event = header.get("event", "")
+                if event == "task-started":
+                    break
+                if event == "task-failed":
+                    raise Exception(
+                        f"任务失败: {header.get('error_code', 'UNKNOWN')} - "
+                        f"{header.get('error_message', '未知错误')}"
+                    )
+        except Exception:
+            await ws.close()
             raise
 
-    def _build_run_task_message(self) -> dict:
+        return UpstreamSession(ws, task_id=task_id)
+
+    async def _start_recognition(self, conn: "ConnectionHandler"):
+        """开始识别会话，优先取用已完成握手的预热会话"""
+        onset_time = time.monotonic()
+        self.is_processing = True
+        if conn.client_listen_mode == "manual":
+            session = await self.pool.acquire(manual=True)
+        else:
+            session = await self.pool.acquire()
+        self.asr_ws = session.ws
+        self.task_id = session.context["task_id"]
+        self.forward_task = asyncio.create_task(self._forward_results(conn))
+
+        # 发送检测到说话前缓存的音频，其中已包含当前音频
+        for index, cached_audio in enumerate(conn.asr_audio):
+            await self.asr_ws.send(self.decode_frame(cached_audio))
+            if index == 0:
+                self.pool.record_first_audio(onset_time)
+        self.server_ready = True
+        logger.bind(tag=TAG).debug("服务器已准备，缓存音频已发送")
+
+    def _build_run_task_message(self, task_id: str, max_sentence_silence: int) -> dict:
         """构建run-task指令"""
         message = {
             "header": {
                 "action": "run-task",
-                "task_id": self.task_id,
+                "task_id": task_id,
                 "streaming": "duplex"
             },
             "payload": {
@@ -140,7 +171,7 @@ class ASRProvider(ASRProviderBase):
                     "sample_rate": self.sample_rate,
                     "disfluency_removal_enabled": self.disfluency_removal_enabled,
                     "semantic_punctuation_enabled": self.semantic_punctuation_enabled,
-                    "max_sentence_silence": self.max_sentence_silence,
+                    "max_sentence_silence": max_sentence_silence,
                     "multi_threshold_mode_enabled": self.multi_threshold_mode_enabled,
                     "punctuation_prediction_enabled": self.punctuation_prediction_enabled,
                     "inverse_text_normalization_enabled": self.inverse_text_normalization_enabled,
@@ -172,24 +203,8 @@ class ASRProvider(ASRProviderBase):
                     payload = result.get("payload", {})
                     event = header.get("event", "")
 
-                    # 处理task-started事件
-                    if event == "task-started":
-                        self.server_ready = True
-                        logger.bind(tag=TAG).debug("服务器已准备，开始发送缓存音频...")
-
-                        # 发送缓存音频
-                        if conn.asr_audio:
-                            for cached_audio in conn.asr_audio[-10:]:
-                                try:
-                                    pcm_frame = self.decoder.decode(cached_audio, 960)
-                                    await self.asr_ws.send(pcm_frame)
-                                except Exception as e:
-                                    logger.bind(tag=TAG).warning(f"发送缓存音频失败: {e}")
-                                    break
-                        continue
-
                     # 处理result-generated事件
-                    elif event == "result-generated":
+                    if event == "result-generated":
                         output = payload.get("output", {})
                         sentence = output.get("sentence", {})
 
@@ -6,11 +6,13 @@ import json
 import time
 import queue
 import shutil
+import struct
 import asyncio
 import tempfile
 import traceback
 import threading
 import opuslib_next
+import numpy as np
 
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
@@ -18,6 +20,7 @@ from core.providers.asr.dto.dto import InterfaceType
 from core.handle.receiveAudioHandle import startToChat
 from core.handle.reportHandle import enqueue_asr_report
 from core.utils.util import remove_punctuation_and_length
+from core.utils.uplink_audio import frame_pcm
 from core.handle.receiveAudioHandle import handleAudioMessage
 from typing import Optional, Tuple, List, NamedTuple, TYPE_CHECKING
 
@@ -28,6 +31,58 @@ if TYPE_CHECKING:
 TAG = __name__
 logger = setup_logging()
 
+# 磁盘剩余空间按间隔采样，不在每次识别时调用statvfs
+DISK_CHECK_INTERVAL = 30
+# 需要文件路径的ASR优先把临时WAV写到内存文件系统，不可用时使用系统临时目录
+TEMP_AUDIO_DIR = (
+    "/dev/shm"
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK)
+    else None
+)
+
+_disk_free_cache = {}
+
+
+def ensure_free_space(path: str, required: int):
+    """检查目录所在磁盘是否还能写入required字节，空间不足时抛出OSError"""
+    now = time.monotonic()
+    cached = _disk_free_cache.get(path)
+    if cached is None or now - cached[0] > DISK_CHECK_INTERVAL:
+        cached = [now, shutil.disk_usage(path).free]
+        _disk_free_cache[path] = cached
+    if cached[1] < required:
+        # 下次重新采样，空间释放后即可恢复
+        _disk_free_cache.pop(path, None)
+        raise OSError("磁盘空间不足")
+    # 采样间隔内按写入量扣减
+    cached[1] -= required
+
+
+def _write_wav(fd: int, pcm_bytes: bytes):
+    """写入16kHz单声道16位WAV，支持writev的平台上头部和数据只需一次系统调用"""
+    size = len(pcm_bytes)
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        1,  # 单声道
+        16000,
+        32000,
+        2,
+        16,
+        b"data",
+        size,
+    )
+    written = os.writev(fd, [header, pcm_bytes]) if hasattr(os, "writev") else 0
+    if written < len(header) + size:
+        view = memoryview(header + pcm_bytes)[written:]
+        while view:
+            view = view[os.write(fd, view) :]
+
 
 class ASRProviderBase(ABC):
     def __init__(self):
@@ -35,6 +90,10 @@ class ASRProviderBase(ABC):
 
     # 打开音频通道
     async def open_audio_channels(self, conn: "ConnectionHandler"):
+        if conn.async_pipeline:
+            # asyncio流水线模式：以协程消费音频队列，不再为每个连接启动线程
+            conn.start_pipeline_task(self.asr_text_priority_task(conn))
+            return
         conn.asr_priority_thread = threading.Thread(
             target=self.asr_text_priority_thread, args=(conn,), daemon=True
         )
@@ -42,7 +101,7 @@ class ASRProviderBase(ABC):
 
     # 有序处理ASR音频
     def asr_text_priority_thread(self, conn: "ConnectionHandler"):
-        while not conn.stop_event.is_set():
+        while not conn.pipeline_stopped():
             try:
                 message = conn.asr_audio_queue.get(timeout=1)
                 future = asyncio.run_coroutine_threadsafe(
@@ -58,6 +117,19 @@ class ASRProviderBase(ABC):
                 )
                 continue
 
+    # 有序处理ASR音频（asyncio流水线模式）
+    async def asr_text_priority_task(self, conn: "ConnectionHandler"):
+        while not conn.pipeline_stopped():
+            try:
+                message = await conn.asr_audio_queue.get()
+                await handleAudioMessage(conn, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理ASR文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+
     # 接收音频
     async def receive_audio(self, conn: "ConnectionHandler", audio, audio_have_voice):
         if conn.client_listen_mode == "manual":
@@ -72,99 +144,38 @@ class ASRProviderBase(ABC):
                 conn.asr_audio = conn.asr_audio[-10:]
                 return
 
+            if conn.asr.interface_type == InterfaceType.STREAM:
+                return
+
+            # 静音达到临时阈值时先行识别
+            conn.speculative_asr.on_audio(
+                conn,
+                audio_have_voice,
+                lambda frames: self._recognize(conn, frames),
+            )
+
             # 自动模式下通过VAD检测到语音停止时触发识别
-            if conn.asr.interface_type != InterfaceType.STREAM and conn.client_voice_stop:
+            if conn.client_voice_stop:
                 asr_audio_task = conn.asr_audio.copy()
+                speculation = conn.speculative_asr.take()
                 conn.reset_audio_states()
 
                 if len(asr_audio_task) > 15:
-                    await self.handle_voice_stop(conn, asr_audio_task)
+                    await self.handle_voice_stop(conn, asr_audio_task, speculation)
 
     # 处理语音停止
-    async def handle_voice_stop(self, conn: "ConnectionHandler", asr_audio_task: List[bytes]):
-        """并行处理ASR和声纹识别"""
+    async def handle_voice_stop(
+        self, conn: "ConnectionHandler", asr_audio_task: List[bytes], speculation=None
+    ):
+        """识别语音并开始对话，speculation为静音期间已开始的后台识别"""
         try:
-            total_start_time = time.monotonic()
-
-            # 准备音频数据
-            if conn.audio_format == "pcm":
-                pcm_data = asr_audio_task
-            else:
-                pcm_data = self.decode_opus(asr_audio_task)
-
-            combined_pcm_data = b"".join(pcm_data)
+            result = None
+            if speculation is not None:
+                result = await conn.speculative_asr.commit(speculation)
+            if result is None:
+                result = await self._recognize(conn, asr_audio_task)
+            enhanced_text, text_len = result
 
-            # 预先准备WAV数据
-            wav_data = None
-            if conn.voiceprint_provider and combined_pcm_data:
-                wav_data = self._pcm_to_wav(combined_pcm_data)
-
-            # 定义ASR任务
-            asr_task = self.speech_to_text_wrapper(
-                asr_audio_task, conn.session_id, conn.audio_format
-            )
-
-            if conn.voiceprint_provider and wav_data:
-                voiceprint_task = conn.voiceprint_provider.identify_speaker(
-                    wav_data, conn.session_id
-                )
-                # 并发等待两个结果
-                asr_result, voiceprint_result = await asyncio.gather(
-                    asr_task, voiceprint_task, return_exceptions=True
-                )
-            else:
-                asr_result = await asr_task
-                voiceprint_result = None
-
-            # 记录识别结果 - 检查是否为异常
-            if isinstance(asr_result, Exception):
-                logger.bind(tag=TAG).error(f"ASR识别失败: {asr_result}")
-                raw_text = ""
-            else:
-                raw_text, _ = asr_result
-
-            if isinstance(voiceprint_result, Exception):
-                logger.bind(tag=TAG).error(f"声纹识别失败: {voiceprint_result}")
-                speaker_name = ""
-            else:
-                speaker_name = voiceprint_result
-
-            # 判断 ASR 结果类型
-            if isinstance(raw_text, dict):
-                # FunASR 返回的 dict 格式
-                if speaker_name:
-                    raw_text["speaker"] = speaker_name
-
-                # 记录识别结果
-                if raw_text.get("language"):
-                    logger.bind(tag=TAG).info(f"识别语言: {raw_text['language']}")
-                if raw_text.get("emotion"):
-                    logger.bind(tag=TAG).info(f"识别情绪: {raw_text['emotion']}")
-                if raw_text.get("content"):
-                    logger.bind(tag=TAG).info(f"识别文本: {raw_text['content']}")
-                if speaker_name:
-                    logger.bind(tag=TAG).info(f"识别说话人: {speaker_name}")
-
-                # 转换为 JSON 字符串用于下游
-                enhanced_text = json.dumps(raw_text, ensure_ascii=False)
-                content_for_length_check = raw_text.get("content", "")
-            else:
-                # 其他 ASR 返回的纯文本
-                if raw_text:
-                    logger.bind(tag=TAG).info(f"识别文本: {raw_text}")
-                if speaker_name:
-                    logger.bind(tag=TAG).info(f"识别说话人: {speaker_name}")
-
-                # 构建包含说话人信息的JSON字符串
-                enhanced_text = self._build_enhanced_text(raw_text, speaker_name)
-                content_for_length_check = raw_text
-
-            # 性能监控
-            total_time = time.monotonic() - total_start_time
-            logger.bind(tag=TAG).debug(f"总处理耗时: {total_time:.3f}s")
-
-            # 检查文本长度
-            text_len, _ = remove_punctuation_and_length(content_for_length_check)
             self.stop_ws_connection()
 
             if text_len > 0:
@@ -178,6 +189,90 @@ class ASRProviderBase(ABC):
 
             logger.bind(tag=TAG).debug(f"异常详情: {traceback.format_exc()}")
 
+    async def _recognize(self, conn: "ConnectionHandler", asr_audio_task: List[bytes]):
+        """并行处理ASR和声纹识别，返回 (enhanced_text, 去除标点后的文本长度)"""
+        total_start_time = time.monotonic()
+
+        # 准备音频数据，ASR和声纹识别共用同一份PCM
+        pcm_data = self._to_pcm_frames(asr_audio_task, conn.audio_format)
+        combined_pcm_data = b"".join(pcm_data)
+
+        # 预先准备WAV数据
+        wav_data = None
+        if conn.voiceprint_provider and combined_pcm_data:
+            wav_data = self._pcm_to_wav(combined_pcm_data)
+
+        # 定义ASR任务
+        asr_task = self.speech_to_text_wrapper(
+            asr_audio_task,
+            conn.session_id,
+            conn.audio_format,
+            pcm=(pcm_data, combined_pcm_data),
+        )
+
+        if conn.voiceprint_provider and wav_data:
+            voiceprint_task = conn.voiceprint_provider.identify_speaker(
+                wav_data, conn.session_id
+            )
+            # 并发等待两个结果
+            asr_result, voiceprint_result = await asyncio.gather(
+                asr_task, voiceprint_task, return_exceptions=True
+            )
+        else:
+            asr_result = await asr_task
+            voiceprint_result = None
+
+        # 记录识别结果 - 检查是否为异常
+        if isinstance(asr_result, Exception):
+            logger.bind(tag=TAG).error(f"ASR识别失败: {asr_result}")
+            raw_text = ""
+        else:
+            raw_text, _ = asr_result
+
+        if isinstance(voiceprint_result, Exception):
+            logger.bind(tag=TAG).error(f"声纹识别失败: {voiceprint_result}")
+            speaker_name = ""
+        else:
+            speaker_name = voiceprint_result
+
+        # 判断 ASR 结果类型
+        if isinstance(raw_text, dict):
+            # FunASR 返回的 dict 格式
+            if speaker_name:
+                raw_text["speaker"] = speaker_name
+
+            # 记录识别结果
+            if raw_text.get("language"):
+                logger.bind(tag=TAG).info(f"识别语言: {raw_text['language']}")
+            if raw_text.get("emotion"):
+                logger.bind(tag=TAG).info(f"识别情绪: {raw_text['emotion']}")
+            if raw_text.get("content"):
+                logger.bind(tag=TAG).info(f"识别文本: {raw_text['content']}")
+            if speaker_name:
+                logger.bind(tag=TAG).info(f"识别说话人: {speaker_name}")
+
+            # 转换为 JSON 字符串用于下游
+            enhanced_text = json.dumps(raw_text, ensure_ascii=False)
+            content_for_length_check = raw_text.get("content", "")
+        else:
+            # 其他 ASR 返回的纯文本
+            if raw_text:
+                logger.bind(tag=TAG).info(f"识别文本: {raw_text}")
+            if speaker_name:
+                logger.bind(tag=TAG).info(f"识别说话人: {speaker_name}")
+
+            # 构建包含说话人信息的JSON字符串
+            enhanced_text = self._build_enhanced_text(raw_text, speaker_name)
+            content_for_length_check = raw_text
+
+        # 性能监控
+        total_time = time.monotonic() - total_start_time
+        logger.bind(tag=TAG).debug(f"总处理耗时: {total_time:.3f}s")
+
+        # 检查文本长度
+        text_len, _ = remove_punctuation_and_length(content_for_length_check)
+        return enhanced_text, text_len
+
     def _build_enhanced_text(self, text: str, speaker_name: Optional[str]) -> str:
         """构建包含说话人信息的文本（仅用于纯文本ASR）"""
         if speaker_name and speaker_name.strip():
@@ -230,6 +325,10 @@ class ASRProviderBase(ABC):
         temp_path: Optional[str]
         """临时WAV文件路径"""
 
+        def samples(self) -> np.ndarray:
+            """归一化到[-1, 1]的float32采样，供接受数组输入的模型直接使用"""
+            return np.frombuffer(self.pcm_bytes, dtype=np.int16).astype(np.float32) / 32768
+
     def get_current_artifacts(self) -> Optional["ASRProviderBase.AudioArtifacts"]:
         return self._current_artifacts
 
@@ -242,14 +341,14 @@ class ASRProviderBase(ABC):
         return False
 
     def build_temp_file(self, pcm_bytes: bytes) -> Optional[str]:
+        """为必须传文件路径的ASR生成临时WAV，优先放在内存文件系统中"""
         try:
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_path = temp_file.name
-            with wave.open(temp_path, "wb") as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(16000)
-                wav_file.writeframes(pcm_bytes)
+            ensure_free_space(TEMP_AUDIO_DIR or tempfile.gettempdir(), len(pcm_bytes) + 44)
+            fd, temp_path = tempfile.mkstemp(suffix=".wav", dir=TEMP_AUDIO_DIR)
+            try:
+                _write_wav(fd, pcm_bytes)
+            finally:
+                os.close(fd)
             return temp_path
         except Exception as e:
             logger.bind(tag=TAG).error(f"临时音频文件生成失败: {e}")
@@ -261,36 +360,41 @@ class ASRProviderBase(ABC):
         file_name = f"asr_{module_name}_{session_id}_{uuid.uuid4()}.wav"
         file_path = os.path.join(self.output_dir, file_name)
 
-        with wave.open(file_path, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)  # 2 bytes = 16-bit
-            wf.setframerate(16000)
-            wf.writeframes(b"".join(pcm_data))
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            _write_wav(fd, b"".join(pcm_data))
+        finally:
+            os.close(fd)
 
         return file_path
 
     async def speech_to_text_wrapper(
-        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+        self,
+        opus_data: List[bytes],
+        session_id: str,
+        audio_format="opus",
+        pcm: Optional[Tuple[List[bytes], bytes]] = None,
     ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        :param pcm: 调用方已准备好的 (PCM帧列表, 合并后的PCM)，为空时从opus_data解码
+        """
         file_path = None
         temp_path = None
         try:
-            if audio_format == "pcm":
-                pcm_data = opus_data
+            if pcm is not None:
+                pcm_data, combined_pcm_data = pcm
             else:
-                pcm_data = self.decode_opus(opus_data)
-            combined_pcm_data = b"".join(pcm_data)
-
-            free_space = shutil.disk_usage(self.output_dir).free
-            if free_space < len(combined_pcm_data) * 2:
-                raise OSError("磁盘空间不足")
+                pcm_data = self._to_pcm_frames(opus_data, audio_format)
+                combined_pcm_data = b"".join(pcm_data)
 
+            # 只有确实需要落盘时才写文件，其余ASR直接使用内存中的PCM
             if self.requires_file() and self.prefers_temp_file():
                 temp_path = self.build_temp_file(combined_pcm_data)
 
             if (hasattr(self, "delete_audio_file") and not self.delete_audio_file) or (
                 self.requires_file() and not self.prefers_temp_file()
             ):
+                ensure_free_space(self.output_dir, len(combined_pcm_data) * 2)
                 file_path = self.save_audio_to_file(pcm_data, session_id)
 
             if len(combined_pcm_data) == 0:
@@ -345,9 +449,25 @@ class ASRProviderBase(ABC):
         """
         pass
 
+    def _to_pcm_frames(self, audio_data: List[bytes], audio_format="opus") -> List[bytes]:
+        if audio_format == "pcm":
+            return audio_data
+        return self.decode_opus(audio_data)
+
+    def decode_frame(self, audio: bytes) -> bytes:
+        """流式ASR取单个音频包的PCM，连接已统一解码时直接复用，否则使用自身的解码器"""
+        pcm = frame_pcm(audio)
+        if pcm is not None:
+            return pcm
+        return self.decoder.decode(audio, 960)
+
     @staticmethod
     def decode_opus(opus_data: List[bytes]) -> List[bytes]:
-        """将Opus音频数据解码为PCM数据"""
+        """将Opus音频数据解码为PCM数据，已在连接入口解码过的音频包直接复用PCM"""
+        pcm_frames = [frame_pcm(opus_packet) for opus_packet in opus_data]
+        if all(pcm is not None for pcm in pcm_frames):
+            return [pcm for pcm in pcm_frames if pcm]
+
         decoder = None
         try:
             decoder = opuslib_next.Decoder(16000, 1)
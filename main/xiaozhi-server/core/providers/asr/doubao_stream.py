@@ -1,5 +1,6 @@
 import json
 import gzip
+import time
 import uuid
 import asyncio
 import websockets
@@ -7,6 +8,7 @@ import opuslib_next
 from core.providers.asr.base import ASRProviderBase
 from config.logger import setup_logging
 from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.warm_pool import UpstreamSession, get_warm_pool
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -41,7 +43,9 @@ class ASRProvider(ASRProviderBase):
         self.enable_multilingual = (
             False if str(enable_multilingual).lower() == "false" else True
         )
-        if self.enable_multilingual:
+        if config.get("ws_url"):
+            self.ws_url = config.get("ws_url")
+        elif self.enable_multilingual:
             self.ws_url = "wss://openspeech.bytedance.com/api/v3/sauc/bigmodel_nostream"
         else:
             self.ws_url = "wss://openspeech.bytedance.com/api/v3/sauc/bigmodel"
@@ -62,8 +66,68 @@ class ASRProvider(ASRProviderBase):
         end_window_size = config.get("end_window_size")
         self.end_window_size = int(end_window_size) if end_window_size else 200
 
+        # 同一配置的连接共用上游会话预热池
+        self.pool = get_warm_pool("doubao_stream", config, self._pool_opener)
+
+    @classmethod
+    def _pool_opener(cls, config):
+        """预热池使用独立实例建立会话，只依赖配置，不持有任何连接的识别状态"""
+        return cls(config, False)._open_session
+
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
+        self.pool.start()
+
+    async def _open_session(self) -> UpstreamSession:
+        """建立连接并完成初始化握手，返回可以直接发送音频的会话"""
+        headers = self.token_auth() if self.auth_method == "token" else None
+        logger.bind(tag=TAG).debug(f"正在连接ASR服务，headers: {headers}")
+
+        ws = await websockets.connect(
+            self.ws_url,
+            additional_headers=headers,
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=10,
+        )
+
+        # 发送初始化请求
+        request_params = self.construct_request(str(uuid.uuid4()))
+        try:
+            payload_bytes = str.encode(json.dumps(request_params))
+            payload_bytes = gzip.compress(payload_bytes)
+            full_client_request = self.generate_header()
+            full_client_request.extend((len(payload_bytes)).to_bytes(4, "big"))
+            full_client_request.extend(payload_bytes)
+
+            logger.bind(tag=TAG).debug(f"发送初始化请求: {request_params}")
+            await ws.send(full_client_request)
+
+            # 等待初始化响应
+            init_res = await ws.recv()
+            result = self.parse_response(init_res)
+            logger.bind(tag=TAG).debug(f"收到初始化响应: {result}")
+
+            # 检查初始化响应
+            if "code" in result and result["code"] != 1000:
+                error_msg = f"ASR服务初始化失败: {result.get('payload_msg', {}).get('error', '未知错误')}"
+                raise Exception(error_msg)
+        except Exception:
+            await ws.close()
+            raise
+
+        return UpstreamSession(ws)
+
+    def _audio_request(self, pcm_frame: bytes, last: bool = False) -> bytearray:
+        payload = gzip.compress(pcm_frame)
+        if last:
+            audio_request = bytearray(self.generate_last_audio_default_header())
+        else:
+            audio_request = bytearray(self.generate_audio_default_header())
+        audio_request.extend(len(payload).to_bytes(4, "big"))
+        audio_request.extend(payload)
+        return audio_request
 
     async def receive_audio(self, conn: "ConnectionHandler", audio, audio_have_voice):
         # 先调用父类方法处理基础逻辑
@@ -71,70 +135,22 @@ class ASRProvider(ASRProviderBase):
         
         # 如果本次有声音，且之前没有建立连接
         if audio_have_voice and self.asr_ws is None and not self.is_processing:
+            onset_time = time.monotonic()
             try:
                 self.is_processing = True
-                # 建立新的WebSocket连接
-                headers = self.token_auth() if self.auth_method == "token" else None
-                logger.bind(tag=TAG).info(f"正在连接ASR服务，headers: {headers}")
-
-                self.asr_ws = await websockets.connect(
-                    self.ws_url,
-                    additional_headers=headers,
-                    max_size=1000000000,
-                    ping_interval=None,
-                    ping_timeout=None,
-                    close_timeout=10,
-                )
-
-                # 发送初始化请求
-                request_params = self.construct_request(str(uuid.uuid4()))
-                try:
-                    payload_bytes = str.encode(json.dumps(request_params))
-                    payload_bytes = gzip.compress(payload_bytes)
-                    full_client_request = self.generate_header()
-                    full_client_request.extend((len(payload_bytes)).to_bytes(4, "big"))
-                    full_client_request.extend(payload_bytes)
-
-                    logger.bind(tag=TAG).info(f"发送初始化请求: {request_params}")
-                    await self.asr_ws.send(full_client_request)
-
-                    # 等待初始化响应
-                    init_res = await self.asr_ws.recv()
-                    result = self.parse_response(init_res)
-                    logger.bind(tag=TAG).info(f"收到初始化响应: {result}")
-
-                    # 检查初始化响应
-                    if "code" in result and result["code"] != 1000:
-                        error_msg = f"ASR服务初始化失败: {result.get('payload_msg', {}).get('error', '未知错误')}"
-                        logger.bind(tag=TAG).error(error_msg)
-                        raise Exception(error_msg)
-
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"发送初始化请求失败: {str(e)}")
-                    if hasattr(e, "__cause__") and e.__cause__:
-                        logger.bind(tag=TAG).error(f"错误原因: {str(e.__cause__)}")
-                    raise e
+                # 优先取用已完成初始化的预热会话
+                session = await self.pool.acquire()
+                self.asr_ws = session.ws
 
                 # 启动接收ASR结果的异步任务
                 self.forward_task = asyncio.create_task(self._forward_asr_results(conn))
 
-                # 发送缓存的音频数据
-                if conn.asr_audio and len(conn.asr_audio) > 0:
-                    for cached_audio in conn.asr_audio[-10:]:
-                        try:
-                            pcm_frame = self.decoder.decode(cached_audio, 960)
-                            payload = gzip.compress(pcm_frame)
-                            audio_request = bytearray(
-                                self.generate_audio_default_header()
-                            )
-                            audio_request.extend(len(payload).to_bytes(4, "big"))
-                            audio_request.extend(payload)
-                            await self.asr_ws.send(audio_request)
-                        except Exception as e:
-                            logger.bind(tag=TAG).info(
-                                f"发送缓存音频数据时发生错误: {e}"
-                            )
-
+                # 发送检测到说话前缓存的音频，其中已包含当前音频
+                for index, cached_audio in enumerate(conn.asr_audio):
+                    pcm_frame = self.decode_frame(cached_audio)
+                    await self.asr_ws.send(self._audio_request(pcm_frame))
+                    if index == 0:
+                        self.pool.record_first_audio(onset_time)
             except Exception as e:
                 logger.bind(tag=TAG).error(f"建立ASR连接失败: {str(e)}")
                 if hasattr(e, "__cause__") and e.__cause__:
@@ -143,17 +159,13 @@ class ASRProvider(ASRProviderBase):
                     await self.asr_ws.close()
                     self.asr_ws = None
                 self.is_processing = False
-                return
+            return
 
         # 发送当前音频数据
         if self.asr_ws and self.is_processing:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
-                payload = gzip.compress(pcm_frame)
-                audio_request = bytearray(self.generate_audio_default_header())
-                audio_request.extend(len(payload).to_bytes(4, "big"))
-                audio_request.extend(payload)
-                await self.asr_ws.send(audio_request)
+                pcm_frame = self.decode_frame(audio)
+                await self.asr_ws.send(self._audio_request(pcm_frame))
             except Exception as e:
                 logger.bind(tag=TAG).info(f"发送音频数据时发生错误: {e}")
 
@@ -268,13 +280,7 @@ class ASRProvider(ASRProviderBase):
         if self.asr_ws:
             try:
                 # 发送结束标记的音频帧（gzip压缩的空数据）
-                empty_payload = gzip.compress(b"")
-                last_audio_request = bytearray(
-                    self.generate_last_audio_default_header()
-                )
-                last_audio_request.extend(len(empty_payload).to_bytes(4, "big"))
-                last_audio_request.extend(empty_payload)
-                await self.asr_ws.send(last_audio_request)
+                await self.asr_ws.send(self._audio_request(b"", last=True))
                 logger.bind(tag=TAG).debug("已发送结束音频帧")
             except Exception as e:
                 logger.bind(tag=TAG).debug(f"发送结束音频帧时出错: {e}")
@@ -2,9 +2,11 @@ import os
 import io
 import sys
 import time
+import queue
 import shutil
 import psutil
 import asyncio
+import threading
 
 from funasr import AutoModel
 from config.logger import setup_logging
@@ -19,6 +21,9 @@ logger = setup_logging()
 MAX_RETRIES = 2
 RETRY_DELAY = 1  # 重试延迟（秒）
 
+# 已创建的批量识别器，识别线程常驻，供健康检查接口读取
+_batchers = []
+
 
 # 捕获标准输出
 class CaptureOutput:
@@ -37,6 +42,113 @@ class CaptureOutput:
             logger.bind(tag=TAG).info(self.output.strip())
 
 
+def _set_future_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future, error):
+    if not future.done():
+        future.set_exception(error)
+
+
+class FunASRBatcher:
+    """
+    跨连接合并FunASR识别请求
+    本地FunASR实例由所有连接共享，各连接的语音先进入队列，识别线程在max_wait_ms内收集同时结束的语音，
+    合并为一次AutoModel.generate批量识别，再把结果分发回各连接
+    """
+
+    def __init__(self, model, max_batch_size=8, max_wait_ms=50):
+        """
+        Args:
+            model: FunASR AutoModel
+            max_batch_size: 单次识别的最大语音条数
+            max_wait_ms: 收到第一条语音后最多等待的毫秒数
+        """
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._queue = queue.Queue()
+        self._stats = {
+            "batches": 0,
+            "utterances": 0,
+            "max_batch": 0,
+            "infer_seconds": 0.0,
+        }
+        self._thread = threading.Thread(
+            target=self._run, name="funasr-batch", daemon=True
+        )
+        self._thread.start()
+        _batchers.append(self)
+
+    async def recognize(self, pcm_bytes: bytes) -> dict:
+        """提交一条语音并等待识别结果，返回值与generate结果列表中的单项一致"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((pcm_bytes, loop, future))
+        return await future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._infer(batch)
+
+    def _infer(self, batch):
+        begin_time = time.monotonic()
+        try:
+            results = self.model.generate(
+                input=[item[0] for item in batch],
+                cache={},
+                language="auto",
+                use_itn=True,
+                batch_size=len(batch),
+            )
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"批量识别结果数量不一致: {len(results)}/{len(batch)}"
+                )
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"FunASR批量识别失败: {e}")
+            for _, loop, future in batch:
+                loop.call_soon_threadsafe(_set_future_exception, future, e)
+            return
+
+        for (_, loop, future), result in zip(batch, results):
+            loop.call_soon_threadsafe(_set_future_result, future, result)
+
+        stats = self._stats
+        stats["batches"] += 1
+        stats["utterances"] += len(batch)
+        stats["max_batch"] = max(stats["max_batch"], len(batch))
+        stats["infer_seconds"] += time.monotonic() - begin_time
+
+    def get_metrics(self) -> dict:
+        stats = dict(self._stats)
+        stats["avg_batch"] = (
+            stats["utterances"] / stats["batches"] if stats["batches"] else 0
+        )
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+
+def get_batcher_metrics() -> dict:
+    return {
+        f"batcher#{index}": batcher.get_metrics()
+        for index, batcher in enumerate(list(_batchers))
+    }
+
+
 class ASRProvider(ASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool):
         super().__init__()
@@ -63,6 +175,16 @@ class ASRProvider(ASRProviderBase):
                 # device="cuda:0",  # 启用GPU加速
             )
 
+        # 跨连接批量识别，多个连接同时说完时合并为一次推理
+        batch_config = config.get("batch") or {}
+        self.batcher = None
+        if batch_config.get("enabled", False):
+            self.batcher = FunASRBatcher(
+                self.model,
+                max_batch_size=batch_config.get("max_batch_size", 8),
+                max_wait_ms=batch_config.get("max_wait_ms", 50),
+            )
+
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus", artifacts=None
     ) -> Tuple[Optional[str], Optional[str]]:
@@ -74,16 +196,19 @@ class ASRProvider(ASRProviderBase):
                 if artifacts is None:
                     return "", None
 
-                # 语音识别 - 使用线程池避免阻塞事件循环
                 start_time = time.time()
-                result = await asyncio.to_thread(
-                    self.model.generate,
-                    input=artifacts.pcm_bytes,
-                    cache={},
-                    language="auto",
-                    use_itn=True,
-                    batch_size_s=60,
-                )
+                if self.batcher is not None:
+                    result = [await self.batcher.recognize(artifacts.pcm_bytes)]
+                else:
+                    # 语音识别 - 使用线程池避免阻塞事件循环
+                    result = await asyncio.to_thread(
+                        self.model.generate,
+                        input=artifacts.pcm_bytes,
+                        cache={},
+                        language="auto",
+                        use_itn=True,
+                        batch_size_s=60,
+                    )
                 text = lang_tag_filter(result[0]["text"])
                 logger.bind(tag=TAG).debug(
                     f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text['content']}"
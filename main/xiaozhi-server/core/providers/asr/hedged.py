@@ -0,0 +1,317 @@
+import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left
+from config.logger import setup_logging
+from typing import Optional, Tuple, List, Dict
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+
+TAG = __name__
+logger = setup_logging()
+
+# 延迟直方图的桶上界（毫秒），最后一个桶收集更慢的请求
+LATENCY_BUCKETS_MS = [
+    50, 100, 150, 200, 300, 400, 500, 650, 800, 1000,
+    1300, 1600, 2000, 2500, 3000, 4000, 5000, 7000, 10000,
+]
+# 样本数超过该值后所有桶减半，使分位数跟随供应商近期的表现
+HISTOGRAM_WINDOW = 500
+
+# 按成员配置名称区分的延迟与熔断状态，多个连接共用
+_member_states = {}
+
+
+class LatencyHistogram:
+    """固定分桶的延迟直方图，按样本窗口衰减"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0
+
+    def record(self, elapsed_ms: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.total += 1
+        if self.total > HISTOGRAM_WINDOW:
+            self.counts = [count // 2 for count in self.counts]
+            self.total = sum(self.counts)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """返回分位数所在桶的上界，没有样本时返回None"""
+        if self.total == 0:
+            return None
+        target = self.total * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                break
+        if index < len(LATENCY_BUCKETS_MS):
+            return float(LATENCY_BUCKETS_MS[index])
+        return float(LATENCY_BUCKETS_MS[-1] * 2)
+
+
+class CircuitBreaker:
+    """
+    连续失败达到阈值后熔断，open_seconds内不再参与轮换；
+    到期后半开放行一个试探请求，成功则恢复，失败则重新熔断
+    """
+
+    def __init__(self, failure_threshold: int = 3, open_seconds: float = 30):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.open_seconds = float(open_seconds)
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.open_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+    def release(self):
+        """请求被取消、没有结论时归还半开的试探名额"""
+        self.trial_running = False
+
+
+class MemberState:
+    def __init__(self, failure_threshold: int, open_seconds: float):
+        self.histogram = LatencyHistogram()
+        self.breaker = CircuitBreaker(failure_threshold, open_seconds)
+        self.stats = {
+            "requests": 0,
+            "wins": 0,
+            "empty": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "cancelled": 0,
+        }
+
+    def get_metrics(self) -> dict:
+        return {
+            **self.stats,
+            "breaker": self.breaker.state,
+            "trips": self.breaker.trips,
+            "p50_ms": self.histogram.percentile(50),
+            "p95_ms": self.histogram.percentile(95),
+        }
+
+
+def get_member_state(name: str, config: dict) -> MemberState:
+    state = _member_states.get(name)
+    if state is None:
+        state = MemberState(
+            config.get("failure_threshold") or 3, config.get("open_seconds") or 30
+        )
+        _member_states[name] = state
+    return state
+
+
+def get_hedged_asr_metrics() -> dict:
+    return {name: state.get_metrics() for name, state in _member_states.items()}
+
+
+def _run_member(member: ASRProviderBase, *args, **kwargs):
+    """
+    在线程池中用独立的事件循环执行成员识别：openai、tencent等供应商在协程中直接调用阻塞的HTTP请求，
+    放在服务的事件循环里会让对冲计时和取消都无法及时执行
+    """
+    return asyncio.run(member.speech_to_text_wrapper(*args, **kwargs))
+
+
+class HedgedASRProvider(ASRProviderBase):
+    """
+    组合多个非流式ASR：先发给首选供应商，超过其历史延迟分位数仍无结果时
+    对冲发给下一个供应商，取先成功的结果，不再等待另一个；
+    成员识别在线程池中执行，阻塞的供应商不会卡住事件循环；
+    连续失败的供应商被熔断移出轮换，由modules_initialize在type为hedged时创建
+    """
+
+    def __init__(self, config: dict, members: Dict[str, ASRProviderBase]):
+        super().__init__()
+        if len(members) < 2:
+            raise ValueError("组合ASR至少需要配置两个providers")
+        for name, member in members.items():
+            if member.interface_type == InterfaceType.STREAM:
+                raise ValueError(f"组合ASR不支持流式ASR成员: {name}")
+        # 成员均为非流式，不保存连接状态，组合实例可被多个连接共享
+        self.interface_type = InterfaceType.LOCAL
+        self.members = members
+        self.states = {name: get_member_state(name, config) for name in members}
+        self.hedge_percentile = float(config.get("hedge_percentile", 95))
+        self.hedge_delay_ms = float(config.get("hedge_delay_ms", 800))
+        self.min_hedge_ms = float(config.get("min_hedge_ms", 300))
+        self.max_hedge_ms = float(config.get("max_hedge_ms", 3000))
+        self.min_samples = int(config.get("min_samples", 20))
+        self.timeout_ms = float(config.get("timeout_ms", 8000))
+        # 成员识别多为等待网络，线程数按同时进行的识别数配置，不与默认线程池争用
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, int(config.get("max_workers", 64))),
+            thread_name_prefix="hedged-asr",
+        )
+
+    def hedge_deadline(self, name: str) -> float:
+        """首选供应商的对冲等待时间（秒），样本不足时使用固定值"""
+        histogram = self.states[name].histogram
+        if histogram.total < self.min_samples:
+            deadline_ms = self.hedge_delay_ms
+        else:
+            deadline_ms = histogram.percentile(self.hedge_percentile)
+        return min(self.max_hedge_ms, max(self.min_hedge_ms, deadline_ms)) / 1000
+
+    def _pick(self) -> List[str]:
+        """按配置顺序选出未熔断的首选和对冲供应商，全部熔断时仍使用首选"""
+        chosen = []
+        for name in self.members:
+            if self.states[name].breaker.allow():
+                chosen.append(name)
+                if len(chosen) == 2:
+                    break
+        if not chosen:
+            chosen.append(next(iter(self.members)))
+        return chosen
+
+    async def _call(self, name: str, opus_data, session_id, audio_format, pcm):
+        state = self.states[name]
+        state.stats["requests"] += 1
+        begin_time = time.monotonic()
+        try:
+            text, file_path = await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                functools.partial(
+                    _run_member,
+                    self.members[name],
+                    opus_data,
+                    session_id,
+                    audio_format,
+                    pcm=pcm,
+                ),
+            )
+        except asyncio.CancelledError:
+            # 被取消的请求没有完整延迟，不计入直方图，以免压低对冲分位数；
+            # 线程中的识别会继续执行到结束，结果直接丢弃
+            state.stats["cancelled"] += 1
+            state.breaker.release()
+            raise
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"{name} 识别异常: {e}")
+            text, file_path = None, None
+        state.histogram.record((time.monotonic() - begin_time) * 1000)
+        if text is None:
+            state.stats["failures"] += 1
+            state.breaker.record_failure()
+        else:
+            # 空文本多为VAD放过的咳嗽、背景声等，属于正常结果，不触发熔断
+            if not text:
+                state.stats["empty"] += 1
+            state.breaker.record_success()
+        return text, file_path
+
+    def _record_timeout(self, name: str):
+        """超过整体超时仍未返回的成员按失败计入熔断"""
+        state = self.states[name]
+        state.stats["timeouts"] += 1
+        state.breaker.record_failure()
+
+    async def speech_to_text_wrapper(
+        self,
+        opus_data: List[bytes],
+        session_id: str,
+        audio_format="opus",
+        pcm: Optional[Tuple[List[bytes], bytes]] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        if pcm is None:
+            pcm_data = self._to_pcm_frames(opus_data, audio_format)
+            pcm = (pcm_data, b"".join(pcm_data))
+        names = self._pick()
+
+        def start(name):
+            task = asyncio.create_task(
+                self._call(name, opus_data, session_id, audio_format, pcm)
+            )
+            tasks[task] = name
+            return task
+
+        tasks = {}
+        # 与其他ASR一致，识别失败或超时时返回空文本，由调用方按未识别到内容处理
+        empty_file_path = None
+        pending = {start(names[0])}
+        hedge_names = names[1:]
+        deadline = time.monotonic() + self.timeout_ms / 1000
+        hedge_at = time.monotonic() + self.hedge_deadline(names[0])
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    logger.bind(tag=TAG).warning(
+                        f"组合ASR超时{self.timeout_ms:.0f}ms，放弃本次识别"
+                    )
+                    for task in pending:
+                        self._record_timeout(tasks[task])
+                    return "", empty_file_path
+                wait_until = min(deadline, hedge_at) if hedge_names else deadline
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0, wait_until - now),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                failed = False
+                for task in done:
+                    text, file_path = task.result()
+                    if text:
+                        self.states[tasks[task]].stats["wins"] += 1
+                        return text, file_path
+                    if text is None:
+                        failed = True
+                    else:
+                        empty_file_path = file_path
+                # 首选失败或超过对冲时间仍无结果，启用下一个供应商；识别为空不再对冲
+                if hedge_names and (failed or time.monotonic() >= hedge_at):
+                    name = hedge_names.pop(0)
+                    logger.bind(tag=TAG).debug(f"对冲请求 {name}")
+                    pending.add(start(name))
+            return "", empty_file_path
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            # 未启用的对冲供应商归还半开试探名额
+            for name in hedge_names:
+                self.states[name].breaker.release()
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus", artifacts=None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        pcm = None
+        if artifacts is not None:
+            pcm = (artifacts.pcm_frames, artifacts.pcm_bytes)
+        return await self.speech_to_text_wrapper(
+            opus_data, session_id, audio_format, pcm
+        )
@@ -21,17 +21,13 @@ class ASRProvider(ASRProviderBase):
 
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def requires_file(self) -> bool:
-        return True
-
     async def speech_to_text(self, opus_data: List[bytes], session_id: str, audio_format="opus", artifacts=None) -> Tuple[Optional[str], Optional[str]]:
         file_path = None
         try:
             if artifacts is None:
                 return "", None
             file_path = artifacts.file_path
-                
-            logger.bind(tag=TAG).info(f"file path: {file_path}")
+
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
             }
@@ -42,21 +38,21 @@ class ASRProvider(ASRProviderBase):
             }
 
 
-            with open(file_path, "rb") as audio_file:  # 使用with语句确保文件关闭
-                files = {
-                    "file": audio_file
-                }
+            # 直接上传内存中的WAV，不再写临时文件
+            files = {
+                "file": ("audio.wav", self._pcm_to_wav(artifacts.pcm_bytes), "audio/wav")
+            }
 
-                start_time = time.time()
-                response = requests.post(
-                    self.api_url,
-                    files=files,
-                    data=data,
-                    headers=headers
-                )
-                logger.bind(tag=TAG).debug(
-                    f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {response.text}"
-                )
+            start_time = time.time()
+            response = requests.post(
+                self.api_url,
+                files=files,
+                data=data,
+                headers=headers
+            )
+            logger.bind(tag=TAG).debug(
+                f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {response.text}"
+            )
 
             if response.status_code == 200:
                 text = response.json().get("text", "")
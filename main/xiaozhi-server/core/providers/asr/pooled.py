@@ -0,0 +1,57 @@
+import numpy as np
+from config.logger import setup_logging
+from typing import Optional, Tuple, List
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+
+TAG = __name__
+logger = setup_logging()
+
+
+class PooledASRProvider(ASRProviderBase):
+    """
+    在推理进程池中识别的本地ASR，服务进程只负责把PCM写入共享内存并等待结果，
+    由modules_initialize在推理进程池开启时代替fun_local、sherpa_onnx_local、vosk创建
+    """
+
+    def __init__(self, pool, asr_type: str):
+        super().__init__()
+        self.pool = pool
+        self.asr_type = asr_type
+        self.interface_type = InterfaceType.LOCAL
+
+    async def speech_to_text_wrapper(
+        self,
+        opus_data: List[bytes],
+        session_id: str,
+        audio_format="opus",
+        pcm: Optional[Tuple[List[bytes], bytes]] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            if pcm is not None:
+                _, combined_pcm_data = pcm
+            else:
+                combined_pcm_data = b"".join(
+                    self._to_pcm_frames(opus_data, audio_format)
+                )
+            if not combined_pcm_data:
+                return "", None
+            text = await self.pool.run(
+                "asr",
+                [np.frombuffer(combined_pcm_data, dtype=np.int16)],
+                {"session_id": session_id},
+            )
+            return text, None
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"推理进程语音识别失败({self.asr_type}): {e}")
+            return None, None
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus", artifacts=None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        pcm = None
+        if artifacts is not None:
+            pcm = (artifacts.pcm_frames, artifacts.pcm_bytes)
+        return await self.speech_to_text_wrapper(
+            opus_data, session_id, audio_format, pcm
+        )
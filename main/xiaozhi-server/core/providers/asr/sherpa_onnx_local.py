@@ -1,5 +1,4 @@
 import time
-import wave
 import os
 import sys
 import io
@@ -8,7 +7,6 @@ from typing import Optional, Tuple, List
 from core.providers.asr.dto.dto import InterfaceType
 from core.providers.asr.base import ASRProviderBase
 
-import numpy as np
 import sherpa_onnx
 
 from modelscope.hub.file_download import model_file_download
@@ -96,33 +94,6 @@ class ASRProvider(ASRProviderBase):
                     use_itn=True,
                 )
 
-    def read_wave(self, wave_filename: str) -> Tuple[np.ndarray, int]:
-        """
-        Args:
-        wave_filename:
-            Path to a wave file. It should be single channel and each sample should
-            be 16-bit. Its sample rate does not need to be 16kHz.
-        Returns:
-        Return a tuple containing:
-        - A 1-D array of dtype np.float32 containing the samples, which are
-        normalized to the range [-1, 1].
-        - sample rate of the wave file
-        """
-
-        with wave.open(wave_filename) as f:
-            assert f.getnchannels() == 1, f.getnchannels()
-            assert f.getsampwidth() == 2, f.getsampwidth()  # it is in bytes
-            num_samples = f.getnframes()
-            samples = f.readframes(num_samples)
-            samples_int16 = np.frombuffer(samples, dtype=np.int16)
-            samples_float32 = samples_int16.astype(np.float32)
-
-            samples_float32 = samples_float32 / 32768
-            return samples_float32, f.getframerate()
-
-    def requires_file(self) -> bool:
-        return True
-
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus", artifacts=None
     ) -> Tuple[Optional[str], Optional[str]]:
@@ -135,8 +106,8 @@ class ASRProvider(ASRProviderBase):
 
             start_time = time.time()
             s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
+            # 直接使用内存中的PCM，无需写WAV再读回
+            s.accept_waveform(16000, artifacts.samples())
             self.model.decode_stream(s)
             text = s.result.text
             logger.bind(tag=TAG).debug(
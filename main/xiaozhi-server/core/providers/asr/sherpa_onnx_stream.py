@@ -0,0 +1,327 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+import opuslib_next
+import numpy as np
+import sherpa_onnx
+
+from config.logger import setup_logging
+from typing import Optional, Tuple, List, TYPE_CHECKING
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+
+if TYPE_CHECKING:
+    from core.connection import ConnectionHandler
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+INT16_SCALE = 1.0 / 32768
+# 结束输入前补入的静音，流式模型需要右侧上下文才能输出最后几个字
+TAIL_PADDING = np.zeros(int(0.66 * SAMPLE_RATE), dtype=np.float32)
+
+# 按模型配置缓存的共享识别器
+_shared_recognizers = {}
+_shared_lock = threading.Lock()
+
+
+def _set_future_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future, error):
+    if not future.done():
+        future.set_exception(error)
+
+
+class RecognitionSession:
+    """一段语音的流式识别会话，对应识别器中的一个OnlineStream"""
+
+    def __init__(self, shared: "SharedOnlineRecognizer"):
+        self.shared = shared
+        self.stream = shared.recognizer.create_stream()
+        self.text = ""
+        self.start_time = time.monotonic()
+        self.first_partial_time = None
+        self.final_ms = None
+
+    def feed(self, pcm: bytes):
+        """送入一个音频包的PCM，解码在识别线程中进行，不阻塞事件循环"""
+        if not pcm:
+            return
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        samples *= INT16_SCALE
+        self.shared.submit(self, samples, None)
+
+    async def finish(self) -> str:
+        """结束输入并等待最终结果，此前的音频已在说话过程中解码完毕"""
+        begin_time = time.monotonic()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.shared.submit(self, None, (loop, future))
+        text = await future
+        self.final_ms = (time.monotonic() - begin_time) * 1000
+        self.shared.record(self)
+        return text
+
+    @property
+    def first_partial_ms(self) -> Optional[float]:
+        """从会话开始到出现首个非空中间结果的耗时"""
+        if self.first_partial_time is None:
+            return None
+        return (self.first_partial_time - self.start_time) * 1000
+
+    def _update(self, text: str):
+        # 在识别线程中调用
+        if text and self.first_partial_time is None:
+            self.first_partial_time = time.monotonic()
+        self.text = text
+
+
+class SharedOnlineRecognizer:
+    """
+    所有连接共享的sherpa-onnx在线识别器
+    各连接的音频包进入队列，识别线程把它们写入各自的OnlineStream，
+    再对所有可解码的流做一次decode_streams批量解码，说话结束时只剩最后不足一个chunk的音频需要解码
+    """
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self._queue = queue.Queue()
+        self._stats = {
+            "sessions": 0,
+            "decodes": 0,
+            "decode_seconds": 0.0,
+            "first_partial_ms": 0.0,
+            "first_partials": 0,
+            "final_ms": 0.0,
+            "max_final_ms": 0.0,
+        }
+        self._thread = threading.Thread(
+            target=self._run, name="sherpa-onnx-stream", daemon=True
+        )
+        self._thread.start()
+
+    def create_session(self) -> RecognitionSession:
+        return RecognitionSession(self)
+
+    def submit(self, session: RecognitionSession, samples, done):
+        self._queue.put((session, samples, done))
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._process(items)
+
+    def _process(self, items):
+        sessions = {}
+        finishing = []
+        for session, samples, done in items:
+            if samples is not None:
+                session.stream.accept_waveform(SAMPLE_RATE, samples)
+            if done is not None:
+                session.stream.accept_waveform(SAMPLE_RATE, TAIL_PADDING)
+                session.stream.input_finished()
+                finishing.append((session, done))
+            sessions[session] = None
+
+        try:
+            self._decode([session.stream for session in sessions])
+            for session in sessions:
+                session._update(self.recognizer.get_result(session.stream))
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"流式识别解码失败: {e}")
+            for _, (loop, future) in finishing:
+                loop.call_soon_threadsafe(_set_future_exception, future, e)
+            return
+
+        for session, (loop, future) in finishing:
+            loop.call_soon_threadsafe(_set_future_result, future, session.text)
+
+    def _decode(self, streams):
+        while True:
+            ready = [stream for stream in streams if self.recognizer.is_ready(stream)]
+            if not ready:
+                return
+            begin_time = time.monotonic()
+            self.recognizer.decode_streams(ready)
+            self._stats["decodes"] += 1
+            self._stats["decode_seconds"] += time.monotonic() - begin_time
+
+    def record(self, session: RecognitionSession):
+        stats = self._stats
+        stats["sessions"] += 1
+        stats["final_ms"] += session.final_ms
+        stats["max_final_ms"] = max(stats["max_final_ms"], session.final_ms)
+        if session.first_partial_ms is not None:
+            stats["first_partials"] += 1
+            stats["first_partial_ms"] += session.first_partial_ms
+
+    def get_metrics(self) -> dict:
+        stats = dict(self._stats)
+        sessions = stats.pop("sessions")
+        first_partials = stats.pop("first_partials")
+        return {
+            "sessions": sessions,
+            "decodes": stats["decodes"],
+            "decode_seconds": stats["decode_seconds"],
+            "avg_first_partial_ms": (
+                stats["first_partial_ms"] / first_partials if first_partials else 0
+            ),
+            "avg_final_ms": stats["final_ms"] / sessions if sessions else 0,
+            "max_final_ms": stats["max_final_ms"],
+            "pending": self._queue.qsize(),
+        }
+
+
+def _create_recognizer(config: dict):
+    model_dir = config.get("model_dir")
+    model_type = config.get("model_type", "transducer")
+
+    def model_file(key, default):
+        path = os.path.join(model_dir, config.get(key) or default)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"模型文件不存在: {path}，请先下载流式模型")
+        return path
+
+    options = {
+        "tokens": model_file("tokens", "tokens.txt"),
+        "num_threads": int(config.get("num_threads", 2)),
+        "sample_rate": SAMPLE_RATE,
+        "feature_dim": 80,
+        # 断句由服务端VAD负责
+        "enable_endpoint_detection": False,
+        "decoding_method": "greedy_search",
+    }
+    if model_type == "paraformer":
+        return sherpa_onnx.OnlineRecognizer.from_paraformer(
+            encoder=model_file("encoder", "encoder.int8.onnx"),
+            decoder=model_file("decoder", "decoder.int8.onnx"),
+            **options,
+        )
+    return sherpa_onnx.OnlineRecognizer.from_transducer(
+        encoder=model_file("encoder", "encoder.int8.onnx"),
+        decoder=model_file("decoder", "decoder.onnx"),
+        joiner=model_file("joiner", "joiner.int8.onnx"),
+        **options,
+    )
+
+
+def get_shared_recognizer(config: dict) -> SharedOnlineRecognizer:
+    """流式ASR每个连接一个实例，模型只按配置加载一次"""
+    key = tuple(
+        str(config.get(name))
+        for name in (
+            "model_dir",
+            "model_type",
+            "encoder",
+            "decoder",
+            "joiner",
+            "tokens",
+            "num_threads",
+        )
+    )
+    with _shared_lock:
+        shared = _shared_recognizers.get(key)
+        if shared is None:
+            shared = SharedOnlineRecognizer(_create_recognizer(config))
+            _shared_recognizers[key] = shared
+        return shared
+
+
+def get_shared_recognizer_metrics() -> dict:
+    """各共享识别器的首个中间结果和最终结果延迟"""
+    return {
+        f"{os.path.basename(str(key[0]))}#{index}": shared.get_metrics()
+        for index, (key, shared) in enumerate(list(_shared_recognizers.items()))
+    }
+
+
+class ASRProvider(ASRProviderBase):
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        self.interface_type = InterfaceType.STREAM
+        self.config = config
+        self.text = ""
+        self.decoder = opuslib_next.Decoder(16000, 1)
+        self.output_dir = config.get("output_dir", "tmp/")
+        self.delete_audio_file = delete_audio_file
+        self.session = None
+        self.conn = None
+
+        # 确保输出目录存在
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.shared = get_shared_recognizer(config)
+
+    async def open_audio_channels(self, conn: "ConnectionHandler"):
+        await super().open_audio_channels(conn)
+
+    async def receive_audio(self, conn: "ConnectionHandler", audio, audio_have_voice):
+        # 先调用父类方法处理基础逻辑
+        await super().receive_audio(conn, audio, audio_have_voice)
+
+        if self.session is None:
+            if not audio_have_voice and conn.client_listen_mode != "manual":
+                return
+            # 检测到声音时开始会话，连同缓存的前导音频一起送入
+            self.conn = conn
+            self.session = self.shared.create_session()
+            for cached_audio in conn.asr_audio:
+                self.session.feed(self.decode_frame(cached_audio))
+        else:
+            self.session.feed(self.decode_frame(audio))
+
+        if conn.client_listen_mode != "manual" and conn.client_voice_stop:
+            await self._finish(conn)
+
+    async def _finish(self, conn: "ConnectionHandler"):
+        """结束当前会话，取最终结果并开始对话"""
+        session, self.session = self.session, None
+        if session is None:
+            return
+        asr_audio_task = conn.asr_audio.copy()
+        conn.reset_audio_states()
+
+        try:
+            self.text = await session.finish()
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"获取流式识别结果失败: {e}")
+            self.text = ""
+
+        first_partial_ms = session.first_partial_ms or 0
+        final_ms = session.final_ms or 0
+        logger.bind(tag=TAG).debug(
+            f"首个中间结果耗时: {first_partial_ms:.0f}ms | "
+            f"说话结束后出结果耗时: {final_ms:.0f}ms | 结果: {self.text}"
+        )
+
+        if conn.client_listen_mode == "manual" or len(asr_audio_task) > 15:
+            await self.handle_voice_stop(conn, asr_audio_task)
+        else:
+            self.text = ""
+
+    async def _send_stop_request(self):
+        """手动模式停止录音时结束会话"""
+        if self.conn is not None:
+            await self._finish(self.conn)
+
+    async def close(self):
+        self.session = None
+        self.conn = None
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus", artifacts=None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """获取识别结果"""
+        result = self.text
+        self.text = ""
+        return result, None
@@ -0,0 +1,270 @@
+import json
+import time
+import weakref
+import asyncio
+from collections import deque
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 空闲会话的维护周期（秒）
+MAINTAIN_INTERVAL = 1
+# 空闲会话的心跳检查间隔（秒）
+HEALTH_CHECK_INTERVAL = 5
+PING_TIMEOUT = 3
+# 预热失败后的最长重试间隔（秒）
+MAX_RETRY_DELAY = 30
+
+# 按供应商和配置区分的连接池，不再被任何ASR实例引用的连接池自动移除
+_pools = weakref.WeakValueDictionary()
+
+
+class UpstreamSession:
+    """一个已完成鉴权和初始化、可以直接发送音频的上游会话"""
+
+    def __init__(self, ws, **context):
+        self.ws = ws
+        self.context = context
+        self.created_at = time.monotonic()
+        self.checked_at = self.created_at
+
+    @property
+    def alive(self) -> bool:
+        return self.ws.close_code is None
+
+    async def close(self):
+        try:
+            await asyncio.wait_for(self.ws.close(), timeout=2.0)
+        except Exception as e:
+            logger.bind(tag=TAG).debug(f"关闭预热会话失败: {e}")
+
+
+class WarmSessionPool:
+    """
+    流式ASR的上游会话预热池
+    后台提前建立连接并完成鉴权和初始化握手，检测到说话时直接取用；
+    空闲会话定期心跳检查，超过max_idle秒未使用则关闭重建，避免被供应商的空闲超时断开；
+    超过idle_timeout秒没有取用会话时停止预热并关闭空闲会话，下次取用后再恢复
+    """
+
+    def __init__(
+        self,
+        name: str,
+        opener=None,
+        size: int = 0,
+        max_idle: float = 8,
+        idle_timeout: float = 300,
+    ):
+        """
+        Args:
+            name: 供应商名称，用于日志和监控
+            opener: 建立会话的协程函数，返回UpstreamSession
+            size: 保持就绪的空闲会话数，0表示不预热，每次说话时再建立连接
+            max_idle: 空闲会话的最长保留时间（秒），应小于供应商的空闲超时
+            idle_timeout: 连续多少秒没有取用会话后停止预热
+        """
+        self.name = name
+        self.opener = opener
+        self.size = max(0, int(size))
+        self.max_idle = float(max_idle)
+        self.idle_timeout = float(idle_timeout)
+        self._last_acquire = None
+        self._dormant = False
+        self._idle = deque()
+        self._opening = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._loop = None
+        self._maintain_task = None
+        self._stats = {
+            "warm_hits": 0,
+            "cold_opens": 0,
+            "opened": 0,
+            "open_failed": 0,
+            "expired": 0,
+            "unhealthy": 0,
+            "dormant": 0,
+            "open_ms": 0.0,
+            "first_audio_ms": 0.0,
+            "first_audio_count": 0,
+            "max_first_audio_ms": 0.0,
+        }
+
+    def start(self):
+        """在事件循环中开始预热，连接打开音频通道时调用，重复调用无副作用"""
+        # 只有从未取用过的连接池在此开始计时，停止预热后等到下次取用再恢复
+        if self._last_acquire is None:
+            self._last_acquire = time.monotonic()
+        self._ensure_maintainer()
+        self._refill()
+
+    async def acquire(self, **kwargs) -> UpstreamSession:
+        """
+        取一个就绪的会话，没有可用的预热会话时当场建立
+        传入kwargs表示需要特殊参数的会话，直接用这些参数新建，不使用预热会话
+        """
+        self._last_acquire = time.monotonic()
+        self._dormant = False
+        self._ensure_maintainer()
+        if not kwargs:
+            while self._idle:
+                session = self._idle.popleft()
+                if session.alive and not self._expired(session):
+                    self._stats["warm_hits"] += 1
+                    self._refill()
+                    return session
+                self._discard(session, "unhealthy" if not session.alive else "expired")
+
+        self._stats["cold_opens"] += 1
+        self._refill()
+        return await self._open(**kwargs)
+
+    def record_first_audio(self, onset_time: float):
+        """记录从检测到说话到第一帧音频发往上游的耗时"""
+        elapsed_ms = (time.monotonic() - onset_time) * 1000
+        stats = self._stats
+        stats["first_audio_ms"] += elapsed_ms
+        stats["first_audio_count"] += 1
+        stats["max_first_audio_ms"] = max(stats["max_first_audio_ms"], elapsed_ms)
+        logger.bind(tag=TAG).debug(f"{self.name} 说话开始到首帧音频发出: {elapsed_ms:.0f}ms")
+
+    async def _open(self, **kwargs) -> UpstreamSession:
+        begin_time = time.monotonic()
+        try:
+            session = await self.opener(**kwargs)
+        except Exception:
+            self._stats["open_failed"] += 1
+            raise
+        self._stats["opened"] += 1
+        self._stats["open_ms"] += (time.monotonic() - begin_time) * 1000
+        return session
+
+    def _expired(self, session: UpstreamSession) -> bool:
+        return time.monotonic() - session.created_at > self.max_idle
+
+    def _discard(self, session: UpstreamSession, reason: str):
+        self._stats[reason] += 1
+        asyncio.create_task(session.close())
+
+    def _ensure_maintainer(self):
+        if self.size == 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 事件循环变化后旧会话不可再用
+            self._loop = loop
+            self._idle.clear()
+            self._opening = 0
+            self._maintain_task = None
+        if self._maintain_task is None and not self._dormant:
+            self._maintain_task = loop.create_task(self._maintain())
+
+    def _refill(self):
+        if self.size == 0 or self._dormant or time.monotonic() < self._retry_at:
+            return
+        for _ in range(self.size - len(self._idle) - self._opening):
+            self._opening += 1
+            asyncio.create_task(self._open_idle())
+
+    async def _open_idle(self):
+        try:
+            session = await self._open()
+        except Exception as e:
+            self._failures += 1
+            delay = min(MAX_RETRY_DELAY, 2 ** self._failures)
+            self._retry_at = time.monotonic() + delay
+            logger.bind(tag=TAG).warning(f"{self.name} 预热会话建立失败，{delay}秒后重试: {e}")
+            return
+        finally:
+            self._opening -= 1
+        self._failures = 0
+        if self._dormant:
+            self._discard(session, "expired")
+            return
+        self._idle.append(session)
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(MAINTAIN_INTERVAL)
+            try:
+                now = time.monotonic()
+                if now - self._last_acquire > self.idle_timeout:
+                    self._sleep()
+                    return
+                for session in list(self._idle):
+                    if not session.alive:
+                        self._idle.remove(session)
+                        self._discard(session, "unhealthy")
+                    elif self._expired(session):
+                        self._idle.remove(session)
+                        self._discard(session, "expired")
+                    elif now - session.checked_at >= HEALTH_CHECK_INTERVAL:
+                        session.checked_at = now
+                        asyncio.create_task(self._health_check(session))
+                self._refill()
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"{self.name} 预热会话维护失败: {e}")
+
+    def _sleep(self):
+        """长时间没有取用时关闭空闲会话并停止维护，不再占用供应商的连接"""
+        self._dormant = True
+        self._maintain_task = None
+        self._stats["dormant"] += 1
+        while self._idle:
+            self._discard(self._idle.popleft(), "expired")
+        logger.bind(tag=TAG).info(
+            f"{self.name} 预热池{self.idle_timeout:.0f}秒未被使用，停止预热"
+        )
+
+    async def _health_check(self, session: UpstreamSession):
+        try:
+            pong_waiter = await session.ws.ping()
+            await asyncio.wait_for(pong_waiter, timeout=PING_TIMEOUT)
+        except Exception as e:
+            if session in self._idle:
+                self._idle.remove(session)
+                self._discard(session, "unhealthy")
+                logger.bind(tag=TAG).debug(f"{self.name} 预热会话心跳失败: {e}")
+
+    def get_metrics(self) -> dict:
+        stats = dict(self._stats)
+        first_audio_count = stats.pop("first_audio_count")
+        opened = stats["opened"]
+        stats["open_ms"] = stats["open_ms"] / opened if opened else 0
+        stats["first_audio_ms"] = (
+            stats["first_audio_ms"] / first_audio_count if first_audio_count else 0
+        )
+        stats["size"] = self.size
+        stats["idle"] = len(self._idle)
+        stats["opening"] = self._opening
+        stats["active"] = self.size > 0 and not self._dormant
+        return stats
+
+
+def get_warm_pool(name: str, config: dict, opener_factory) -> WarmSessionPool:
+    """
+    同一配置的流式ASR共用一个预热池，第一次创建时调用 opener_factory(config) 得到建立会话的协程函数，
+    opener只依赖配置，不绑定任何连接的ASR实例；opener_factory中再次按同一配置调用本函数时返回正在创建的连接池。
+    配置项 warm_pool_size 为保持就绪的会话数，warm_pool_max_idle 为空闲会话的最长保留秒数，
+    warm_pool_idle_timeout 为连续多少秒没有说话后停止预热
+    """
+    key = (name, json.dumps(config, sort_keys=True, ensure_ascii=False, default=str))
+    pool = _pools.get(key)
+    if pool is None:
+        pool = WarmSessionPool(
+            name,
+            size=config.get("warm_pool_size") or 0,
+            max_idle=config.get("warm_pool_max_idle") or 8,
+            idle_timeout=config.get("warm_pool_idle_timeout") or 300,
+        )
+        _pools[key] = pool
+        pool.opener = opener_factory(config)
+    return pool
+
+
+def get_warm_pool_metrics() -> dict:
+    return {
+        f"{pool.name}#{index}": pool.get_metrics()
+        for index, pool in enumerate(list(_pools.values()))
+    }
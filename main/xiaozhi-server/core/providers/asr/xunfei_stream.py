@@ -1,4 +1,5 @@
 import json
+import time
 import hmac
 import base64
 import hashlib
@@ -17,6 +18,7 @@ from config.logger import setup_logging
 from wsgiref.handlers import format_date_time
 from core.providers.asr.base import ASRProviderBase
 from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.warm_pool import UpstreamSession, get_warm_pool
 
 TAG = __name__
 logger = setup_logging()
@@ -57,10 +59,19 @@ class ASRProvider(ASRProviderBase):
 
         self.output_dir = config.get("output_dir", "tmp/")
         self.delete_audio_file = delete_audio_file
+        self.ws_url = config.get("ws_url") or "ws://iat.cn-huabei-1.xf-yun.com/v1"
+
+        # 同一配置的连接共用上游会话预热池
+        self.pool = get_warm_pool("xunfei_stream", config, self._pool_opener)
+
+    @classmethod
+    def _pool_opener(cls, config):
+        """预热池使用独立实例建立会话，只依赖配置，不持有任何连接的识别状态"""
+        return cls(config, False)._open_session
 
     def create_url(self) -> str:
         """生成认证URL"""
-        url = "ws://iat.cn-huabei-1.xf-yun.com/v1"
+        url = self.ws_url
         # 生成RFC1123格式的时间戳
         now = datetime.now()
         date = format_date_time(mktime(now.timetuple()))
@@ -99,6 +110,7 @@ class ASRProvider(ASRProviderBase):
 
     async def open_audio_channels(self, conn: "ConnectionHandler"):
         await super().open_audio_channels(conn)
+        self.pool.start()
 
     async def receive_audio(self, conn: "ConnectionHandler", audio, audio_have_voice):
         # 先调用父类方法处理基础逻辑
@@ -111,59 +123,55 @@ class ASRProvider(ASRProviderBase):
             except Exception as e:
                 logger.bind(tag=TAG).error(f"建立ASR连接失败: {str(e)}")
                 await self._cleanup()
-                return
+            return
 
         # 发送当前音频数据
         if self.asr_ws and self.is_processing and self.server_ready:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
+                pcm_frame = self.decode_frame(audio)
                 await self._send_audio_frame(pcm_frame, STATUS_CONTINUE_FRAME)
             except Exception as e:
                 logger.bind(tag=TAG).warning(f"发送音频数据时发生错误: {e}")
                 await self._cleanup()
 
+    async def _open_session(self) -> UpstreamSession:
+        """建立鉴权后的WebSocket连接，讯飞的会话由首帧音频开启，无需额外握手"""
+        ws_url = self.create_url()
+        logger.bind(tag=TAG).debug(f"正在连接ASR服务: {ws_url[:50]}...")
+        ws = await websockets.connect(
+            ws_url,
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=10,
+        )
+        return UpstreamSession(ws)
+
     async def _start_recognition(self, conn: "ConnectionHandler"):
-        """开始识别会话"""
+        """开始识别会话，优先取用已建立的预热连接"""
+        onset_time = time.monotonic()
         try:
             self.is_processing = True
-            # 建立WebSocket连接
-            ws_url = self.create_url()
-            logger.bind(tag=TAG).info(f"正在连接ASR服务: {ws_url[:50]}...")
 
             # 如果为手动模式,设置超时时长为一分钟
             if conn.client_listen_mode == "manual":
                 self.iat_params["eos"] = 60000
 
-            self.asr_ws = await websockets.connect(
-                ws_url,
-                max_size=1000000000,
-                ping_interval=None,
-                ping_timeout=None,
-                close_timeout=10,
-            )
-
-            logger.bind(tag=TAG).info("ASR WebSocket连接已建立")
+            session = await self.pool.acquire()
+            self.asr_ws = session.ws
+            logger.bind(tag=TAG).debug("ASR WebSocket连接已就绪")
             self.server_ready = False
             self.forward_task = asyncio.create_task(self._forward_results(conn))
 
-            # 发送首帧音频
-            if conn.asr_audio and len(conn.asr_audio) > 0:
-                first_audio = conn.asr_audio[-1] if conn.asr_audio else b""
-                pcm_frame = (
-                    self.decoder.decode(first_audio, 960) if first_audio else b""
-                )
-                await self._send_audio_frame(pcm_frame, STATUS_FIRST_FRAME)
-                self.server_ready = True
-                logger.bind(tag=TAG).info("已发送首帧，开始识别")
-
-                # 发送缓存的音频数据
-                for cached_audio in conn.asr_audio[-10:]:
-                    try:
-                        pcm_frame = self.decoder.decode(cached_audio, 960)
-                        await self._send_audio_frame(pcm_frame, STATUS_CONTINUE_FRAME)
-                    except Exception as e:
-                        logger.bind(tag=TAG).info(f"发送缓存音频数据时发生错误: {e}")
-                        break
+            # 首帧开启会话，随后发送其余缓存音频，其中已包含当前音频
+            for index, cached_audio in enumerate(conn.asr_audio):
+                pcm_frame = self.decode_frame(cached_audio)
+                if index == 0:
+                    await self._send_audio_frame(pcm_frame, STATUS_FIRST_FRAME)
+                    self.pool.record_first_audio(onset_time)
+                else:
+                    await self._send_audio_frame(pcm_frame, STATUS_CONTINUE_FRAME)
+            self.server_ready = True
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"建立ASR连接失败: {str(e)}")
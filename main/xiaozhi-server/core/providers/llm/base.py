@@ -1,9 +1,49 @@
+import asyncio
+import threading
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 
 TAG = __name__
 logger = setup_logging()
 
+# 同步生成器结束的标记
+_STREAM_END = object()
+
+
+async def iterate_in_thread(gen_factory):
+    """
+    在独立线程中迭代同步生成器，并以异步生成器的形式逐个返回结果，
+    用于尚未实现原生异步接口的LLM提供方
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def worker():
+        try:
+            for item in gen_factory():
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (_STREAM_END, e))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (_STREAM_END, None))
+
+    threading.Thread(target=worker, daemon=True).start()
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _STREAM_END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # 调用方提前结束（如被打断）时，通知线程停止读取上游
+        stopped.set()
+
+
 class LLMProviderBase(ABC):
     @abstractmethod
     def response(self, session_id, dialogue):
@@ -20,7 +60,7 @@ class LLMProviderBase(ABC):
         for part in self.response("", dialogue, **kwargs):
             result += part
         return result
-    
+
     def response_with_functions(self, session_id, dialogue, functions=None):
         """
         Default implementation for function calling (streaming)
@@ -32,3 +72,24 @@ class LLMProviderBase(ABC):
         for token in self.response(session_id, dialogue):
             yield token, None
 
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        """
+        异步流式响应，返回值与response一致
+        默认在独立线程中运行同步的response，支持原生异步的提供方应覆盖此方法
+        """
+        async for token in iterate_in_thread(
+            lambda: self.response(session_id, dialogue, **kwargs)
+        ):
+            yield token
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None):
+        """
+        异步流式响应（支持function call），返回值与response_with_functions一致
+        默认在独立线程中运行同步的response_with_functions
+        """
+        async for item in iterate_in_thread(
+            lambda: self.response_with_functions(
+                session_id, dialogue, functions=functions
+            )
+        ):
+            yield item
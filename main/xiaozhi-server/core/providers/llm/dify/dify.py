@@ -1,4 +1,5 @@
 import json
+import aiohttp
 from config.logger import setup_logging
 import requests
 from core.providers.llm.base import LLMProviderBase
@@ -19,74 +20,87 @@ class LLMProvider(LLMProviderBase):
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
 
-    def response(self, session_id, dialogue, **kwargs):
+    def _build_request(self, session_id, dialogue):
         # 取最后一条用户消息
         last_msg = next(m for m in reversed(dialogue) if m["role"] == "user")
         conversation_id = self.session_conversation_map.get(session_id)
 
-        # 发起流式请求
         if self.mode == "chat-messages":
-            request_json = {
+            return {
                 "query": last_msg["content"],
                 "response_mode": "streaming",
                 "user": session_id,
                 "inputs": {},
                 "conversation_id": conversation_id,
             }
-        elif self.mode == "workflows/run":
-            request_json = {
-                "inputs": {"query": last_msg["content"]},
-                "response_mode": "streaming",
-                "user": session_id,
-            }
-        elif self.mode == "completion-messages":
-            request_json = {
-                "inputs": {"query": last_msg["content"]},
-                "response_mode": "streaming",
-                "user": session_id,
-            }
+        # workflows/run 和 completion-messages
+        return {
+            "inputs": {"query": last_msg["content"]},
+            "response_mode": "streaming",
+            "user": session_id,
+        }
+
+    def _parse_line(self, session_id, line):
+        """解析一行SSE数据，返回需要输出的文本，没有则返回None"""
+        if not line.startswith(b"data: "):
+            return None
+        event = json.loads(line[6:])
+        if self.mode == "workflows/run":
+            if event.get("event") == "workflow_finished":
+                if event["data"]["status"] == "succeeded":
+                    return event["data"]["outputs"]["answer"]
+                return "【服务响应异常】"
+            return None
+        # 如果没有找到conversation_id，则获取此次conversation_id
+        if self.mode == "chat-messages" and not self.session_conversation_map.get(
+            session_id
+        ):
+            self.session_conversation_map[session_id] = event.get("conversation_id")
+        # 过滤 message_replace 事件，此事件会全量推一次
+        if event.get("event") != "message_replace" and event.get("answer"):
+            return event["answer"]
+        return None
 
+    def response(self, session_id, dialogue, **kwargs):
+        request_json = self._build_request(session_id, dialogue)
+
+        # 发起流式请求
         with requests.post(
             f"{self.base_url}/{self.mode}",
             headers={"Authorization": f"Bearer {self.api_key}"},
             json=request_json,
             stream=True,
         ) as r:
-            if self.mode == "chat-messages":
-                for line in r.iter_lines():
-                    if line.startswith(b"data: "):
-                        event = json.loads(line[6:])
-                        # 如果没有找到conversation_id，则获取此次conversation_id
-                        if not conversation_id:
-                            conversation_id = event.get("conversation_id")
-                            self.session_conversation_map[session_id] = (
-                                conversation_id  # 更新映射
-                            )
-                        # 过滤 message_replace 事件，此事件会全量推一次
-                        if event.get("event") != "message_replace" and event.get(
-                            "answer"
-                        ):
-                            yield event["answer"]
-            elif self.mode == "workflows/run":
-                for line in r.iter_lines():
-                    if line.startswith(b"data: "):
-                        event = json.loads(line[6:])
-                        if event.get("event") == "workflow_finished":
-                            if event["data"]["status"] == "succeeded":
-                                yield event["data"]["outputs"]["answer"]
-                            else:
-                                yield "【服务响应异常】"
-            elif self.mode == "completion-messages":
-                for line in r.iter_lines():
-                    if line.startswith(b"data: "):
-                        event = json.loads(line[6:])
-                        # 过滤 message_replace 事件，此事件会全量推一次
-                        if event.get("event") != "message_replace" and event.get(
-                            "answer"
-                        ):
-                            yield event["answer"]
+            for line in r.iter_lines():
+                answer = self._parse_line(session_id, line)
+                if answer:
+                    yield answer
 
-    def response_with_functions(self, session_id, dialogue, functions=None):
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        request_json = self._build_request(session_id, dialogue)
+
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                f"{self.base_url}/{self.mode}",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json=request_json,
+            ) as r:
+                # 按行读取SSE数据，单行长度不受默认64KB限制
+                buffer = b""
+                async for chunk in r.content.iter_any():
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        answer = self._parse_line(session_id, line.rstrip(b"\r"))
+                        if answer:
+                            yield answer
+                if buffer:
+                    answer = self._parse_line(session_id, buffer.rstrip(b"\r"))
+                    if answer:
+                        yield answer
+
+    @staticmethod
+    def _prepare_function_dialogue(dialogue, functions):
         if len(dialogue) == 2 and functions is not None and len(functions) > 0:
             # 第一次调用llm， 取最后一条用户消息，附加tool提示词
             last_msg = dialogue[-1]["content"]
@@ -102,6 +116,14 @@ class LLMProvider(LLMProviderBase):
                     dialogue[-1]["content"] = assistant_msg + dialogue[-1]["content"]
                     break
                 dialogue.pop()
+        return dialogue
 
+    def response_with_functions(self, session_id, dialogue, functions=None):
+        dialogue = self._prepare_function_dialogue(dialogue, functions)
         for token in self.response(session_id, dialogue):
             yield token, None
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None):
+        dialogue = self._prepare_function_dialogue(dialogue, functions)
+        async for token in self.aresponse(session_id, dialogue):
+            yield token, None
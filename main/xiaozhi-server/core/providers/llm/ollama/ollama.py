@@ -1,5 +1,5 @@
 from config.logger import setup_logging
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import json
 from core.providers.llm.base import LLMProviderBase
 
@@ -21,28 +21,69 @@ class LLMProvider(LLMProviderBase):
             api_key="ollama",  # Ollama doesn't need an API key but OpenAI client requires one
         )
 
+        # 异步客户端绑定事件循环，首次异步调用时创建
+        self._async_client = None
+
         # 检查是否是qwen3模型
         self.is_qwen3 = self.model_name and self.model_name.lower().startswith("qwen3")
 
-    def response(self, session_id, dialogue, **kwargs):
-        # 如果是qwen3模型，在用户最后一条消息中添加/no_think指令
-        if self.is_qwen3:
-            # 复制对话列表，避免修改原始对话
-            dialogue_copy = dialogue.copy()
-
-            # 找到最后一条用户消息
-            for i in range(len(dialogue_copy) - 1, -1, -1):
-                if dialogue_copy[i]["role"] == "user":
-                    # 在用户消息前添加/no_think指令
-                    dialogue_copy[i]["content"] = (
-                        "/no_think " + dialogue_copy[i]["content"]
-                    )
-                    logger.bind(tag=TAG).debug(f"为qwen3模型添加/no_think指令")
-                    break
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(base_url=self.base_url, api_key="ollama")
+        return self._async_client
 
-            # 使用修改后的对话
-            dialogue = dialogue_copy
+    def _prepare_dialogue(self, dialogue):
+        # 如果是qwen3模型，在用户最后一条消息中添加/no_think指令
+        if not self.is_qwen3:
+            return dialogue
+        # 复制对话列表，避免修改原始对话
+        dialogue_copy = dialogue.copy()
+
+        # 找到最后一条用户消息
+        for i in range(len(dialogue_copy) - 1, -1, -1):
+            if dialogue_copy[i]["role"] == "user":
+                # 在用户消息前添加/no_think指令
+                dialogue_copy[i]["content"] = "/no_think " + dialogue_copy[i]["content"]
+                logger.bind(tag=TAG).debug(f"为qwen3模型添加/no_think指令")
+                break
+        return dialogue_copy
+
+    @staticmethod
+    def _filter_think(buffer, content, is_active):
+        """
+        过滤<think>标签内的内容，支持标签跨chunk
+
+        Returns:
+            (可输出内容, 新的缓冲区, 是否处于输出状态)
+        """
+        # 将内容添加到缓冲区
+        buffer += content
+
+        # 处理缓冲区中的标签
+        while "<think>" in buffer and "</think>" in buffer:
+            # 找到完整的<think></think>标签并移除
+            pre = buffer.split("<think>", 1)[0]
+            post = buffer.split("</think>", 1)[1]
+            buffer = pre + post
+
+        # 处理只有开始标签的情况
+        if "<think>" in buffer:
+            is_active = False
+            buffer = buffer.split("<think>", 1)[0]
+
+        # 处理只有结束标签的情况
+        if "</think>" in buffer:
+            is_active = True
+            buffer = buffer.split("</think>", 1)[1]
+
+        # 如果当前处于活动状态且缓冲区有内容，则输出并清空缓冲区
+        if is_active and buffer:
+            return buffer, "", is_active
+        return "", buffer, is_active
 
+    def response(self, session_id, dialogue, **kwargs):
+        dialogue = self._prepare_dialogue(dialogue)
         responses = self.client.chat.completions.create(
             model=self.model_name, messages=dialogue, stream=True
         )
@@ -60,53 +101,17 @@ class LLMProvider(LLMProviderBase):
                 content = delta.content if hasattr(delta, "content") else ""
 
                 if content:
-                    # 将内容添加到缓冲区
-                    buffer += content
-
-                    # 处理缓冲区中的标签
-                    while "<think>" in buffer and "</think>" in buffer:
-                        # 找到完整的<think></think>标签并移除
-                        pre = buffer.split("<think>", 1)[0]
-                        post = buffer.split("</think>", 1)[1]
-                        buffer = pre + post
-
-                    # 处理只有开始标签的情况
-                    if "<think>" in buffer:
-                        is_active = False
-                        buffer = buffer.split("<think>", 1)[0]
-
-                    # 处理只有结束标签的情况
-                    if "</think>" in buffer:
-                        is_active = True
-                        buffer = buffer.split("</think>", 1)[1]
-
-                    # 如果当前处于活动状态且缓冲区有内容，则输出
-                    if is_active and buffer:
-                        yield buffer
-                        buffer = ""  # 清空缓冲区
+                    output, buffer, is_active = self._filter_think(
+                        buffer, content, is_active
+                    )
+                    if output:
+                        yield output
 
             except Exception as e:
                 logger.bind(tag=TAG).error(f"Error processing chunk: {e}")
 
     def response_with_functions(self, session_id, dialogue, functions=None):
-        # 如果是qwen3模型，在用户最后一条消息中添加/no_think指令
-        if self.is_qwen3:
-            # 复制对话列表，避免修改原始对话
-            dialogue_copy = dialogue.copy()
-
-            # 找到最后一条用户消息
-            for i in range(len(dialogue_copy) - 1, -1, -1):
-                if dialogue_copy[i]["role"] == "user":
-                    # 在用户消息前添加/no_think指令
-                    dialogue_copy[i]["content"] = (
-                        "/no_think " + dialogue_copy[i]["content"]
-                    )
-                    logger.bind(tag=TAG).debug(f"为qwen3模型添加/no_think指令")
-                    break
-
-            # 使用修改后的对话
-            dialogue = dialogue_copy
-
+        dialogue = self._prepare_dialogue(dialogue)
         stream = self.client.chat.completions.create(
             model=self.model_name,
             messages=dialogue,
@@ -136,30 +141,77 @@ class LLMProvider(LLMProviderBase):
 
                 # 处理文本内容
                 if content:
-                    # 将内容添加到缓冲区
-                    buffer += content
-
-                    # 处理缓冲区中的标签
-                    while "<think>" in buffer and "</think>" in buffer:
-                        # 找到完整的<think></think>标签并移除
-                        pre = buffer.split("<think>", 1)[0]
-                        post = buffer.split("</think>", 1)[1]
-                        buffer = pre + post
-
-                    # 处理只有开始标签的情况
-                    if "<think>" in buffer:
-                        is_active = False
-                        buffer = buffer.split("<think>", 1)[0]
-
-                    # 处理只有结束标签的情况
-                    if "</think>" in buffer:
-                        is_active = True
-                        buffer = buffer.split("</think>", 1)[1]
-
-                    # 如果当前处于活动状态且缓冲区有内容，则输出
-                    if is_active and buffer:
-                        yield buffer, None
-                        buffer = ""  # 清空缓冲区
+                    output, buffer, is_active = self._filter_think(
+                        buffer, content, is_active
+                    )
+                    if output:
+                        yield output, None
             except Exception as e:
                 logger.bind(tag=TAG).error(f"Error processing function chunk: {e}")
                 continue
+
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        dialogue = self._prepare_dialogue(dialogue)
+        responses = await self.async_client.chat.completions.create(
+            model=self.model_name, messages=dialogue, stream=True
+        )
+        is_active = True
+        buffer = ""
+        try:
+            async for chunk in responses:
+                try:
+                    delta = (
+                        chunk.choices[0].delta
+                        if getattr(chunk, "choices", None)
+                        else None
+                    )
+                    content = delta.content if hasattr(delta, "content") else ""
+                    if content:
+                        output, buffer, is_active = self._filter_think(
+                            buffer, content, is_active
+                        )
+                        if output:
+                            yield output
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"Error processing chunk: {e}")
+        finally:
+            await responses.close()
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None):
+        dialogue = self._prepare_dialogue(dialogue)
+        stream = await self.async_client.chat.completions.create(
+            model=self.model_name,
+            messages=dialogue,
+            stream=True,
+            tools=functions,
+        )
+        is_active = True
+        buffer = ""
+        try:
+            async for chunk in stream:
+                try:
+                    delta = (
+                        chunk.choices[0].delta
+                        if getattr(chunk, "choices", None)
+                        else None
+                    )
+                    content = delta.content if hasattr(delta, "content") else None
+                    tool_calls = (
+                        delta.tool_calls if hasattr(delta, "tool_calls") else None
+                    )
+
+                    # 如果是工具调用，直接传递
+                    if tool_calls:
+                        yield None, tool_calls
+                        continue
+
+                    if content:
+                        output, buffer, is_active = self._filter_think(
+                            buffer, content, is_active
+                        )
+                        if output:
+                            yield output, None
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"Error processing function chunk: {e}")
+        finally:
+            await stream.close()
@@ -59,6 +59,10 @@ class ToolManager:
         self._cached_function_descriptions = descriptions
         return descriptions
 
+    def prime_function_descriptions(self, descriptions: List[Dict[str, Any]]):
+        """预置函数描述（如断线重连时沿用上一次会话的工具列表），任何工具注册或刷新都会使其失效"""
+        self._cached_function_descriptions = list(descriptions)
+
     def has_tool(self, tool_name: str) -> bool:
         """检查是否存在指定工具"""
         tools = self.get_all_tools()
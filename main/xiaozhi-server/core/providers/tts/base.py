@@ -13,6 +13,7 @@ from typing import Callable, Any
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 from core.utils import opus_encoder_utils
+from core.utils.loop_queue import LoopQueue
 from core.utils.tts import MarkdownCleaner, convert_percentage_to_range
 from core.utils.output_counter import add_device_output
 from core.handle.reportHandle import enqueue_tts_report
@@ -264,6 +265,10 @@ class TTSProviderBase(ABC):
                 sample_rate=conn.sample_rate, channels=1, frame_size_ms=60
             )
 
+        if conn.async_pipeline:
+            self._open_async_pipeline(conn)
+            return
+
         # tts 消化线程
         self.tts_priority_thread = threading.Thread(
             target=self.tts_text_priority_thread, daemon=True
@@ -276,42 +281,28 @@ class TTSProviderBase(ABC):
         )
         self.audio_play_priority_thread.start()
 
+    def _open_async_pipeline(self, conn):
+        """asyncio流水线模式：TTS文本和音频播放阶段以协程运行，通过LoopQueue衔接"""
+        self.tts_audio_queue = LoopQueue.from_queue(self.tts_audio_queue, conn.loop)
+        conn.start_pipeline_task(self._audio_play_priority_task())
+
+        if type(self).tts_text_priority_thread is TTSProviderBase.tts_text_priority_thread:
+            self.tts_text_queue = LoopQueue.from_queue(self.tts_text_queue, conn.loop)
+            conn.start_pipeline_task(self._tts_text_priority_task())
+        else:
+            # 流式TTS重写了文本处理线程，保持原有线程实现
+            self.tts_priority_thread = threading.Thread(
+                target=self.tts_text_priority_thread, daemon=True
+            )
+            self.tts_priority_thread.start()
+
     # 这里默认是非流式的处理方式
     # 流式处理方式请在子类中重写
     def tts_text_priority_thread(self):
-        while not self.conn.stop_event.is_set():
+        while not self.conn.pipeline_stopped():
             try:
                 message = self.tts_text_queue.get(timeout=1)
-                if message.sentence_type == SentenceType.FIRST:
-                    self.conn.client_abort = False
-                if self.conn.client_abort:
-                    logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
-                    continue
-                if message.sentence_type == SentenceType.FIRST:
-                    # 初始化参数
-                    self.tts_stop_request = False
-                    self.processed_chars = 0
-                    self.tts_text_buff = []
-                    self.is_first_sentence = True
-                    self.tts_audio_first_sentence = True
-                elif ContentType.TEXT == message.content_type:
-                    self.tts_text_buff.append(message.content_detail)
-                    segment_text = self._get_segment_text()
-                    if segment_text:
-                        self.to_tts_stream(segment_text, opus_handler=self.handle_opus)
-                elif ContentType.FILE == message.content_type:
-                    self._process_remaining_text_stream(opus_handler=self.handle_opus)
-                    tts_file = message.content_file
-                    if tts_file and os.path.exists(tts_file):
-                        self._process_audio_file_stream(
-                            tts_file, callback=self.handle_opus
-                        )
-                if message.sentence_type == SentenceType.LAST:
-                    self._process_remaining_text_stream(opus_handler=self.handle_opus)
-                    self.tts_audio_queue.put(
-                        (message.sentence_type, [], message.content_detail)
-                    )
-
+                self._handle_tts_text_message(message)
             except queue.Empty:
                 continue
             except Exception as e:
@@ -320,11 +311,59 @@ class TTSProviderBase(ABC):
                 )
                 continue
 
+    async def _tts_text_priority_task(self):
+        """
+        TTS文本处理协程（asyncio流水线模式），语音合成在连接自己的线程池中执行，
+        既不阻塞事件循环，也不占用所有连接共用的默认线程池
+        """
+        while not self.conn.pipeline_stopped():
+            try:
+                message = await self.tts_text_queue.get()
+                await self.conn.loop.run_in_executor(
+                    self.conn.executor, self._handle_tts_text_message, message
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理TTS文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+
+    def _handle_tts_text_message(self, message):
+        if message.sentence_type == SentenceType.FIRST:
+            self.conn.client_abort = False
+        if self.conn.client_abort:
+            logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
+            return
+        if message.sentence_type == SentenceType.FIRST:
+            # 初始化参数
+            self.tts_stop_request = False
+            self.processed_chars = 0
+            self.tts_text_buff = []
+            self.is_first_sentence = True
+            self.tts_audio_first_sentence = True
+        elif ContentType.TEXT == message.content_type:
+            self.tts_text_buff.append(message.content_detail)
+            segment_text = self._get_segment_text()
+            if segment_text:
+                self.to_tts_stream(segment_text, opus_handler=self.handle_opus)
+        elif ContentType.FILE == message.content_type:
+            self._process_remaining_text_stream(opus_handler=self.handle_opus)
+            tts_file = message.content_file
+            if tts_file and os.path.exists(tts_file):
+                self._process_audio_file_stream(
+                    tts_file, callback=self.handle_opus
+                )
+        if message.sentence_type == SentenceType.LAST:
+            self._process_remaining_text_stream(opus_handler=self.handle_opus)
+            self.tts_audio_queue.put(
+                (message.sentence_type, [], message.content_detail)
+            )
+
     def _audio_play_priority_thread(self):
         # 需要上报的文本和音频列表
-        enqueue_text = None
-        enqueue_audio = []
-        while not self.conn.stop_event.is_set():
+        report_state = {"text": None, "audio": []}
+        while not self.conn.pipeline_stopped():
             text = None
             try:
                 try:
@@ -332,37 +371,15 @@ class TTSProviderBase(ABC):
                         timeout=0.1
                     )
                 except queue.Empty:
-                    if self.conn.stop_event.is_set():
+                    if self.conn.pipeline_stopped():
                         break
                     continue
 
-                if self.conn.client_abort:
-                    logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
-                    enqueue_text, enqueue_audio = None, []
+                if not self._prepare_audio_play(
+                    report_state, sentence_type, audio_datas, text
+                ):
                     continue
 
-                # 收到下一个文本开始或会话结束时进行上报
-                if sentence_type is not SentenceType.MIDDLE:
-                    if self.report_on_last:
-                        # 累积模式：适用于全程只有一个语音流的TTS（如seed-tts-2.0）
-                        # FIRST时只记录文本，音频持续累积，仅在LAST时统一上报
-                        if text:
-                            enqueue_text = text
-                        if sentence_type == SentenceType.LAST:
-                            enqueue_tts_report(self.conn, enqueue_text, enqueue_audio)
-                            enqueue_audio = []
-                            enqueue_text = None
-                    else:
-                        # 非累积模式：每个句子分别上报
-                        if enqueue_text is not None:
-                            enqueue_tts_report(self.conn, enqueue_text, enqueue_audio)
-                        enqueue_audio = []
-                        enqueue_text = text
-
-                # 收集上报音频数据
-                if isinstance(audio_datas, bytes):
-                    enqueue_audio.append(audio_datas)
-
                 # 发送音频
                 future = asyncio.run_coroutine_threadsafe(
                     sendAudioMessage(self.conn, sentence_type, audio_datas, text),
@@ -377,6 +394,62 @@ class TTSProviderBase(ABC):
             except Exception as e:
                 logger.bind(tag=TAG).error(f"audio_play_priority_thread: {text} {e}")
 
+    async def _audio_play_priority_task(self):
+        """音频播放协程（asyncio流水线模式），直接在事件循环中发送，无需跨线程等待"""
+        report_state = {"text": None, "audio": []}
+        while not self.conn.pipeline_stopped():
+            text = None
+            try:
+                sentence_type, audio_datas, text = await self.tts_audio_queue.get()
+
+                if not self._prepare_audio_play(
+                    report_state, sentence_type, audio_datas, text
+                ):
+                    continue
+
+                await sendAudioMessage(self.conn, sentence_type, audio_datas, text)
+
+                if self.conn.max_output_size > 0 and text:
+                    add_device_output(self.conn.headers.get("device-id"), len(text))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"audio_play_priority_task: {text} {e}")
+
+    def _prepare_audio_play(self, report_state, sentence_type, audio_datas, text):
+        """处理打断与上报，返回是否需要继续发送该音频"""
+        if self.conn.client_abort:
+            logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
+            report_state["text"], report_state["audio"] = None, []
+            return False
+
+        # 收到下一个文本开始或会话结束时进行上报
+        if sentence_type is not SentenceType.MIDDLE:
+            if self.report_on_last:
+                # 累积模式：适用于全程只有一个语音流的TTS（如seed-tts-2.0）
+                # FIRST时只记录文本，音频持续累积，仅在LAST时统一上报
+                if text:
+                    report_state["text"] = text
+                if sentence_type == SentenceType.LAST:
+                    enqueue_tts_report(
+                        self.conn, report_state["text"], report_state["audio"]
+                    )
+                    report_state["audio"] = []
+                    report_state["text"] = None
+            else:
+                # 非累积模式：每个句子分别上报
+                if report_state["text"] is not None:
+                    enqueue_tts_report(
+                        self.conn, report_state["text"], report_state["audio"]
+                    )
+                report_state["audio"] = []
+                report_state["text"] = text
+
+        # 收集上报音频数据
+        if isinstance(audio_datas, bytes):
+            report_state["audio"].append(audio_datas)
+        return True
+
     async def start_session(self, session_id):
         pass
 
@@ -7,3 +7,10 @@ class VADProviderBase(ABC):
     def is_vad(self, conn, data) -> bool:
         """检测音频数据中的语音活动"""
         pass
+
+    async def is_vad_async(self, conn, data) -> bool:
+        """
+        在事件循环中检测语音活动，返回值与is_vad一致
+        默认直接调用is_vad，支持跨连接批量推理的实现应覆盖此方法
+        """
+        return self.is_vad(conn, data)
@@ -1,14 +1,262 @@
 import time
 import os
+import queue
+import weakref
+import asyncio
+import threading
 import numpy as np
 import opuslib_next
 import onnxruntime
 from config.logger import setup_logging
 from core.providers.vad.base import VADProviderBase
+from core.inference_pool import get_inference_pool, PooledVADSession
+from core.utils.uplink_audio import frame_pcm
 
 TAG = __name__
 logger = setup_logging()
 
+# 每次推理的窗口大小（采样点）及拼接在窗口前的上下文长度
+WINDOW_SIZE = 512
+CONTEXT_SIZE = 64
+
+# 已创建的能量预判实例，供健康检查接口读取跳过比例
+_pre_gates = weakref.WeakSet()
+
+
+def _set_future_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future, error):
+    if not future.done():
+        future.set_exception(error)
+
+
+class BatchScheduler:
+    """
+    跨连接批量执行Silero推理
+    各连接提交 (输入窗口, 模型状态) 后等待结果，推理线程在max_wait_ms内收集所有连接的窗口，
+    合并为一次batch推理，再把语音概率和新的模型状态分发回各连接
+    """
+
+    def __init__(self, session, max_batch_size=256, max_wait_ms=3):
+        """
+        Args:
+            session: onnxruntime推理会话
+            max_batch_size: 单次推理的最大窗口数
+            max_wait_ms: 收到第一个窗口后最多等待的毫秒数
+        """
+        self.session = session
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._queue = queue.Queue()
+        self._sr = np.array(16000, dtype=np.int64)
+        self._stats = {"batches": 0, "windows": 0, "max_batch": 0, "infer_seconds": 0.0}
+        self._thread = threading.Thread(
+            target=self._run, name="silero-vad-batch", daemon=True
+        )
+        self._thread.start()
+
+    async def infer(self, audio_input, state):
+        """
+        提交一个窗口并等待推理结果
+
+        Args:
+            audio_input: 形状为(1, 576)的输入
+            state: 形状为(2, 1, 128)的模型状态
+
+        Returns:
+            (语音概率, 新的模型状态)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((audio_input, state, loop, future))
+        return await future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        # 等待时间已到，只取已经在队列中的窗口
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._infer(batch)
+
+    def _infer(self, batch):
+        begin_time = time.monotonic()
+        try:
+            inputs = np.concatenate([item[0] for item in batch], axis=0)
+            states = np.concatenate([item[1] for item in batch], axis=1)
+            ort_inputs = {"input": inputs, "state": states, "sr": self._sr}
+            if hasattr(self.session, "run_async"):
+                # 推理进程池：不等待本批结果，继续收集下一批，多个批次在不同进程中并行推理
+                self.session.run_async(None, ort_inputs).add_done_callback(
+                    lambda f: self._on_pool_result(batch, begin_time, f)
+                )
+                return
+            out, new_states = self.session.run(None, ort_inputs)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        self._scatter(batch, begin_time, out, new_states)
+
+    def _on_pool_result(self, batch, begin_time, future):
+        try:
+            out, new_states = future.result()
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        self._scatter(batch, begin_time, out, new_states)
+
+    @staticmethod
+    def _fail(batch, error):
+        logger.bind(tag=TAG).error(f"VAD批量推理失败: {error}")
+        for _, _, loop, future in batch:
+            loop.call_soon_threadsafe(_set_future_exception, future, error)
+
+    def _scatter(self, batch, begin_time, out, new_states):
+        probs = out.reshape(-1)
+        for i, (_, _, loop, future) in enumerate(batch):
+            result = (float(probs[i]), new_states[:, i : i + 1, :].copy())
+            loop.call_soon_threadsafe(_set_future_result, future, result)
+
+        stats = self._stats
+        stats["batches"] += 1
+        stats["windows"] += len(batch)
+        stats["max_batch"] = max(stats["max_batch"], len(batch))
+        stats["infer_seconds"] += time.monotonic() - begin_time
+
+    def get_metrics(self) -> dict:
+        stats = dict(self._stats)
+        stats["avg_batch"] = (
+            stats["windows"] / stats["batches"] if stats["batches"] else 0
+        )
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+
+class EnergyPreGate:
+    """
+    Silero推理前的能量/过零率预判
+    设备两轮对话之间大部分时间是静音，按窗口计算RMS能量和过零率，并跟踪每个连接的自适应噪声基底，
+    信号不高于噪声基底时跳过模型推理，直接按静音处理。
+    噪声基底只用模型实际判为静音的窗口更新，跳过的窗口不参与，避免基底被跳过的信号逐渐抬高
+    说话过程中（含说话结束后的拖尾窗口）始终运行模型，不影响语音检测结果
+    """
+
+    def __init__(self, gate_config: dict):
+        # 不高于噪声基底的多少倍视为静音，最大为1，即只跳过不高于噪声基底的窗口
+        self.floor_ratio = min(1.0, float(gate_config.get("floor_ratio", 1.0)))
+        # 绝对静音的RMS阈值（约-60dBFS）
+        self.min_rms = float(gate_config.get("min_rms", 0.001))
+        # 过零率高于该值时可能是清辅音，交给模型判断
+        self.zcr_threshold = float(gate_config.get("zcr_threshold", 0.3))
+        hangover_ms = float(gate_config.get("hangover_ms", 300))
+        self.hangover_windows = int(np.ceil(hangover_ms / (WINDOW_SIZE / 16)))
+        self.total_windows = 0
+        self.skipped_windows = 0
+        _pre_gates.add(self)
+
+    @staticmethod
+    def features(windows) -> list:
+        """批量计算各窗口的 (RMS能量, 过零率)"""
+        samples = windows[:, 0, CONTEXT_SIZE:]
+        rms = np.sqrt(np.mean(samples * samples, axis=1))
+        signs = np.signbit(samples)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return list(zip(rms.tolist(), zcr.tolist()))
+
+    def should_skip(self, conn, feature) -> bool:
+        self.total_windows += 1
+        # [噪声基底, 剩余拖尾窗口数]
+        gate_state = getattr(conn, "_vad_gate", None)
+        if gate_state is None:
+            gate_state = conn._vad_gate = [None, 0]
+        noise_floor, hangover = gate_state
+        if hangover > 0 or conn.client_have_voice:
+            return False
+        rms, zcr = feature
+        skip = rms < self.min_rms or (
+            noise_floor is not None
+            and rms < noise_floor * self.floor_ratio
+            and zcr < self.zcr_threshold
+        )
+        if skip:
+            self.skipped_windows += 1
+        return skip
+
+    def observe(self, conn, feature, is_voice, skipped):
+        """根据窗口的最终判断更新拖尾计数，模型判为静音的窗口同时更新噪声基底"""
+        gate_state = conn._vad_gate
+        if is_voice:
+            gate_state[1] = self.hangover_windows
+            return
+        gate_state[1] = max(0, gate_state[1] - 1)
+        if skipped:
+            return
+        rms = feature[0]
+        noise_floor = gate_state[0]
+        if noise_floor is None:
+            gate_state[0] = rms
+        elif rms < noise_floor:
+            # 噪声变小时快速跟随，变大时缓慢跟随，避免被语音抬高
+            gate_state[0] = noise_floor + 0.2 * (rms - noise_floor)
+        else:
+            gate_state[0] = noise_floor + 0.02 * (rms - noise_floor)
+
+    def get_metrics(self) -> dict:
+        return {
+            "windows": self.total_windows,
+            "skipped": self.skipped_windows,
+            "skip_ratio": (
+                self.skipped_windows / self.total_windows if self.total_windows else 0
+            ),
+        }
+
+
+def get_pre_gate_metrics() -> dict:
+    return {
+        f"pre_gate#{index}": gate.get_metrics()
+        for index, gate in enumerate(list(_pre_gates))
+    }
+
+
+# 推理线程常驻，按模型路径复用，避免重新加载VAD配置时重复创建
+_batch_schedulers = {}
+_batch_schedulers_lock = threading.Lock()
+
+
+def get_batch_scheduler(model_path, batch_config) -> BatchScheduler:
+    with _batch_schedulers_lock:
+        scheduler = _batch_schedulers.get(model_path)
+        if scheduler is None:
+            pool = get_inference_pool()
+            if pool is not None and pool.handles("vad"):
+                # 批量推理交给推理进程池
+                session = PooledVADSession(pool)
+            else:
+                opts = onnxruntime.SessionOptions()
+                opts.inter_op_num_threads = 1
+                opts.intra_op_num_threads = int(batch_config.get("threads", 2))
+                session = onnxruntime.InferenceSession(
+                    model_path, providers=["CPUExecutionProvider"], sess_options=opts
+                )
+            scheduler = BatchScheduler(
+                session,
+                max_batch_size=batch_config.get("max_batch_size", 256),
+                max_wait_ms=batch_config.get("max_wait_ms", 3),
+            )
+            _batch_schedulers[model_path] = scheduler
+        return scheduler
+
 
 class VADProvider(VADProviderBase):
     def __init__(self, config):
@@ -36,25 +284,109 @@ class VADProvider(VADProviderBase):
         )
 
         self.frame_window_threshold = 3
+        # 固定的采样率输入，避免每次推理都创建
+        self._sr = np.array(16000, dtype=np.int64)
+
+        # 跨连接批量推理，连接数较多时可显著降低单次推理的调用开销
+        batch_config = config.get("batch") or {}
+        self.batch_scheduler = None
+        if batch_config.get("enabled", False):
+            self.batch_scheduler = get_batch_scheduler(model_path, batch_config)
+
+        # 推理前的能量预判，跳过明显的静音窗口
+        gate_config = config.get("pre_gate") or {}
+        self.pre_gate = None
+        if gate_config.get("enabled", False):
+            self.pre_gate = EnergyPreGate(gate_config)
+            self._silence_state = self._compute_silence_state()
 
     def _init_connection_state(self, conn):
         """为连接初始化独立的 VAD 状态"""
-        if not hasattr(conn, "_vad_opus_decoder"):
-            conn._vad_opus_decoder = opuslib_next.Decoder(16000, 1)
         if not hasattr(conn, "_vad_state"):
             conn._vad_state = np.zeros((2, 1, 128), dtype=np.float32)
-        if not hasattr(conn, "_vad_context"):
-            conn._vad_context = np.zeros((1, 64), dtype=np.float32)
 
     def release_conn_resources(self, conn):
         """释放连接的 VAD 资源（连接关闭时调用）"""
-        for attr in ("_vad_opus_decoder", "_vad_state", "_vad_context"):
+        for attr in ("_vad_opus_decoder", "_vad_state", "_vad_gate"):
             if hasattr(conn, attr):
                 try:
                     delattr(conn, attr)
                 except Exception:
                     pass
 
+    def _prepare_windows(self, conn, opus_packet):
+        """
+        取出音频包的PCM并切分为带上下文的推理窗口
+        返回形状为(窗口数, 1, 上下文+窗口大小)的视图，逐个取出即为模型输入，下一个音频包到来时会被覆盖
+        """
+        pcm_frame = frame_pcm(opus_packet)
+        if pcm_frame is None:
+            # 未经过连接入口统一解码的音频包，使用VAD自己的解码器
+            if not hasattr(conn, "_vad_opus_decoder"):
+                conn._vad_opus_decoder = opuslib_next.Decoder(16000, 1)
+            pcm_frame = conn._vad_opus_decoder.decode(opus_packet, 960)
+        return conn.client_audio_buffer.push(pcm_frame)[:, None, :]
+
+    def _update_voice_state(self, conn, speech_prob) -> bool:
+        """根据一个窗口的语音概率更新连接的说话状态，返回当前是否有人说话"""
+        # 双阈值判断
+        if speech_prob >= self.vad_threshold:
+            is_voice = True
+        elif speech_prob <= self.vad_threshold_low:
+            is_voice = False
+        else:
+            is_voice = conn.last_is_voice
+
+        # 声音没低于最低值则延续前一个状态，判断为有声音
+        conn.last_is_voice = is_voice
+
+        # 更新滑动窗口
+        conn.client_voice_window.append(is_voice)
+        client_have_voice = (
+            conn.client_voice_window.count(True) >= self.frame_window_threshold
+        )
+
+        # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
+        if conn.client_have_voice and not client_have_voice:
+            stop_duration = time.time() * 1000 - conn.last_activity_time
+            if stop_duration >= self.silence_threshold_ms:
+                conn.client_voice_stop = True
+        if client_have_voice:
+            conn.client_have_voice = True
+            conn.last_activity_time = time.time() * 1000
+        return client_have_voice
+
+    def _gate_features(self, windows) -> list:
+        if self.pre_gate is None or len(windows) == 0:
+            return [None] * len(windows)
+        return self.pre_gate.features(windows)
+
+    def _compute_silence_state(self):
+        """
+        模型持续输入静音后收敛的RNN状态
+        跳过推理的窗口不会更新连接的状态，若保留跳过前的旧状态，静音后第一段语音的概率会明显偏低，
+        因此跳过窗口时把连接的状态替换为该静音状态（只读共享，推理不会修改输入）
+        """
+        state = np.zeros((2, 1, 128), dtype=np.float32)
+        silence = np.zeros((1, CONTEXT_SIZE + WINDOW_SIZE), dtype=np.float32)
+        for _ in range(100):
+            _, state = self.session.run(
+                None, {"input": silence, "state": state, "sr": self._sr}
+            )
+        return state
+
+    def _skip_window(self, conn, feature) -> bool:
+        if feature is None or not self.pre_gate.should_skip(conn, feature):
+            return False
+        conn._vad_state = self._silence_state
+        return True
+
+    def _finish_window(self, conn, speech_prob, feature, skipped) -> bool:
+        client_have_voice = self._update_voice_state(conn, speech_prob)
+        if feature is not None:
+            self.pre_gate.observe(conn, feature, conn.last_is_voice, skipped)
+        return client_have_voice
+
     def is_vad(self, conn, opus_packet):
         # 手动模式：直接返回True，不进行实时VAD检测，所有音频都缓存
         if conn.client_listen_mode == "manual":
@@ -63,56 +395,55 @@ class VADProvider(VADProviderBase):
         try:
             self._init_connection_state(conn)
 
-            pcm_frame = conn._vad_opus_decoder.decode(opus_packet, 960)
-            conn.client_audio_buffer.extend(pcm_frame)
-
             client_have_voice = False
-            while len(conn.client_audio_buffer) >= 512 * 2:
-                chunk = conn.client_audio_buffer[: 512 * 2]
-                conn.client_audio_buffer = conn.client_audio_buffer[512 * 2 :]
-
-                audio_int16 = np.frombuffer(chunk, dtype=np.int16)
-                audio_float32 = audio_int16.astype(np.float32) / 32768.0
-                audio_input = np.concatenate(
-                    [conn._vad_context, audio_float32.reshape(1, -1)], axis=1
-                ).astype(np.float32)
-
-                ort_inputs = {
-                    "input": audio_input,
-                    "state": conn._vad_state,
-                    "sr": np.array(16000, dtype=np.int64),
-                }
-                out, state = self.session.run(None, ort_inputs)
-
-                conn._vad_state = state
-                conn._vad_context = audio_input[:, -64:]
-                speech_prob = out.item()
-
-                # 双阈值判断
-                if speech_prob >= self.vad_threshold:
-                    is_voice = True
-                elif speech_prob <= self.vad_threshold_low:
-                    is_voice = False
+            windows = self._prepare_windows(conn, opus_packet)
+            for audio_input, feature in zip(windows, self._gate_features(windows)):
+                skipped = self._skip_window(conn, feature)
+                if skipped:
+                    speech_prob = 0.0
                 else:
-                    is_voice = conn.last_is_voice
-
-                # 声音没低于最低值则延续前一个状态，判断为有声音
-                conn.last_is_voice = is_voice
+                    ort_inputs = {
+                        "input": audio_input,
+                        "state": conn._vad_state,
+                        "sr": self._sr,
+                    }
+                    out, state = self.session.run(None, ort_inputs)
 
-                # 更新滑动窗口
-                conn.client_voice_window.append(is_voice)
-                client_have_voice = (
-                    conn.client_voice_window.count(True) >= self.frame_window_threshold
+                    conn._vad_state = state
+                    speech_prob = out.item()
+                client_have_voice = self._finish_window(
+                    conn, speech_prob, feature, skipped
                 )
 
-                # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
-                if conn.client_have_voice and not client_have_voice:
-                    stop_duration = time.time() * 1000 - conn.last_activity_time
-                    if stop_duration >= self.silence_threshold_ms:
-                        conn.client_voice_stop = True
-                if client_have_voice:
-                    conn.client_have_voice = True
-                    conn.last_activity_time = time.time() * 1000
+            return client_have_voice
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+
+    async def is_vad_async(self, conn, opus_packet):
+        if self.batch_scheduler is None:
+            return self.is_vad(conn, opus_packet)
+        if conn.client_listen_mode == "manual":
+            return True
+
+        try:
+            self._init_connection_state(conn)
+
+            client_have_voice = False
+            # 同一连接的窗口依赖上一个窗口的模型状态，需要逐个提交
+            windows = self._prepare_windows(conn, opus_packet)
+            for audio_input, feature in zip(windows, self._gate_features(windows)):
+                skipped = self._skip_window(conn, feature)
+                if skipped:
+                    speech_prob = 0.0
+                else:
+                    speech_prob, conn._vad_state = await self.batch_scheduler.infer(
+                        audio_input, conn._vad_state
+                    )
+                client_have_voice = self._finish_window(
+                    conn, speech_prob, feature, skipped
+                )
 
             return client_have_voice
         except opuslib_next.OpusError as e:
@@ -0,0 +1,259 @@
+"""
+新会话准入控制
+在创建ConnectionHandler之前检查当前负载，超过上限的连接直接走快速拒绝路径：
+回复hello、播放预先编码好的"服务繁忙"提示音后关闭连接，不会实例化ASR/TTS等组件。
+
+支持三类上限（0表示不限制）：
+1. max_active_sessions: 全进程同时存在的会话数
+2. max_sessions_per_device: 同一device-id同时存在的会话数
+3. max_initializing_sessions: 同时处于初始化阶段（拉取私有配置、实例化组件）的会话数，
+   超过时新会话最多排队 init_queue_timeout 秒等待空位，超时仍无空位则拒绝
+"""
+
+import json
+import time
+import uuid
+import asyncio
+from collections import defaultdict
+from config.logger import setup_logging
+from core.utils.util import audio_to_data
+from core.handle.sendAudioHandle import (
+    AUDIO_FRAME_DURATION,
+    PRE_BUFFER_COUNT,
+    build_mqtt_audio_packet,
+)
+
+TAG = __name__
+logger = setup_logging()
+
+# 默认提示音为1.5秒的标准忙音（480Hz+620Hz），文字显示在设备屏幕上
+DEFAULT_BUSY_AUDIO = "config/assets/busy.wav"
+DEFAULT_BUSY_TEXT = "服务器有点忙，请稍后再试"
+# 被拒绝的连接等待客户端hello消息的最长时间
+HELLO_TIMEOUT_SECONDS = 3
+
+
+class AdmissionTicket:
+    """已准入会话的凭证，会话初始化完成和结束时分别通知控制器释放对应名额"""
+
+    __slots__ = ("controller", "device_id", "initializing", "released")
+
+    def __init__(self, controller: "AdmissionController", device_id):
+        self.controller = controller
+        self.device_id = device_id
+        self.initializing = True
+        self.released = False
+
+    def mark_initialized(self):
+        """会话初始化完成，释放初始化名额，只能在事件循环线程中调用"""
+        if self.initializing and not self.released:
+            self.initializing = False
+            self.controller._on_initialized()
+
+    def release(self):
+        """会话结束，释放全部名额，只能在事件循环线程中调用"""
+        if self.released:
+            return
+        self.mark_initialized()
+        self.released = True
+        self.controller._on_released(self.device_id)
+
+
+class AdmissionController:
+    """新会话准入控制器，所有状态只在事件循环线程中修改"""
+
+    def __init__(self, config: dict):
+        """
+        Args:
+            config: 服务配置，读取其中的 server.admission 和 xiaozhi 欢迎消息
+        """
+        admission_config = config["server"].get("admission") or {}
+        self.welcome_template = config.get("xiaozhi") or {}
+        self.max_active_sessions = int(admission_config.get("max_active_sessions", 0))
+        self.max_sessions_per_device = int(
+            admission_config.get("max_sessions_per_device", 0)
+        )
+        self.max_initializing_sessions = int(
+            admission_config.get("max_initializing_sessions", 0)
+        )
+        self.init_queue_timeout = float(admission_config.get("init_queue_timeout", 3))
+        self.busy_audio = admission_config.get("busy_audio", DEFAULT_BUSY_AUDIO)
+        self.busy_text = admission_config.get("busy_text", DEFAULT_BUSY_TEXT)
+        self._busy_packets = None
+
+        self.active_sessions = 0
+        self.initializing_sessions = 0
+        self.queued_sessions = 0
+        self._device_sessions = defaultdict(int)
+        self._init_slot_released = None
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected": 0,
+            "rejected_active_limit": 0,
+            "rejected_device_limit": 0,
+            "rejected_init_timeout": 0,
+        }
+
+    async def preload(self):
+        """预先编码繁忙提示音，避免过载时再去做音频转码"""
+        if not self.busy_audio:
+            return
+        try:
+            self._busy_packets = await audio_to_data(self.busy_audio, use_cache=False)
+            logger.bind(tag=TAG).info(
+                f"繁忙提示音已加载: {self.busy_audio}，共{len(self._busy_packets)}帧"
+            )
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"加载繁忙提示音失败: {e}")
+
+    def _check_limits(self, device_id):
+        if self.max_active_sessions and self.active_sessions >= self.max_active_sessions:
+            return "rejected_active_limit"
+        if (
+            self.max_sessions_per_device
+            and device_id
+            and self._device_sessions[device_id] >= self.max_sessions_per_device
+        ):
+            return "rejected_device_limit"
+        return None
+
+    def _init_slot_available(self) -> bool:
+        return (
+            not self.max_initializing_sessions
+            or self.initializing_sessions < self.max_initializing_sessions
+        )
+
+    async def acquire(self, device_id):
+        """
+        申请会话名额
+
+        Returns:
+            AdmissionTicket: 准入成功
+            str: 拒绝原因
+        """
+        reason = self._check_limits(device_id)
+        if reason:
+            return reason
+
+        if not self._init_slot_available():
+            # 初始化名额已满，排队等待其他会话初始化完成
+            self.queued_sessions += 1
+            self._stats["queued"] += 1
+            deadline = time.monotonic() + self.init_queue_timeout
+            try:
+                while not self._init_slot_available():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return "rejected_init_timeout"
+                    if self._init_slot_released is None:
+                        self._init_slot_released = asyncio.Event()
+                    try:
+                        await asyncio.wait_for(
+                            self._init_slot_released.wait(), remaining
+                        )
+                    except asyncio.TimeoutError:
+                        return "rejected_init_timeout"
+            finally:
+                self.queued_sessions -= 1
+            # 排队期间其他上限可能已被占满
+            reason = self._check_limits(device_id)
+            if reason:
+                return reason
+
+        self.active_sessions += 1
+        self.initializing_sessions += 1
+        if device_id:
+            self._device_sessions[device_id] += 1
+        self._stats["admitted"] += 1
+        return AdmissionTicket(self, device_id)
+
+    def _on_initialized(self):
+        self.initializing_sessions -= 1
+        if self._init_slot_released is not None:
+            # 唤醒所有排队者重新检查，未抢到名额的会重新创建Event继续等待
+            self._init_slot_released.set()
+            self._init_slot_released = None
+
+    def _on_released(self, device_id):
+        self.active_sessions -= 1
+        if device_id:
+            self._device_sessions[device_id] -= 1
+            if self._device_sessions[device_id] <= 0:
+                del self._device_sessions[device_id]
+
+    async def reject(self, websocket, reason: str):
+        """快速拒绝路径：回复hello后播放繁忙提示音并关闭连接"""
+        self._stats["rejected"] += 1
+        self._stats[reason] = self._stats.get(reason, 0) + 1
+        device_id = websocket.request.headers.get("device-id")
+        logger.bind(tag=TAG).warning(
+            f"拒绝新会话 device-id={device_id}，原因: {reason}，当前活跃会话: {self.active_sessions}"
+        )
+        try:
+            await self._play_busy(websocket)
+        except Exception as e:
+            logger.bind(tag=TAG).debug(f"发送繁忙提示失败: {e}")
+        finally:
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+
+    async def _play_busy(self, websocket):
+        hello = await asyncio.wait_for(websocket.recv(), HELLO_TIMEOUT_SECONDS)
+        if isinstance(hello, bytes):
+            return
+        msg_json = json.loads(hello)
+        if not isinstance(msg_json, dict) or msg_json.get("type") != "hello":
+            return
+
+        from_mqtt_gateway = websocket.request.path.endswith("?from=mqtt_gateway")
+        session_id = str(uuid.uuid4())
+        welcome_msg = dict(self.welcome_template)
+        welcome_msg["session_id"] = session_id
+        if msg_json.get("audio_params"):
+            welcome_msg["audio_params"] = msg_json["audio_params"]
+        await websocket.send(json.dumps(welcome_msg))
+        await websocket.send(
+            json.dumps({"type": "tts", "state": "start", "session_id": session_id})
+        )
+        await websocket.send(
+            json.dumps(
+                {
+                    "type": "tts",
+                    "state": "sentence_start",
+                    "text": self.busy_text,
+                    "session_id": session_id,
+                }
+            )
+        )
+
+        # 前几帧直接发送作为预缓冲，之后按帧时长匀速发送
+        for index, packet in enumerate(self._busy_packets or []):
+            if from_mqtt_gateway:
+                packet = build_mqtt_audio_packet(
+                    packet, index * AUDIO_FRAME_DURATION, index
+                )
+            await websocket.send(packet)
+            if index >= PRE_BUFFER_COUNT:
+                await asyncio.sleep(AUDIO_FRAME_DURATION / 1000)
+        await asyncio.sleep(PRE_BUFFER_COUNT * AUDIO_FRAME_DURATION / 1000)
+
+        await websocket.send(
+            json.dumps({"type": "tts", "state": "stop", "session_id": session_id})
+        )
+
+    def get_metrics(self) -> dict:
+        """获取准入控制指标"""
+        return {
+            "active_sessions": self.active_sessions,
+            "initializing_sessions": self.initializing_sessions,
+            "queued_sessions": self.queued_sessions,
+            "limits": {
+                "max_active_sessions": self.max_active_sessions,
+                "max_sessions_per_device": self.max_sessions_per_device,
+                "max_initializing_sessions": self.max_initializing_sessions,
+            },
+            **self._stats,
+        }
@@ -20,6 +20,8 @@ class CacheType(Enum):
     DEVICE_PROMPT = "device_prompt"
     VOICEPRINT_HEALTH = "voiceprint_health"  # 声纹识别健康检查
     AUDIO_DATA = "audio_data"  # 音频数据缓存
+    SESSION_RESUME = "session_resume"  # 断线重连会话恢复
+    PRIVATE_CONFIG = "private_config"  # 智控台差异化配置
 
 
 @dataclass
@@ -62,5 +64,11 @@ class CacheConfig:
             CacheType.AUDIO_DATA: cls(
                 strategy=CacheStrategy.TTL, ttl=600, max_size=100  # 10分钟过期
             ),
+            CacheType.SESSION_RESUME: cls(
+                strategy=CacheStrategy.TTL_LRU, ttl=60, max_size=1000  # 1分钟过期
+            ),
+            CacheType.PRIVATE_CONFIG: cls(
+                strategy=CacheStrategy.TTL_LRU, ttl=60, max_size=5000  # 1分钟过期
+            ),
         }
         return configs.get(cache_type, cls())
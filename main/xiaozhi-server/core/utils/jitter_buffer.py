@@ -0,0 +1,160 @@
+"""
+MQTT网关音频抖动缓冲
+网关转发的音频包带有毫秒时间戳，经过UDP/MQTT后可能乱序、重复或丢失。
+这里用按时间戳排序的最小堆重排音频包：
+1. 音频流的第一个包和与上一个输出包连续的包立即输出，正常顺序到达时不增加延迟
+2. 出现空缺时最多等待playout_delay毫秒，超时后跳过空缺继续输出，并计入丢包
+3. 早于已输出位置的迟到包和重复包直接丢弃，保证交给VAD/ASR的音频始终有序
+4. 时间戳大幅回退时（网关重启或计数回绕）视为新的音频流
+5. 时间戳向前跳过远大于重排窗口的空缺时（两句话之间设备停止发送），视为新的音频流，
+   立即输出且不计入丢包
+"""
+
+import time
+import heapq
+
+# 客户端未声明帧长时按60ms计算
+DEFAULT_FRAME_DURATION = 60
+# 时间戳回退超过该毫秒数时视为新的音频流
+STREAM_RESET_MS = 3000
+# 时间戳向前跳过超过该毫秒数（且不少于4倍playout_delay）时视为新的音频流
+STREAM_GAP_MS = 1000
+
+
+class JitterBuffer:
+    """按时间戳重排音频包，每个连接一个实例，只在事件循环线程中使用"""
+
+    def __init__(
+        self,
+        playout_delay: int = 120,
+        frame_duration: int = DEFAULT_FRAME_DURATION,
+        max_packets: int = 50,
+    ):
+        """
+        Args:
+            playout_delay: 出现空缺时最多等待的毫秒数
+            frame_duration: 每个音频包的时长（毫秒），用于判断是否连续和估算丢包数
+            max_packets: 缓冲的最大包数，超出后不再等待空缺
+        """
+        self.playout_delay = max(0, int(playout_delay))
+        self.frame_duration = int(frame_duration or DEFAULT_FRAME_DURATION)
+        self.max_packets = max(1, int(max_packets))
+        self.stream_gap = max(STREAM_GAP_MS, 4 * self.playout_delay)
+        # (时间戳, 到达序号, 到达时间, 音频数据)，到达序号保证时间戳相同时不比较音频数据
+        self._heap = []
+        self._pending = set()
+        self._arrivals = 0
+        self._last_released = None
+        self._newest = None
+        self.stats = {
+            "received": 0,
+            "released": 0,
+            "reordered": 0,
+            "late": 0,
+            "duplicate": 0,
+            "lost": 0,
+            "resets": 0,
+            "max_depth": 0,
+        }
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, timestamp: int, data, now: float = None) -> list:
+        """
+        放入一个音频包，返回可以按顺序输出的音频数据列表
+
+        Args:
+            timestamp: 网关时间戳（毫秒）
+            data: 音频数据
+            now: 到达时间（秒），默认取当前单调时钟
+        """
+        now = time.monotonic() if now is None else now
+        stats = self.stats
+        stats["received"] += 1
+        released = []
+
+        last = self._last_released
+        if last is not None and last - timestamp > STREAM_RESET_MS:
+            # 新的音频流：先输出旧流剩余的包
+            stats["resets"] += 1
+            released.extend(self.flush())
+            self._last_released = None
+            self._newest = None
+            last = None
+
+        if timestamp in self._pending or timestamp == last:
+            stats["duplicate"] += 1
+            return released
+        if last is not None and timestamp < last:
+            stats["late"] += 1
+            return released
+        if self._newest is not None and timestamp < self._newest:
+            stats["reordered"] += 1
+        else:
+            self._newest = timestamp
+
+        self._arrivals += 1
+        heapq.heappush(self._heap, (timestamp, self._arrivals, now, data))
+        self._pending.add(timestamp)
+        if len(self._heap) > stats["max_depth"]:
+            stats["max_depth"] = len(self._heap)
+
+        released.extend(self.pop_ready(now))
+        return released
+
+    def pop_ready(self, now: float = None) -> list:
+        """输出连续的包，以及等待空缺已超过playout_delay的包"""
+        now = time.monotonic() if now is None else now
+        released = []
+        heap = self._heap
+        while heap:
+            timestamp, _, arrived_at, _ = heap[0]
+            if not (
+                self._is_next(timestamp)
+                or self._newest - timestamp >= self.playout_delay
+                or (now - arrived_at) * 1000 >= self.playout_delay
+                or len(heap) > self.max_packets
+            ):
+                break
+            released.append(self._release())
+        return released
+
+    def flush(self) -> list:
+        """按顺序输出缓冲中所有的包"""
+        released = []
+        while self._heap:
+            released.append(self._release())
+        return released
+
+    def next_deadline(self):
+        """最早一个等待中的包需要输出的时间（单调时钟秒），没有等待的包时返回None"""
+        if not self._heap:
+            return None
+        return self._heap[0][2] + self.playout_delay / 1000
+
+    def _is_next(self, timestamp) -> bool:
+        if self._last_released is None:
+            return True
+        gap = timestamp - self._last_released
+        return gap <= self.frame_duration * 1.5 or gap > self.stream_gap
+
+    def _release(self):
+        timestamp, _, _, data = heapq.heappop(self._heap)
+        self._pending.discard(timestamp)
+        if self._last_released is not None:
+            gap = timestamp - self._last_released - self.frame_duration
+            if gap > self.stream_gap - self.frame_duration:
+                # 说话间歇后的新音频流，中间没有丢包
+                self.stats["resets"] += 1
+            elif gap >= self.frame_duration / 2:
+                self.stats["lost"] += round(gap / self.frame_duration)
+        self._last_released = timestamp
+        self.stats["released"] += 1
+        return data
+
+    def reset(self):
+        self._heap.clear()
+        self._pending.clear()
+        self._last_released = None
+        self._newest = None
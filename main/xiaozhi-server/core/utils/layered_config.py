@@ -0,0 +1,36 @@
+from types import MappingProxyType
+from collections import ChainMap
+
+
+class LayeredConfig(ChainMap):
+    """
+    连接级分层配置视图：所有连接共享同一份只读的服务配置作为底层，每个连接只持有一个很小的覆盖层
+    读取时先查覆盖层再查底层，写入只落到覆盖层，因此对外保持 conn.config[...] 的访问方式不变，
+    建立连接时也不再需要对整份配置做深拷贝
+
+    注意：读取到的嵌套字典仍然是共享对象，需要修改嵌套配置时必须先通过 section() 取得本连接的副本
+    """
+
+    def __init__(self, base: dict, overrides: dict = None):
+        """
+        Args:
+            base: 服务级配置，所有连接共享，不会被修改
+            overrides: 本连接的覆盖配置
+        """
+        super().__init__(
+            overrides if overrides is not None else {}, MappingProxyType(base)
+        )
+
+    @property
+    def overrides(self) -> dict:
+        """本连接的覆盖层"""
+        return self.maps[0]
+
+    def section(self, key) -> dict:
+        """
+        获取本连接可修改的嵌套配置，首次调用时从底层浅拷贝一份到覆盖层（写时复制）
+        """
+        overrides = self.maps[0]
+        if key not in overrides:
+            overrides[key] = dict(self.maps[1].get(key) or {})
+        return overrides[key]
@@ -0,0 +1,319 @@
+"""
+全局LLM调度器
+所有连接的LLM对话任务统一在这里排队执行，提供：
+1. 全局并发上限，避免突发流量下创建大量线程同时请求上游
+2. 按设备轮询的公平调度，单个设备的连续请求不会饿死其他设备
+3. 按LLM提供方的并发上限
+4. 客户端打断时取消排队中的任务和执行中的协程任务，线程中执行的任务通过取消标记提前结束
+5. 队列深度和等待时间指标
+6. 协程任务（如原生异步的LLM对话）直接在提交方的事件循环中执行，不占用线程
+"""
+
+import time
+import asyncio
+import threading
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class _LLMJob:
+    __slots__ = (
+        "device_id",
+        "session_id",
+        "provider",
+        "fn",
+        "args",
+        "loop",
+        "future",
+        "enqueue_time",
+        "task",
+        "cancel_event",
+    )
+
+    def __init__(self, device_id, session_id, provider, fn, args, loop=None):
+        self.device_id = device_id
+        self.session_id = session_id
+        self.provider = provider
+        self.fn = fn
+        self.args = args
+        # 协程任务所在的事件循环，同步任务为None
+        self.loop = loop
+        self.future = Future()
+        self.enqueue_time = time.monotonic()
+        # 执行中的协程任务
+        self.task = None
+        # 执行中的任务被取消时置位，线程中执行的任务通过 current_job_cancelled 检查
+        self.cancel_event = threading.Event()
+
+
+# 线程池中当前正在执行的任务
+_current = threading.local()
+
+
+class LLMScheduler:
+    """全局公平LLM调度器"""
+
+    def __init__(self, max_concurrency=32, provider_limits=None, wait_samples=1000):
+        """
+        Args:
+            max_concurrency: 全局同时执行的LLM任务上限
+            provider_limits: 按LLM模块名的并发上限，例如 {"ChatGLMLLM": 8}
+            wait_samples: 用于统计等待时间分位数的样本数量
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.provider_limits = {
+            name: int(limit) for name, limit in (provider_limits or {}).items()
+        }
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="llm-scheduler"
+        )
+        self._lock = threading.Lock()
+        # device_id -> deque[_LLMJob]，OrderedDict的顺序即轮询顺序
+        self._queues = OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._running_per_provider = defaultdict(int)
+        # session_id -> 排队和执行中的任务数
+        self._session_jobs = defaultdict(int)
+        # session_id -> 执行中的任务
+        self._running_jobs = defaultdict(set)
+        self._wait_times = deque(maxlen=wait_samples)
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0}
+        self._max_wait = 0.0
+
+    def submit(self, device_id, session_id, provider, fn, *args) -> Future:
+        """
+        提交LLM任务，返回concurrent.futures.Future
+        fn为协程函数时需在事件循环线程中提交，任务将在该事件循环中执行
+        """
+        loop = asyncio.get_running_loop() if asyncio.iscoroutinefunction(fn) else None
+        job = _LLMJob(device_id or session_id, session_id, provider, fn, args, loop)
+        with self._lock:
+            self._queues.setdefault(job.device_id, deque()).append(job)
+            self._queued += 1
+            self._session_jobs[job.session_id] += 1
+            self._stats["submitted"] += 1
+        self._dispatch()
+        return job.future
+
+    def cancel(self, session_id) -> int:
+        """
+        取消某个会话的所有任务，返回取消数量：排队中的任务直接移除，
+        执行中的协程任务被取消以释放并发名额和上游请求，线程中执行的任务置位取消标记
+        """
+        cancelled = []
+        with self._lock:
+            running = list(self._running_jobs.get(session_id, ()))
+            for device_id in list(self._queues.keys()):
+                jobs = self._queues[device_id]
+                remaining = deque(job for job in jobs if job.session_id != session_id)
+                cancelled.extend(job for job in jobs if job.session_id == session_id)
+                if remaining:
+                    self._queues[device_id] = remaining
+                else:
+                    del self._queues[device_id]
+            self._queued -= len(cancelled)
+            self._stats["cancelled"] += len(cancelled)
+            if cancelled:
+                self._release_session(session_id, len(cancelled))
+        for job in cancelled:
+            job.future.cancel()
+        for job in running:
+            job.cancel_event.set()
+            if job.loop is not None:
+                try:
+                    job.loop.call_soon_threadsafe(self._cancel_task, job)
+                except RuntimeError:
+                    # 事件循环已关闭，任务随之结束
+                    pass
+        if cancelled or running:
+            logger.bind(tag=TAG).debug(
+                f"已取消会话 {session_id} 的 {len(cancelled)} 个排队LLM任务、"
+                f"{len(running)} 个执行中的LLM任务"
+            )
+        return len(cancelled) + len(running)
+
+    @staticmethod
+    def current_job_cancelled() -> bool:
+        """在线程池中执行的任务内调用，返回当前任务是否已被取消"""
+        job = getattr(_current, "job", None)
+        return job is not None and job.cancel_event.is_set()
+
+    @staticmethod
+    def _cancel_task(job: _LLMJob):
+        """在事件循环线程中取消协程任务，尚未启动的任务由 _start_coroutine 检查取消标记"""
+        if job.task is not None:
+            job.task.cancel()
+
+    def pending_jobs(self, session_id) -> int:
+        """某个会话排队和执行中的任务数"""
+        with self._lock:
+            return self._session_jobs.get(session_id, 0)
+
+    def _release_session(self, session_id, count=1):
+        """需持有锁"""
+        remaining = self._session_jobs[session_id] - count
+        if remaining > 0:
+            self._session_jobs[session_id] = remaining
+        else:
+            del self._session_jobs[session_id]
+
+    def _provider_available(self, provider) -> bool:
+        limit = self.provider_limits.get(provider)
+        return limit is None or self._running_per_provider[provider] < limit
+
+    def _pick_next(self):
+        """按设备轮询选择下一个可执行的任务，需持有锁"""
+        for device_id, jobs in self._queues.items():
+            if not self._provider_available(jobs[0].provider):
+                continue
+            job = jobs.popleft()
+            if jobs:
+                # 该设备还有任务，移到队尾，让其他设备优先
+                self._queues.move_to_end(device_id)
+            else:
+                del self._queues[device_id]
+            return job
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if self._running >= self.max_concurrency:
+                    return
+                job = self._pick_next()
+                if job is None:
+                    return
+                self._queued -= 1
+                self._running += 1
+                self._running_per_provider[job.provider] += 1
+                self._running_jobs[job.session_id].add(job)
+                wait_time = time.monotonic() - job.enqueue_time
+                self._wait_times.append(wait_time)
+                self._max_wait = max(self._max_wait, wait_time)
+            if job.loop is None:
+                self._executor.submit(self._run, job)
+                continue
+            try:
+                job.loop.call_soon_threadsafe(self._start_coroutine, job)
+            except RuntimeError:
+                # 事件循环已关闭，连接已经不存在
+                job.future.cancel()
+                self._finish(job, "cancelled")
+
+    def _run(self, job: _LLMJob):
+        outcome = "cancelled"
+        try:
+            if job.future.set_running_or_notify_cancel():
+                _current.job = job
+                try:
+                    result = job.fn(*job.args)
+                    outcome = "cancelled" if job.cancel_event.is_set() else "completed"
+                    job.future.set_result(result)
+                except BaseException as e:
+                    outcome = "failed"
+                    logger.bind(tag=TAG).error(f"LLM任务执行失败: {e}")
+                    job.future.set_exception(e)
+                finally:
+                    _current.job = None
+        finally:
+            self._finish(job, outcome)
+
+    def _start_coroutine(self, job: _LLMJob):
+        """在事件循环线程中启动协程任务，任务结束前一直占用并发名额"""
+        if job.cancel_event.is_set():
+            job.future.cancel()
+        if not job.future.set_running_or_notify_cancel():
+            self._finish(job, "cancelled")
+            return
+        job.task = job.loop.create_task(job.fn(*job.args))
+        job.task.add_done_callback(lambda t: self._on_coroutine_done(job, t))
+
+    def _on_coroutine_done(self, job: _LLMJob, task: asyncio.Task):
+        if task.cancelled():
+            outcome = "cancelled"
+            job.future.set_exception(asyncio.CancelledError())
+        elif task.exception() is not None:
+            outcome = "failed"
+            logger.bind(tag=TAG).error(f"LLM任务执行失败: {task.exception()}")
+            job.future.set_exception(task.exception())
+        else:
+            outcome = "completed"
+            job.future.set_result(task.result())
+        self._finish(job, outcome)
+
+    def _finish(self, job: _LLMJob, outcome: str):
+        with self._lock:
+            self._running -= 1
+            self._running_per_provider[job.provider] -= 1
+            self._release_session(job.session_id)
+            running = self._running_jobs[job.session_id]
+            running.discard(job)
+            if not running:
+                del self._running_jobs[job.session_id]
+            self._stats[outcome] += 1
+        self._dispatch()
+
+    def get_metrics(self) -> dict:
+        """获取调度器指标，用于容量评估"""
+        with self._lock:
+            waits = sorted(self._wait_times)
+            per_device_depth = {d: len(jobs) for d, jobs in self._queues.items()}
+            running_per_provider = {
+                p: n for p, n in self._running_per_provider.items() if n > 0
+            }
+            stats = dict(self._stats)
+            queued, running = self._queued, self._running
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(len(waits) * p))]
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": running,
+            "queue_depth": queued,
+            "queued_devices": len(per_device_depth),
+            "max_device_queue_depth": max(per_device_depth.values(), default=0),
+            "running_per_provider": running_per_provider,
+            "wait_ms": {
+                "avg": sum(waits) / len(waits) * 1000 if waits else 0.0,
+                "p50": percentile(0.5) * 1000,
+                "p95": percentile(0.95) * 1000,
+                "p99": percentile(0.99) * 1000,
+                "max": self._max_wait * 1000,
+            },
+            **stats,
+        }
+
+
+# 全局单例
+_llm_scheduler_instance = None
+_llm_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler(scheduler_config=None) -> LLMScheduler:
+    """
+    获取全局LLM调度器实例（单例模式），首次调用时按配置创建
+
+    Args:
+        scheduler_config: server.llm_scheduler 配置
+    """
+    global _llm_scheduler_instance
+    if _llm_scheduler_instance is None:
+        with _llm_scheduler_lock:
+            if _llm_scheduler_instance is None:
+                scheduler_config = scheduler_config or {}
+                _llm_scheduler_instance = LLMScheduler(
+                    max_concurrency=scheduler_config.get("max_concurrency", 32),
+                    provider_limits=scheduler_config.get("provider_limits", {}),
+                )
+                logger.bind(tag=TAG).info(
+                    f"LLM调度器已创建，全局并发上限: {_llm_scheduler_instance.max_concurrency}"
+                )
+    return _llm_scheduler_instance
@@ -0,0 +1,73 @@
+import queue
+import asyncio
+import threading
+
+
+class LoopQueue:
+    """
+    绑定到事件循环的队列，用于asyncio会话流水线
+    对外保持与queue.Queue一致的put/get_nowait/qsize接口，生产者可以在任意线程调用put，
+    消费者在事件循环中通过 await get() 获取数据，不再需要为每个阶段单独启动线程
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        """
+        Args:
+            loop: 消费者所在的事件循环
+        """
+        self.loop = loop
+        self._queue = asyncio.Queue()
+        self._loop_thread_id = None
+
+    @classmethod
+    def from_queue(cls, old_queue, loop: asyncio.AbstractEventLoop) -> "LoopQueue":
+        """从已有的queue.Queue迁移数据，保证切换前已入队的消息不丢失且顺序不变"""
+        new_queue = cls(loop)
+        if old_queue is None:
+            return new_queue
+        while True:
+            try:
+                new_queue._queue.put_nowait(old_queue.get_nowait())
+            except queue.Empty:
+                break
+        return new_queue
+
+    def _in_loop_thread(self) -> bool:
+        if self._loop_thread_id is None:
+            try:
+                if asyncio.get_running_loop() is self.loop:
+                    self._loop_thread_id = threading.get_ident()
+            except RuntimeError:
+                return False
+        return self._loop_thread_id == threading.get_ident()
+
+    def put(self, item, block=True, timeout=None):
+        """线程安全的入队，签名与queue.Queue.put兼容"""
+        if self._in_loop_thread():
+            self._queue.put_nowait(item)
+        elif not self.loop.is_closed():
+            # 通过call_soon_threadsafe按调用顺序入队，保持与原线程模式相同的先后顺序
+            self.loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    def put_nowait(self, item):
+        self.put(item)
+
+    async def get(self):
+        """在事件循环中等待并获取下一条消息"""
+        return await self._queue.get()
+
+    def get_nowait(self):
+        """非阻塞获取，队列为空时抛出queue.Empty，兼容clear_queues等清理逻辑"""
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            raise queue.Empty
+
+    def task_done(self):
+        pass
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def empty(self) -> bool:
+        return self._queue.empty()
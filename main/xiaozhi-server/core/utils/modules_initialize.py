@@ -1,6 +1,7 @@
 from typing import Dict, Any
 from config.logger import setup_logging
 from core.utils import tts, llm, intent, memory, vad, asr
+from core.inference_pool import get_inference_pool
 
 TAG = __name__
 logger = setup_logging()
@@ -115,18 +116,38 @@ def initialize_tts(config):
 
 def initialize_asr(config):
     select_asr_module = config["selected_module"]["ASR"]
-    asr_type = (
-        select_asr_module
-        if "type" not in config["ASR"][select_asr_module]
-        else config["ASR"][select_asr_module]["type"]
-    )
-    new_asr = asr.create_instance(
+    asr_config = config["ASR"][select_asr_module]
+    asr_type = asr_config.get("type", select_asr_module)
+    if asr_type == "hedged":
+        # 组合ASR：按providers顺序创建成员，首选超时未返回时对冲到下一个
+        from core.providers.asr.hedged import HedgedASRProvider
+
+        members = {
+            name: _create_asr(config, name) for name in asr_config.get("providers", [])
+        }
+        new_asr = HedgedASRProvider(asr_config, members)
+        logger.bind(tag=TAG).info(f"组合ASR初始化完成: {', '.join(members)}")
+        return new_asr
+    new_asr = _create_asr(config, select_asr_module)
+    logger.bind(tag=TAG).info("ASR模块初始化完成")
+    return new_asr
+
+
+def _create_asr(config, asr_module):
+    asr_config = config["ASR"][asr_module]
+    asr_type = asr_config.get("type", asr_module)
+    # 推理进程池中已加载相同的本地ASR时，服务进程不再加载模型
+    pool = get_inference_pool()
+    if pool is not None and pool.handles_asr(asr_type, asr_config):
+        from core.providers.asr.pooled import PooledASRProvider
+
+        logger.bind(tag=TAG).info(f"ASR模块使用推理进程池: {asr_type}")
+        return PooledASRProvider(pool, asr_type)
+    return asr.create_instance(
         asr_type,
-        config["ASR"][select_asr_module],
+        asr_config,
         str(config.get("delete_audio", True)).lower() in ("true", "1", "yes"),
     )
-    logger.bind(tag=TAG).info("ASR模块初始化完成")
-    return new_asr
 
 
 def initialize_voiceprint(asr_instance, config):
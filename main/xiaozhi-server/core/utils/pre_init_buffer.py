@@ -0,0 +1,70 @@
+"""
+连接初始化阶段的消息缓冲
+设备唤醒后会立即发送hello、listen和音频，此时差异化配置和VAD/ASR可能还没有准备好。
+初始化完成前收到的消息按到达顺序暂存，其中音频按时长计算上限，超出后丢弃最早的音频，
+初始化完成后再按原顺序交给正常流程处理，接收循环不会因此阻塞
+"""
+
+from collections import deque
+
+# 客户端未声明帧长时按60ms计算
+DEFAULT_FRAME_DURATION = 60
+
+
+class PreInitBuffer:
+    """按到达顺序保存初始化完成前的消息，音频部分有时长上限"""
+
+    def __init__(self, max_audio_ms: int = 3000):
+        """
+        Args:
+            max_audio_ms: 最多缓存的音频时长（毫秒），0表示不缓存音频
+        """
+        self.max_audio_ms = max(0, int(max_audio_ms))
+        # (消息, 音频时长ms)，文本消息的时长为0
+        self._items = deque()
+        self.audio_ms = 0
+        self.dropped_audio_ms = 0
+        self.buffered_count = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def push_text(self, message):
+        self._items.append((message, 0))
+        self.buffered_count += 1
+
+    def push_audio(self, message, duration_ms=DEFAULT_FRAME_DURATION):
+        duration_ms = duration_ms or DEFAULT_FRAME_DURATION
+        if duration_ms > self.max_audio_ms:
+            self.dropped_audio_ms += duration_ms
+            return
+        self._items.append((message, duration_ms))
+        self.audio_ms += duration_ms
+        self.buffered_count += 1
+        if self.audio_ms > self.max_audio_ms:
+            self._drop_oldest_audio()
+
+    def _drop_oldest_audio(self):
+        """丢弃最早的音频直到不超过上限，文本消息保留"""
+        kept = deque()
+        while self._items and self.audio_ms > self.max_audio_ms:
+            message, duration_ms = self._items.popleft()
+            if duration_ms:
+                self.audio_ms -= duration_ms
+                self.dropped_audio_ms += duration_ms
+            else:
+                kept.append((message, duration_ms))
+        kept.extend(self._items)
+        self._items = kept
+
+    def peek(self):
+        return self._items[0][0]
+
+    def popleft(self):
+        message, duration_ms = self._items.popleft()
+        self.audio_ms -= duration_ms
+        return message
+
+    def clear(self):
+        self._items.clear()
+        self.audio_ms = 0
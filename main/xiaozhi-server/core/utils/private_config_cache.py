@@ -0,0 +1,149 @@
+"""
+智控台差异化配置缓存
+设备建立连接时需要先从智控台拉取差异化配置，服务重启后大量设备同时重连会集中请求智控台。
+这里按device-id和client-id缓存配置：
+1. ttl秒内直接使用缓存
+2. 超过ttl但未超过stale_ttl时，先返回旧配置，同时在后台刷新
+3. 同一设备并发的相同请求合并为一次HTTP调用
+4. 智控台下发update_config时清空缓存
+绑定异常、设备不存在等错误不会被缓存，设备完成绑定后下次连接即可拿到新配置
+"""
+
+import copy
+import time
+import asyncio
+import threading
+from config.logger import setup_logging
+from config.config_loader import get_private_config_from_api
+from core.utils.cache.manager import cache_manager
+from core.utils.cache.config import CacheType
+
+TAG = __name__
+logger = setup_logging()
+
+
+class _CachedConfig:
+    __slots__ = ("config", "fetched_at")
+
+    def __init__(self, config):
+        self.config = config
+        self.fetched_at = time.time()
+
+
+class PrivateConfigCache:
+    """差异化配置缓存，只能在事件循环线程中使用"""
+
+    def __init__(self, cache_config: dict = None):
+        """
+        Args:
+            cache_config: server.private_config_cache 配置
+        """
+        cache_config = cache_config or {}
+        self.enabled = bool(cache_config.get("enabled", True))
+        self.ttl = float(cache_config.get("ttl", 10))
+        self.stale_ttl = max(self.ttl, float(cache_config.get("stale_ttl", 60)))
+        # key -> 进行中的请求
+        self._inflight = {}
+        # 缓存被清空后递增，清空前发出的请求结果不再写入缓存
+        self._generation = 0
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "fetches": 0,
+            "fetch_errors": 0,
+        }
+
+    async def get(self, config, device_id, client_id) -> dict:
+        """获取设备的差异化配置，返回的字典可由调用方自由修改"""
+        if not self.enabled:
+            return await get_private_config_from_api(config, device_id, client_id)
+
+        key = f"{device_id}|{client_id}"
+        cached = cache_manager.get(CacheType.PRIVATE_CONFIG, key)
+        if cached is not None:
+            if time.time() - cached.fetched_at < self.ttl:
+                self._stats["hits"] += 1
+            else:
+                # 已过期但仍可使用：先返回旧配置，后台刷新
+                self._stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._fetch(config, key, device_id, client_id)
+            return copy.deepcopy(cached.config)
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._stats["misses"] += 1
+            task = self._fetch(config, key, device_id, client_id)
+        else:
+            self._stats["coalesced"] += 1
+        # shield避免某个等待方被取消时中断其他等待方共享的请求
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def _fetch(self, config, key, device_id, client_id) -> asyncio.Task:
+        generation = self._generation
+        self._stats["fetches"] += 1
+
+        async def fetch():
+            try:
+                result = await get_private_config_from_api(config, device_id, client_id)
+                if generation == self._generation:
+                    cache_manager.set(
+                        CacheType.PRIVATE_CONFIG,
+                        key,
+                        _CachedConfig(result),
+                        ttl=self.stale_ttl,
+                    )
+                return result
+            finally:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+
+        task = asyncio.create_task(fetch())
+        task.add_done_callback(self._on_fetch_done)
+        self._inflight[key] = task
+        return task
+
+    def _on_fetch_done(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            # 后台刷新失败时继续使用旧配置，等待方会各自收到该异常
+            self._stats["fetch_errors"] += 1
+            logger.bind(tag=TAG).debug(f"拉取差异化配置失败: {error}")
+
+    def invalidate(self):
+        """清空所有缓存，智控台配置更新后调用"""
+        self._generation += 1
+        cache_manager.clear(CacheType.PRIVATE_CONFIG)
+        logger.bind(tag=TAG).info("差异化配置缓存已清空")
+
+    def get_metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "inflight": len(self._inflight),
+            **self._stats,
+        }
+
+
+# 全局单例
+_private_config_cache_instance = None
+_private_config_cache_lock = threading.Lock()
+
+
+def get_private_config_cache(cache_config=None) -> PrivateConfigCache:
+    """
+    获取全局差异化配置缓存实例（单例模式），首次调用时按配置创建
+
+    Args:
+        cache_config: server.private_config_cache 配置
+    """
+    global _private_config_cache_instance
+    if _private_config_cache_instance is None:
+        with _private_config_cache_lock:
+            if _private_config_cache_instance is None:
+                _private_config_cache_instance = PrivateConfigCache(cache_config)
+    return _private_config_cache_instance
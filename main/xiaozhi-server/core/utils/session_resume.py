@@ -0,0 +1,165 @@
+"""
+断线重连会话恢复
+设备断开后按device-id短暂保留会话快照（私有配置、LLM/记忆/意图实例、增强提示词、工具列表和最近的对话），
+在有效期内重新连接时跳过拉取配置、构建提示词和初始化记忆等冷启动流程，并延续之前的对话。
+连接独有的记忆实例在保存快照时不立即保存记忆，尚未保存的对话随快照交给重连后的会话，
+快照到期未被使用时才保存，避免同一个记忆实例被两个会话同时写入、旧对话被重复保存；
+服务共用的记忆实例会被之后的连接重新初始化，关闭时立即保存，快照只记录已保存的消息
+"""
+
+import time
+import asyncio
+from typing import Optional
+from config.logger import setup_logging
+from core.utils.dialogue import Dialogue
+from core.utils.cache.manager import cache_manager
+from core.utils.cache.config import CacheType
+
+TAG = __name__
+logger = setup_logging()
+
+# 尚未被重连取走的快照 -> (到期定时器, device_id, 到期回调)
+_pending = {}
+
+
+class SessionSnapshot:
+    """断开连接时保存的会话快照"""
+
+    __slots__ = (
+        "private_config",
+        "modules",
+        "prompt",
+        "dialogue",
+        "functions",
+        "pending_memory",
+        "saved_memory_ids",
+        "claimed",
+        "saved_at",
+    )
+
+    def __init__(
+        self,
+        private_config,
+        modules,
+        prompt,
+        dialogue,
+        functions,
+        pending_memory,
+        saved_memory_ids,
+    ):
+        self.private_config = private_config
+        self.modules = modules
+        self.prompt = prompt
+        self.dialogue = dialogue
+        self.functions = functions
+        # 尚未保存到记忆的完整对话
+        self.pending_memory = pending_memory
+        # 关闭时已经保存到记忆的消息，重连后不再重复保存
+        self.saved_memory_ids = saved_memory_ids
+        self.claimed = False
+        self.saved_at = time.time()
+
+
+class SessionResumeCache:
+    """按device-id保存会话快照，基于全局缓存管理器实现TTL过期和数量上限"""
+
+    def __init__(self, resume_config: dict = None):
+        """
+        Args:
+            resume_config: server.session_resume 配置
+        """
+        resume_config = resume_config or {}
+        self.enabled = bool(resume_config.get("enabled", False))
+        self.ttl = float(resume_config.get("ttl", 60))
+        self.max_turns = int(resume_config.get("max_turns", 10))
+
+    def save(self, conn, on_expire=None) -> bool:
+        """
+        保存连接的会话快照，返回是否保存成功
+        on_expire(snapshot) 在快照到期仍未被重连取走时调用，用于保存 pending_memory；
+        不传时表示记忆已在关闭时保存，pending_memory 为空
+        """
+        if not self.enabled or not conn.device_id or conn.need_bind:
+            return False
+        # 用户主动结束对话的会话不再恢复
+        if conn.close_after_chat:
+            return False
+
+        # 复制一份对话，避免与关闭时的记忆保存互相影响
+        dialogue = Dialogue()
+        dialogue.dialogue = [
+            message for message in conn.dialogue.dialogue if not message.is_temporary
+        ]
+        dialogue.trim_history(self.max_turns)
+
+        functions = None
+        if conn.func_handler and conn.func_handler.finish_init:
+            functions = conn.func_handler.get_functions()
+
+        messages = list(conn.memory_messages())
+        if on_expire is not None:
+            pending_memory, saved_memory_ids = messages, set()
+        else:
+            pending_memory = []
+            saved_memory_ids = conn.memory_saved_ids | {
+                message.uniq_id for message in messages
+            }
+        snapshot = SessionSnapshot(
+            private_config=conn.private_config,
+            modules=dict(conn.private_modules),
+            prompt=conn.prompt,
+            dialogue=dialogue,
+            functions=functions,
+            pending_memory=pending_memory,
+            saved_memory_ids=saved_memory_ids,
+        )
+        cache_manager.set(
+            CacheType.SESSION_RESUME, conn.device_id, snapshot, ttl=self.ttl
+        )
+        if on_expire is not None:
+            handle = asyncio.get_running_loop().call_later(self.ttl, _expire, snapshot)
+            _pending[snapshot] = (handle, conn.device_id, on_expire)
+        logger.bind(tag=TAG).debug(
+            f"已保存设备 {conn.device_id} 的会话快照，对话消息数: {len(dialogue.dialogue)}"
+        )
+        return True
+
+    def take(self, device_id) -> Optional[SessionSnapshot]:
+        """取出设备的会话快照，快照中的模块实例只能被一个连接使用，取出后即删除"""
+        if not self.enabled or not device_id:
+            return None
+        snapshot = cache_manager.get(CacheType.SESSION_RESUME, device_id)
+        if snapshot is not None:
+            cache_manager.delete(CacheType.SESSION_RESUME, device_id)
+            snapshot.claimed = True
+            pending = _pending.pop(snapshot, None)
+            if pending is not None:
+                pending[0].cancel()
+        return snapshot
+
+    @staticmethod
+    def clear():
+        """清空所有会话快照，服务配置更新后调用"""
+        cache_manager.clear(CacheType.SESSION_RESUME)
+
+
+def _expire(snapshot: SessionSnapshot):
+    """快照到期未被取走（含被淘汰或清空的情况），交给回调保存其中的对话"""
+    pending = _pending.pop(snapshot, None)
+    if pending is None or snapshot.claimed:
+        return
+    handle, device_id, on_expire = pending
+    handle.cancel()
+    if cache_manager.get(CacheType.SESSION_RESUME, device_id) is snapshot:
+        cache_manager.delete(CacheType.SESSION_RESUME, device_id)
+    snapshot.claimed = True
+    try:
+        on_expire(snapshot)
+    except Exception as e:
+        logger.bind(tag=TAG).error(f"会话快照到期保存记忆失败: {e}")
+
+
+def flush_pending_snapshots():
+    """服务下线前立即处理所有未被取走的快照，避免其中的对话来不及保存到记忆"""
+    for snapshot in list(_pending):
+        _expire(snapshot)
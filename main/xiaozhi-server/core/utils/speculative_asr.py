@@ -0,0 +1,251 @@
+"""
+推测式ASR
+自动模式下，说话结束后要静音满VAD的min_silence_duration_ms（默认1秒）才开始识别。
+开启后，静音达到较短的provisional_silence_ms时就用已收到的音频在后台先行识别（可选同时进行意图识别）：
+1. 静音期间用户继续说话，取消后台识别，记为一次未命中
+2. 静音达到正式阈值，直接使用后台识别的结果，记为一次命中
+两次判定之间收到的只有静音，因此先行识别的音频与正式识别的音频内容一致
+"""
+
+import json
+import time
+import asyncio
+import threading
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class SpeculationStats:
+    """所有连接共用的推测识别统计，用于调整静音阈值"""
+
+    def __init__(self):
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.failed = 0
+        self.intent_hits = 0
+        # 未命中的推测识别消耗的时间，含被丢弃的意图识别
+        self.wasted_seconds = 0.0
+        # 被丢弃的推测意图识别消耗的时间（LLM调用在线程中执行，取消后仍会运行到结束）
+        self.wasted_intent_seconds = 0.0
+        # 命中时相比正式阈值提前完成识别的时间
+        self.saved_seconds = 0.0
+
+    def get_metrics(self) -> dict:
+        finished = self.hits + self.misses
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failed": self.failed,
+            "intent_hits": self.intent_hits,
+            "hit_ratio": self.hits / finished if finished else 0,
+            "wasted_seconds": round(self.wasted_seconds, 3),
+            "wasted_intent_seconds": round(self.wasted_intent_seconds, 3),
+            "avg_saved_ms": (
+                round(self.saved_seconds / self.hits * 1000, 1) if self.hits else 0
+            ),
+        }
+
+
+_stats = SpeculationStats()
+
+
+def get_speculation_stats() -> SpeculationStats:
+    return _stats
+
+
+class _Speculation:
+    """一次后台识别"""
+
+    def __init__(self, task):
+        self.task = task
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, _):
+        self.finished_at = time.monotonic()
+
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+class _IntentSpeculation:
+    """
+    一次推测意图识别
+    意图识别是线程中的同步LLM调用，取消协程无法中止它，
+    被丢弃时按线程实际运行的时间计入浪费的算力
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.task = None
+        self.started_at = None
+        self.finished_at = None
+        self.discarded = False
+        self._lock = threading.Lock()
+
+    def start(self, conn):
+        self.task = asyncio.create_task(asyncio.to_thread(self._run, conn))
+
+    def _run(self, conn):
+        dialogue = list(conn.dialogue.dialogue)
+        self.started_at = time.monotonic()
+        try:
+            return asyncio.run(conn.intent.detect_intent(conn, dialogue, self.text))
+        finally:
+            with self._lock:
+                self.finished_at = time.monotonic()
+                if self.discarded:
+                    self._count_wasted()
+
+    def discard(self):
+        self.task.cancel()
+        with self._lock:
+            if self.discarded:
+                return
+            self.discarded = True
+            if self.finished_at is not None:
+                self._count_wasted()
+
+    def _count_wasted(self):
+        """需持有锁"""
+        elapsed = self.finished_at - self.started_at
+        _stats.wasted_seconds += elapsed
+        _stats.wasted_intent_seconds += elapsed
+
+
+class SpeculativeASR:
+    """每个连接一个实例，只能在事件循环线程中使用"""
+
+    def __init__(self, speculative_config: dict = None):
+        """
+        Args:
+            speculative_config: server.speculative_asr 配置
+        """
+        speculative_config = speculative_config or {}
+        self.enabled = bool(speculative_config.get("enabled", False))
+        self.provisional_silence_ms = int(
+            speculative_config.get("provisional_silence_ms", 300)
+        )
+        self.speculate_intent = bool(speculative_config.get("speculate_intent", True))
+        self._current = None
+        # 进行中的推测意图识别
+        self._intent = None
+
+    def on_audio(self, conn, audio_have_voice, recognize):
+        """
+        每个音频包调用一次，静音达到临时阈值时启动后台识别，重新检测到说话时取消
+        Args:
+            recognize: 接收音频帧列表、返回识别协程的函数
+        """
+        if not self.enabled:
+            return
+        if audio_have_voice:
+            if self._current is not None:
+                self.cancel()
+            return
+        if (
+            self._current is not None
+            or not conn.client_have_voice
+            or conn.client_voice_stop
+            or conn.client_listen_mode == "manual"
+        ):
+            return
+        # 临时阈值不小于正式阈值时推测没有意义
+        if self.provisional_silence_ms >= getattr(
+            conn.vad, "silence_threshold_ms", 0
+        ):
+            return
+        silence_ms = time.time() * 1000 - conn.last_activity_time
+        if silence_ms < self.provisional_silence_ms or len(conn.asr_audio) <= 15:
+            return
+        self._discard_intent()
+        task = asyncio.create_task(self._run(conn, recognize(conn.asr_audio.copy())))
+        self._current = _Speculation(task)
+        _stats.started += 1
+        logger.bind(tag=TAG).debug(f"静音{silence_ms:.0f}ms，开始推测识别")
+
+    async def _run(self, conn, recognize_coro):
+        result = await recognize_coro
+        enhanced_text, text_len = result
+        if (
+            text_len > 0
+            and self.speculate_intent
+            and conn.intent_type == "intent_llm"
+            and conn.intent
+        ):
+            # 意图识别内部是同步的LLM调用，放到线程中执行，避免推测期间阻塞音频处理
+            self._intent = _IntentSpeculation(_content_of(enhanced_text))
+            self._intent.start(conn)
+        return result
+
+    def take(self):
+        """取出当前的后台识别，交给commit使用"""
+        speculation, self._current = self._current, None
+        return speculation
+
+    async def commit(self, speculation):
+        """
+        等待后台识别完成并返回 (enhanced_text, text_len)，识别失败时返回None
+        """
+        commit_at = time.monotonic()
+        try:
+            result = await speculation.task
+        except asyncio.CancelledError:
+            if not speculation.task.cancelled():
+                raise
+            return None
+        except Exception as e:
+            _stats.failed += 1
+            logger.bind(tag=TAG).warning(f"推测识别失败，重新识别: {e}")
+            return None
+        _stats.hits += 1
+        _stats.saved_seconds += (
+            min(commit_at, speculation.finished_at) - speculation.started_at
+        )
+        return result
+
+    def take_intent(self, text):
+        """取出与文本对应的推测意图识别任务，没有时返回None"""
+        if self._intent is None:
+            return None
+        intent, self._intent = self._intent, None
+        if intent.text != text:
+            intent.discard()
+            return None
+        _stats.intent_hits += 1
+        return intent.task
+
+    def cancel(self):
+        """丢弃进行中的后台识别"""
+        speculation = self.take()
+        if speculation is None:
+            return
+        speculation.task.cancel()
+        self._discard_intent()
+        _stats.misses += 1
+        _stats.wasted_seconds += speculation.elapsed()
+        logger.bind(tag=TAG).debug("用户继续说话，取消推测识别")
+
+    def _discard_intent(self):
+        if self._intent is not None:
+            self._intent.discard()
+            self._intent = None
+
+
+def _content_of(enhanced_text):
+    """与意图识别一致，从带说话人信息的JSON中取出文本内容"""
+    try:
+        if enhanced_text.strip().startswith("{") and enhanced_text.strip().endswith(
+            "}"
+        ):
+            data = json.loads(enhanced_text)
+            if isinstance(data, dict) and "content" in data:
+                return data["content"]
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return enhanced_text
@@ -0,0 +1,58 @@
+"""
+上行音频统一解码
+设备上传的每个Opus包只在进入连接时解码一次，解码结果随音频包一起传递，
+VAD、ASR（含流式ASR）、声纹识别和聊天记录上报直接使用其中的PCM，不再各自重复解码
+"""
+
+import time
+import opuslib_next
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 16kHz单声道，每包最多60ms
+SAMPLE_RATE = 16000
+FRAME_SIZE = 960
+
+
+class UplinkFrame(bytes):
+    """
+    上行音频包，内容仍是原始的Opus数据，可以像bytes一样使用，
+    pcm属性为解码后的16位PCM，解码失败时为空
+    """
+
+    pcm = None
+
+
+def frame_pcm(packet):
+    """返回音频包已解码的PCM，未经过UplinkDecoder的数据返回None"""
+    return getattr(packet, "pcm", None)
+
+
+class UplinkDecoder:
+    """每个连接一个实例，按到达顺序解码设备上传的音频包"""
+
+    def __init__(self):
+        self._decoder = None
+        self.decoded_packets = 0
+        self.decode_seconds = 0.0
+
+    def decode(self, packet: bytes, audio_format: str = "opus") -> UplinkFrame:
+        if isinstance(packet, UplinkFrame):
+            return packet
+        frame = UplinkFrame(packet)
+        if audio_format == "pcm":
+            frame.pcm = packet
+            return frame
+        if self._decoder is None:
+            self._decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+        begin_time = time.perf_counter()
+        try:
+            frame.pcm = self._decoder.decode(packet, FRAME_SIZE) if packet else b""
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+            frame.pcm = b""
+        self.decode_seconds += time.perf_counter() - begin_time
+        self.decoded_packets += 1
+        return frame
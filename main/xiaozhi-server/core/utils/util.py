@@ -2,6 +2,7 @@ import re
 import os
 import json
 import copy
+import time
 import wave
 import socket
 import asyncio
@@ -606,4 +607,12 @@ def get_system_error_response(config: dict) -> str:
     Returns:
         str: 系统错误时的回复
     """
-    return config.get("system_error_response", "主人，小智现在有点忙，我们稍后再试吧。")
\ No newline at end of file
+    return config.get("system_error_response", "主人，小智现在有点忙，我们稍后再试吧。")
+
+
+def join_threads(threads, timeout: float) -> list:
+    """在总超时时间内等待多个线程退出，返回超时后仍存活的线程"""
+    deadline = time.time() + timeout
+    for thread in threads:
+        thread.join(max(0, deadline - time.time()))
+    return [thread for thread in threads if thread.is_alive()]
@@ -0,0 +1,124 @@
+"""
+VAD分帧
+设备音频包的长度与VAD推理窗口不一致，需要先缓存再按固定窗口切分。
+这里使用预分配的float32缓冲区和输入张量，采样在写入时一次性转换，
+切分窗口时不再重建缓冲区或创建新的数组，滑动窗口中的有声帧数也改为增量维护
+"""
+
+import numpy as np
+
+# int16转为[-1, 1)的float32，2的幂次，与除以32768的结果完全一致
+INT16_SCALE = np.float32(1 / 32768)
+
+
+class VADFramer:
+    """每个连接一个实例，把PCM切分为带上下文的推理窗口"""
+
+    def __init__(self, window_size=512, context_size=64, capacity=16000):
+        """
+        Args:
+            window_size: 每个窗口的采样点数
+            context_size: 拼接在窗口前的上一窗口末尾采样点数
+            capacity: 缓冲区的初始采样点数，写满后把未切分的部分移回开头，仍不足时扩容
+        """
+        self.window_size = window_size
+        self.context_size = context_size
+        # 读位置之前的context_size个采样即为下一个窗口的上下文，初始为静音
+        self._buffer = np.zeros(
+            max(capacity, context_size + window_size), dtype=np.float32
+        )
+        self._read = context_size
+        self._write = context_size
+        # 每行为一个窗口：[上下文 | 窗口采样]
+        self._inputs = np.zeros((2, context_size + window_size), dtype=np.float32)
+
+    def __len__(self):
+        """尚未切分的字节数"""
+        return (self._write - self._read) * 2
+
+    def clear(self):
+        """丢弃尚未切分的采样，上下文保留"""
+        context_size = self.context_size
+        self._buffer[self._write - context_size : self._write] = self._buffer[
+            self._read - context_size : self._read
+        ].copy()
+        self._read = self._write
+
+    def push(self, pcm: bytes) -> np.ndarray:
+        """
+        写入一段16位PCM，返回本次可以推理的窗口，形状为(窗口数, 上下文+窗口大小)
+        返回值是内部张量的视图，下一次push时会被覆盖
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        size = len(samples)
+        if self._write + size > len(self._buffer):
+            self._compact(size)
+        np.multiply(
+            samples,
+            INT16_SCALE,
+            out=self._buffer[self._write : self._write + size],
+            dtype=np.float32,
+        )
+        self._write += size
+
+        window_size = self.window_size
+        count = (self._write - self._read) // window_size
+        if count > len(self._inputs):
+            self._inputs = np.zeros(
+                (count, self.context_size + window_size), dtype=np.float32
+            )
+        start = self._read - self.context_size
+        row_size = self.context_size + window_size
+        for i in range(count):
+            offset = start + i * window_size
+            self._inputs[i] = self._buffer[offset : offset + row_size]
+        self._read += count * window_size
+        return self._inputs[:count]
+
+    def _compact(self, incoming):
+        """把上下文和未切分的采样移回缓冲区开头，容量不足时按2倍扩容"""
+        keep_from = self._read - self.context_size
+        pending = self._write - keep_from
+        capacity = len(self._buffer)
+        while capacity < pending + incoming:
+            capacity *= 2
+        if capacity == len(self._buffer):
+            self._buffer[:pending] = self._buffer[keep_from : self._write].copy()
+        else:
+            buffer = np.zeros(capacity, dtype=np.float32)
+            buffer[:pending] = self._buffer[keep_from : self._write]
+            self._buffer = buffer
+        self._read = self.context_size
+        self._write = pending
+
+
+class VoiceWindow:
+    """定长的有声/无声滑动窗口，与deque(maxlen=n)用法一致，有声帧数增量维护"""
+
+    def __init__(self, maxlen=5):
+        self.maxlen = maxlen
+        self._flags = [False] * maxlen
+        self._pos = 0
+        self._size = 0
+        self.voiced = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, is_voice: bool):
+        if self._size == self.maxlen:
+            self.voiced -= self._flags[self._pos]
+        else:
+            self._size += 1
+        self._flags[self._pos] = is_voice
+        self.voiced += is_voice
+        self._pos = (self._pos + 1) % self.maxlen
+
+    def count(self, value) -> int:
+        return self.voiced if value else self._size - self.voiced
+
+    def clear(self):
+        self._flags = [False] * self.maxlen
+        self._pos = 0
+        self._size = 0
+        self.voiced = 0
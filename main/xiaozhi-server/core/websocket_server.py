@@ -34,16 +34,42 @@ from core.connection import ConnectionHandler
 from config.config_loader import get_config_from_api_async
 from core.auth import AuthManager, AuthenticationError
 from core.utils.modules_initialize import initialize_modules
-from core.utils.util import check_vad_update, check_asr_update
+from core.utils.util import check_vad_update, check_asr_update, join_threads
+from core.utils.llm_scheduler import get_llm_scheduler
+from core.utils.admission_control import AdmissionController
+from core.utils.session_resume import SessionResumeCache, flush_pending_snapshots
+from core.utils.private_config_cache import get_private_config_cache
 
 TAG = __name__
 
 
 class WebSocketServer:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, reuse_port=False):
         self.config = config
         self.logger = setup_logging()
         self.config_lock = asyncio.Lock()
+        # 多进程模式下各worker通过SO_REUSEPORT共享监听端口
+        self.reuse_port = reuse_port
+        self.active_connections = 0
+        self.total_connections = 0
+        # 优雅下线相关
+        self.handlers = set()
+        self.background_threads = set()
+        self.draining = False
+        self.listening = asyncio.Event()
+        self._server = None
+        # 热重启控制器，由app.py在支持的平台上设置
+        self.restarter = None
+        # 按配置创建全局LLM调度器
+        self.llm_scheduler = get_llm_scheduler(
+            self.config["server"].get("llm_scheduler")
+        )
+        # 设备差异化配置缓存
+        self.private_config_cache = get_private_config_cache(
+            self.config["server"].get("private_config_cache")
+        )
+        # 新会话准入控制
+        self.admission = AdmissionController(self.config)
         modules = initialize_modules(
             self.logger,
             self.config,
@@ -72,10 +98,18 @@ class WebSocketServer:
         server_config = self.config["server"]
         host = server_config.get("ip", "0.0.0.0")
         port = int(server_config.get("port", 8000))
+        # 预先编码繁忙提示音
+        asyncio.create_task(self.admission.preload())
 
         async with websockets.serve(
-            self._handle_connection, host, port, process_request=self._http_response
-        ):
+            self._handle_connection,
+            host,
+            port,
+            process_request=self._http_response,
+            reuse_port=self.reuse_port,
+        ) as server:
+            self._server = server
+            self.listening.set()
             await asyncio.Future()
 
     async def _handle_connection(self, websocket: websockets.ServerConnection):
@@ -113,21 +147,39 @@ class WebSocketServer:
             await websocket.send("认证失败")
             await websocket.close()
             return
-        # 创建ConnectionHandler时传入当前server实例
-        handler = ConnectionHandler(
-            self.config,
-            self._vad,
-            self._asr,
-            self._llm,
-            self._memory,
-            self._intent,
-            self,  # 传入server实例
+        # 准入检查，超过负载上限的连接直接拒绝，不创建ConnectionHandler
+        ticket = await self.admission.acquire(
+            websocket.request.headers.get("device-id")
         )
+        if isinstance(ticket, str):
+            await self.admission.reject(websocket, ticket)
+            return
+        # 创建ConnectionHandler时传入当前server实例
+        try:
+            handler = ConnectionHandler(
+                self.config,
+                self._vad,
+                self._asr,
+                self._llm,
+                self._memory,
+                self._intent,
+                self,  # 传入server实例
+            )
+        except Exception:
+            ticket.release()
+            raise
+        handler.admission_ticket = ticket
+        self.handlers.add(handler)
+        self.active_connections += 1
+        self.total_connections += 1
         try:
             await handler.handle_connection(websocket)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"处理连接时出错: {e}")
         finally:
+            self.handlers.discard(handler)
+            self.active_connections -= 1
+            ticket.release()
             # 强制关闭连接（如果还没有关闭的话）
             try:
                 # 安全地检查WebSocket状态并关闭
@@ -143,6 +195,56 @@ class WebSocketServer:
                     f"服务器端强制关闭连接时出错: {close_error}"
                 )
 
+    def track_background_thread(self, thread):
+        """登记连接关闭后仍在运行的后台线程（如记忆保存），优雅下线时等待其完成"""
+        self.background_threads = {t for t in self.background_threads if t.is_alive()}
+        self.background_threads.add(thread)
+
+    async def drain(self, timeout: float):
+        """
+        优雅下线：停止接受新连接，空闲连接立即关闭，进行中的对话在本轮结束后关闭，
+        超过timeout秒仍未结束的连接强制关闭，最后等待记忆保存等后台线程完成
+        """
+        if self.draining:
+            return
+        self.draining = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        if self._server is not None:
+            # 只关闭监听socket，保留已有连接
+            self._server.close(close_connections=False)
+        self.logger.bind(tag=TAG).info(
+            f"开始优雅下线，当前连接数: {len(self.handlers)}，最长等待{timeout}秒"
+        )
+
+        for handler in list(self.handlers):
+            handler.start_drain()
+        while self.handlers and loop.time() < deadline:
+            await asyncio.sleep(0.5)
+
+        if self.handlers:
+            self.logger.bind(tag=TAG).warning(
+                f"仍有{len(self.handlers)}个连接未结束，强制关闭"
+            )
+            for handler in list(self.handlers):
+                try:
+                    await handler.close(handler.websocket)
+                except Exception as e:
+                    self.logger.bind(tag=TAG).error(f"强制关闭连接时出错: {e}")
+            # 等待连接处理流程完成收尾（保存记忆等）
+            close_deadline = loop.time() + 5
+            while self.handlers and loop.time() < close_deadline:
+                await asyncio.sleep(0.1)
+
+        # 下线后快照无法再被重连使用，立即保存其中尚未保存的对话
+        flush_pending_snapshots()
+        threads = [t for t in self.background_threads if t.is_alive()]
+        if threads:
+            self.logger.bind(tag=TAG).info(f"等待{len(threads)}个记忆保存任务完成")
+            remaining = max(deadline - loop.time(), 10)
+            await loop.run_in_executor(None, join_threads, threads, remaining)
+        self.logger.bind(tag=TAG).info("优雅下线完成")
+
     async def _http_response(self, websocket, request_headers):
         # 检查是否为 WebSocket 升级请求
         if request_headers.headers.get("connection", "").lower() == "upgrade":
@@ -174,6 +276,9 @@ class WebSocketServer:
                 )
                 # 更新配置
                 self.config = new_config
+                # 配置变更后，断线重连的会话快照不再可用
+                SessionResumeCache.clear()
+                self.private_config_cache.invalidate()
                 # 重新初始化组件
                 modules = initialize_modules(
                     self.logger,
@@ -0,0 +1,274 @@
+"""
+多进程Worker模式
+父进程fork出N个worker，每个worker独立加载VAD/ASR等模型，并通过SO_REUSEPORT绑定同一端口，
+由内核在worker之间分发连接。父进程负责监控worker，异常退出时自动重启。
+父进程收到SIGUSR2时逐个滚动替换worker：新worker就绪后，旧worker收到SIGUSR1开始优雅下线。
+滚动重启前父进程重新读取配置，新worker继承最新配置；worker由父进程fork而来，代码变更仍需完整重启。
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import multiprocessing
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# worker异常退出后，如果存活时间小于该值，则延迟重启，避免崩溃循环占满CPU
+MIN_WORKER_UPTIME_SECONDS = 10
+RESTART_BACKOFF_MAX_SECONDS = 30
+# 滚动重启时等待单个新worker就绪的最长时间
+ROLLING_READY_TIMEOUT_SECONDS = 180
+
+
+def reuse_port_supported() -> bool:
+    """当前平台是否支持SO_REUSEPORT和fork"""
+    return sys.platform != "win32" and hasattr(socket, "SO_REUSEPORT")
+
+
+class WorkerStatusBoard:
+    """
+    基于共享内存的worker状态表，每个worker占一个槽位
+    worker定期写入自身状态，任意worker的健康检查接口都可以读取全部槽位，得到汇总视图
+    """
+
+    FIELDS = (
+        "pid",
+        "started_at",
+        "heartbeat",
+        "active_connections",
+        "total_connections",
+        "restarts",
+        "ready",
+    )
+
+    def __init__(self, ctx, workers: int):
+        self.workers = workers
+        self._array = ctx.Array("d", workers * len(self.FIELDS))
+
+    def _index(self, slot: int, field: str) -> int:
+        return slot * len(self.FIELDS) + self.FIELDS.index(field)
+
+    def update(self, slot: int, **values):
+        with self._array.get_lock():
+            for field, value in values.items():
+                self._array[self._index(slot, field)] = value
+
+    def increase(self, slot: int, field: str, delta=1):
+        with self._array.get_lock():
+            self._array[self._index(slot, field)] += delta
+
+    def get(self, slot: int, field: str):
+        return self._array[self._index(slot, field)]
+
+    def snapshot(self, heartbeat_timeout=10) -> dict:
+        """汇总所有worker状态"""
+        now = time.time()
+        workers = []
+        with self._array.get_lock():
+            for slot in range(self.workers):
+                item = {field: self.get(slot, field) for field in self.FIELDS}
+                workers.append(
+                    {
+                        "worker_id": slot,
+                        "pid": int(item["pid"]),
+                        "alive": item["heartbeat"] > 0
+                        and now - item["heartbeat"] <= heartbeat_timeout,
+                        "uptime": (
+                            int(now - item["started_at"]) if item["started_at"] else 0
+                        ),
+                        "active_connections": int(item["active_connections"]),
+                        "total_connections": int(item["total_connections"]),
+                        "restarts": int(item["restarts"]),
+                        "ready": bool(item["ready"]),
+                    }
+                )
+        return {
+            "workers": workers,
+            "alive_workers": sum(1 for w in workers if w["alive"]),
+            "active_connections": sum(w["active_connections"] for w in workers),
+            "total_connections": sum(w["total_connections"] for w in workers),
+        }
+
+
+class WorkerSupervisor:
+    """worker进程监督者，运行在父进程中"""
+
+    def __init__(self, workers: int, target, reload_config=None):
+        """
+        Args:
+            workers: worker进程数量
+            target: worker入口函数，签名为 target(worker_id, status_board)
+            reload_config: 滚动重启前在父进程中调用，刷新fork给新worker的配置
+        """
+        self.workers = workers
+        self.target = target
+        self.reload_config = reload_config
+        self.ctx = multiprocessing.get_context("fork")
+        self.status_board = WorkerStatusBoard(self.ctx, workers)
+        self.processes = {}
+        self.backoff = {}
+        # 滚动重启中被替换、正在优雅下线的旧worker，退出后不再重启
+        self.draining = []
+        self._stopping = False
+        self._restart_requested = False
+
+    def _spawn(self, slot: int):
+        process = self.ctx.Process(
+            target=_worker_entry,
+            args=(self.target, slot, self.status_board),
+            name=f"xiaozhi-worker-{slot}",
+            daemon=False,
+        )
+        process.start()
+        self.processes[slot] = (process, time.time())
+        logger.bind(tag=TAG).info(f"worker-{slot} 已启动，pid={process.pid}")
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_restart(self, signum, frame):
+        self._restart_requested = True
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGUSR2, self._handle_restart)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        try:
+            while not self._stopping:
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self._rolling_restart()
+                self._check_workers()
+                self._reap_draining()
+                time.sleep(1)
+        finally:
+            self._shutdown()
+
+    def _check_workers(self):
+        now = time.time()
+        for slot, (process, started_at) in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            restart_at = self.backoff.get(slot)
+            if restart_at is None:
+                uptime = now - started_at
+                logger.bind(tag=TAG).error(
+                    f"worker-{slot}(pid={process.pid}) 异常退出，退出码={process.exitcode}，运行时长={uptime:.1f}s"
+                )
+                self.status_board.update(
+                    slot, heartbeat=0, active_connections=0
+                )
+                delay = 0
+                if uptime < MIN_WORKER_UPTIME_SECONDS:
+                    restarts = int(self.status_board.get(slot, "restarts"))
+                    delay = min(2**restarts, RESTART_BACKOFF_MAX_SECONDS)
+                    logger.bind(tag=TAG).warning(
+                        f"worker-{slot} 启动后很快退出，{delay}秒后重启"
+                    )
+                self.backoff[slot] = now + delay
+                continue
+            if now >= restart_at:
+                del self.backoff[slot]
+                self.status_board.increase(slot, "restarts")
+                self._spawn(slot)
+
+    def _wait_ready(self, slot: int, pid: int, timeout: float) -> bool:
+        """等待槽位上的新worker开始监听端口"""
+        deadline = time.time() + timeout
+        while time.time() < deadline and not self._stopping:
+            process, _ = self.processes[slot]
+            if not process.is_alive():
+                return False
+            if int(self.status_board.get(slot, "pid")) == pid and self.status_board.get(
+                slot, "ready"
+            ):
+                return True
+            time.sleep(0.5)
+        return False
+
+    def _rolling_restart(self):
+        """逐个替换worker，任一时刻至少有N个worker在监听端口"""
+        logger.bind(tag=TAG).info("开始滚动重启所有worker...")
+        if self.reload_config is not None:
+            try:
+                self.reload_config()
+            except Exception as e:
+                # 读取失败时新worker沿用当前配置
+                logger.bind(tag=TAG).error(f"滚动重启前重新读取配置失败: {e}")
+        for slot in range(self.workers):
+            if self._stopping:
+                return
+            old_process, _ = self.processes[slot]
+            self.backoff.pop(slot, None)
+            self._spawn(slot)
+            new_process, _ = self.processes[slot]
+            if not self._wait_ready(
+                slot, new_process.pid, ROLLING_READY_TIMEOUT_SECONDS
+            ):
+                # 新worker未能就绪，保留旧worker继续服务，停止本次滚动重启
+                logger.bind(tag=TAG).error(
+                    f"worker-{slot} 新进程(pid={new_process.pid})未能就绪，终止滚动重启"
+                )
+                if new_process.is_alive():
+                    new_process.terminate()
+                    new_process.join(timeout=10)
+                self.processes[slot] = (old_process, time.time())
+                return
+            if old_process.is_alive():
+                os.kill(old_process.pid, signal.SIGUSR1)
+                self.draining.append(old_process)
+            logger.bind(tag=TAG).info(
+                f"worker-{slot} 已替换: pid {old_process.pid} -> {new_process.pid}"
+            )
+        logger.bind(tag=TAG).info("滚动重启完成")
+
+    def _reap_draining(self):
+        for process in list(self.draining):
+            if not process.is_alive():
+                process.join()
+                self.draining.remove(process)
+                logger.bind(tag=TAG).info(f"旧worker(pid={process.pid}) 已完成下线")
+
+    def _shutdown(self):
+        logger.bind(tag=TAG).info("正在停止所有worker...")
+        processes = [process for process, _ in self.processes.values()]
+        processes.extend(self.draining)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.time() + 10
+        for process in processes:
+            process.join(timeout=max(0, deadline - time.time()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        logger.bind(tag=TAG).info("所有worker已停止")
+
+
+def _worker_entry(target, slot, status_board):
+    # 恢复默认信号处理，由worker自己的事件循环接管
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    status_board.update(
+        slot,
+        pid=os.getpid(),
+        started_at=time.time(),
+        heartbeat=time.time(),
+        active_connections=0,
+        ready=0,
+    )
+    target(slot, status_board)
+
+
+def run_workers(workers: int, target, reload_config=None):
+    """以多进程模式运行服务，阻塞直到收到退出信号"""
+    supervisor = WorkerSupervisor(workers, target, reload_config)
+    supervisor.run()
@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import uuid
+import wave
+import shutil
+import asyncio
+import argparse
+import statistics
+import numpy as np
+from tabulate import tabulate
+from core.providers.asr.base import ASRProviderBase
+
+description = "ASR音频工件测试(落盘WAV与内存PCM的单条语音文件系统调用数及耗时对比)"
+
+SAMPLE_RATE = 16000
+# 每条语音的时长（秒）
+UTTERANCE_SECONDS = 3
+ROUNDS = 200
+OUTPUT_DIR = "tmp/"
+
+
+class _SyscallCounter:
+    """统计文件系统相关调用：打开/删除文件、statvfs，以及/proc/self/io中的读写系统调用数"""
+
+    def __init__(self):
+        self.events = 0
+        self.enabled = False
+        sys.addaudithook(self._hook)
+        statvfs = os.statvfs
+
+        def counted_statvfs(path):
+            if self.enabled:
+                self.events += 1
+            return statvfs(path)
+
+        os.statvfs = counted_statvfs
+        # 读取/proc/self/io本身产生的系统调用不计入
+        self._overhead = 0
+        with self:
+            pass
+        self._overhead = self.total
+
+    def _hook(self, event, args):
+        if self.enabled and event in ("open", "os.remove", "tempfile.mkstemp"):
+            self.events += 1
+
+    @staticmethod
+    def _io_calls():
+        try:
+            with open("/proc/self/io") as f:
+                values = dict(line.split(": ") for line in f.read().splitlines())
+            return int(values["syscr"]) + int(values["syscw"])
+        except (OSError, KeyError, ValueError):
+            return 0
+
+    def __enter__(self):
+        self.events = 0
+        self._io_begin = self._io_calls()
+        self.enabled = True
+        return self
+
+    def __exit__(self, *exc):
+        self.enabled = False
+        io_calls = self._io_calls() - self._io_begin - self._overhead
+        self.total = self.events + max(0, io_calls)
+
+
+class _ArrayProvider(ASRProviderBase):
+    """直接接受PCM输入的本地ASR"""
+
+    def __init__(self):
+        super().__init__()
+        self.output_dir = OUTPUT_DIR
+        self.delete_audio_file = True
+
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus", artifacts=None):
+        return str(len(artifacts.pcm_bytes)), None
+
+
+class _PathProvider(_ArrayProvider):
+    """只能接收文件路径的ASR，读取临时WAV模拟SDK上传"""
+
+    def requires_file(self):
+        return True
+
+    def prefers_temp_file(self):
+        return True
+
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus", artifacts=None):
+        with open(artifacts.temp_path, "rb") as f:
+            return str(len(f.read())), None
+
+
+def legacy_recognize(pcm_frames):
+    """改造前的方式：每次检查磁盘空间，写WAV到输出目录，再读回并删除"""
+    pcm_bytes = b"".join(pcm_frames)
+    if shutil.disk_usage(OUTPUT_DIR).free < len(pcm_bytes) * 2:
+        raise OSError("磁盘空间不足")
+    file_path = os.path.join(OUTPUT_DIR, f"asr_base_test_{uuid.uuid4()}.wav")
+    try:
+        with wave.open(file_path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(pcm_bytes)
+        with wave.open(file_path) as f:
+            return str(len(f.readframes(f.getnframes())))
+    finally:
+        os.remove(file_path)
+
+
+def run_case(name, recognize, pcm_frames, rounds, counter):
+    latencies = []
+    syscalls = []
+    for _ in range(rounds):
+        with counter:
+            begin = time.perf_counter()
+            recognize(pcm_frames)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        syscalls.append(counter.total)
+    latencies.sort()
+    return [
+        name,
+        f"{statistics.mean(syscalls):.1f}",
+        f"{statistics.median(latencies):.3f}",
+        f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.3f}",
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="每种方式识别的语音条数")
+    parser.add_argument(
+        "--seconds", type=float, default=UTTERANCE_SECONDS, help="每条语音的时长（秒）"
+    )
+    args = parser.parse_args(argv)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    rng = np.random.default_rng(0)
+    pcm = rng.integers(-3000, 3000, int(args.seconds * SAMPLE_RATE), dtype=np.int16)
+    pcm_bytes = pcm.tobytes()
+    # 60ms一帧
+    pcm_frames = [pcm_bytes[i : i + 1920] for i in range(0, len(pcm_bytes), 1920)]
+
+    loop = asyncio.new_event_loop()
+
+    def wrapper_recognize(provider):
+        def recognize(frames):
+            return loop.run_until_complete(
+                provider.speech_to_text_wrapper(
+                    [], "test", "pcm", pcm=(frames, b"".join(frames))
+                )
+            )
+
+        return recognize
+
+    counter = _SyscallCounter()
+    cases = [
+        ("改造前：落盘WAV并读回", legacy_recognize),
+        ("改造后：内存PCM", wrapper_recognize(_ArrayProvider())),
+        ("改造后：内存文件系统临时WAV", wrapper_recognize(_PathProvider())),
+    ]
+    # 预热
+    for _, recognize in cases:
+        recognize(pcm_frames)
+
+    rows = [
+        run_case(name, recognize, pcm_frames, args.rounds, counter)
+        for name, recognize in cases
+    ]
+    loop.close()
+    print(
+        tabulate(
+            rows,
+            headers=["方式", "文件系统调用/条", "耗时P50(ms)", "耗时P99(ms)"],
+            tablefmt="github",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import time
+import wave
+import random
+import asyncio
+import argparse
+import statistics
+import numpy as np
+from tabulate import tabulate
+from funasr import AutoModel
+from config.settings import load_config
+from core.providers.asr.fun_local import FunASRBatcher
+
+description = "本地FunASR跨连接批量识别测试(逐条识别与批量识别的吞吐及P99延迟对比)"
+
+SAMPLE_RATE = 16000
+CONCURRENCY = [1, 4, 8, 16]
+# 每轮测试时长（秒）
+DURATION = 30
+# 仓库自带的测试语音
+TEST_CLIPS = [
+    "config/assets/wakeup_words_short.wav",
+    "config/assets/bind_not_found.wav",
+    "config/assets/max_output_size.wav",
+] + [f"config/assets/bind_code/{digit}.wav" for digit in range(10)]
+
+
+def read_pcm(path):
+    """读取wav并转换为16kHz单声道16位PCM"""
+    with wave.open(path, "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        rate = wav_file.getframerate()
+        samples = np.frombuffer(
+            wav_file.readframes(wav_file.getnframes()), dtype=np.int16
+        )
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        duration = len(samples) / rate
+        target = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+        samples = np.interp(target, np.arange(len(samples)) / rate, samples)
+    return samples.astype(np.int16).tobytes()
+
+
+def make_single_recognize(model):
+    """改造前的方式：每条语音单独在线程中识别"""
+
+    async def recognize(pcm_bytes):
+        return await asyncio.to_thread(
+            model.generate,
+            input=pcm_bytes,
+            cache={},
+            language="auto",
+            use_itn=True,
+            batch_size_s=60,
+        )
+
+    return recognize
+
+
+async def _client(index, recognize, utterances, deadline, latencies):
+    """模拟一个连接：说完一句后等待识别结果，稍作停顿再说下一句"""
+    rng = random.Random(index)
+    while time.perf_counter() < deadline:
+        pcm_bytes = rng.choice(utterances)
+        begin = time.perf_counter()
+        await recognize(pcm_bytes)
+        latencies.append((time.perf_counter() - begin) * 1000)
+        await asyncio.sleep(rng.uniform(0, 0.2))
+
+
+async def run_case(recognize, utterances, concurrency, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    begin = time.perf_counter()
+    await asyncio.gather(
+        *[
+            _client(i, recognize, utterances, deadline, latencies)
+            for i in range(concurrency)
+        ]
+    )
+    wall = time.perf_counter() - begin
+    latencies.sort()
+    return {
+        "utterances": len(latencies),
+        "throughput": len(latencies) / wall,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--model-dir", help="FunASR模型目录，默认读取配置文件中的FunASR")
+    parser.add_argument("--duration", type=float, default=DURATION, help="每轮测试时长（秒）")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=CONCURRENCY, help="并发连接数"
+    )
+    parser.add_argument("--max-wait-ms", type=float, default=50, help="批量等待时间（毫秒）")
+    parser.add_argument("--max-batch-size", type=int, default=8, help="单次批量识别的最大语音条数")
+    args = parser.parse_args(argv)
+
+    model_dir = args.model_dir or load_config()["ASR"]["FunASR"]["model_dir"]
+    utterances = [read_pcm(path) for path in TEST_CLIPS if os.path.exists(path)]
+    if not utterances:
+        print("没有找到测试语音")
+        return
+
+    model = AutoModel(
+        model=model_dir,
+        vad_kwargs={"max_single_segment_time": 30000},
+        disable_update=True,
+        hub="hf",
+    )
+    batcher = FunASRBatcher(
+        model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms
+    )
+    # 预热
+    model.generate(input=utterances[0], cache={}, language="auto", use_itn=True)
+
+    rows = []
+    for concurrency in args.concurrency:
+        for name, recognize in (
+            ("逐条识别", make_single_recognize(model)),
+            ("批量识别", batcher.recognize),
+        ):
+            print(f"测试 {concurrency} 路并发 - {name}...")
+            result = await run_case(recognize, utterances, concurrency, args.duration)
+            rows.append(
+                [
+                    concurrency,
+                    name,
+                    result["utterances"],
+                    f"{result['throughput']:.2f}",
+                    f"{result['p50']:.0f}",
+                    f"{result['p99']:.0f}",
+                ]
+            )
+
+    print(
+        tabulate(
+            rows,
+            headers=["并发连接", "方式", "识别条数", "吞吐(条/秒)", "延迟P50(ms)", "延迟P99(ms)"],
+            tablefmt="github",
+        )
+    )
+    metrics = batcher.get_metrics()
+    print(f"批量识别统计: 平均批大小 {metrics['avg_batch']:.1f}，最大批大小 {metrics['max_batch']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
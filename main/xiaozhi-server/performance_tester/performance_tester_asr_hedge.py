@@ -0,0 +1,168 @@
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from tabulate import tabulate
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr import hedged
+
+description = "组合ASR对冲与熔断测试(模拟供应商长尾延迟和故障，对比单供应商与对冲后的识别耗时)"
+
+# 每种场景识别的语音条数与并发数
+ROUNDS = 400
+CONCURRENCY = 20
+# 模拟供应商的常规延迟（毫秒）和长尾
+BASE_LATENCY_MS = 400
+TAIL_RATE = 0.04
+TAIL_LATENCY_MS = 3000
+# 故障场景中首选供应商从第几条语音开始全部失败
+OUTAGE_AFTER = 100
+OUTAGE_LATENCY_MS = 200
+# 60ms 16kHz 16位PCM，共1秒
+PCM_FRAMES = [b"\x00" * 1920] * 16
+
+
+class _MockVendorASR(ASRProviderBase):
+    """按设定分布返回的远程ASR"""
+
+    def __init__(self, name, rng, tail_rate=TAIL_RATE):
+        super().__init__()
+        self.interface_type = InterfaceType.NON_STREAM
+        self.name = name
+        self.rng = rng
+        self.tail_rate = tail_rate
+        self.output_dir = "tmp/"
+        self.delete_audio_file = True
+        # 故障时的返回：None表示请求失败，""表示返回空文本
+        self.down = False
+        self.down_result = None
+        self.calls = 0
+
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus", artifacts=None):
+        self.calls += 1
+        if self.down:
+            await asyncio.sleep(OUTAGE_LATENCY_MS / 1000)
+            return self.down_result, None
+        latency_ms = BASE_LATENCY_MS * self.rng.lognormvariate(0, 0.25)
+        if self.rng.random() < self.tail_rate:
+            latency_ms += TAIL_LATENCY_MS * self.rng.uniform(0.5, 1.5)
+        await asyncio.sleep(latency_ms / 1000)
+        return self.name, None
+
+
+async def run_case(provider, rounds, concurrency, on_request=None):
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        nonlocal failures
+        async with semaphore:
+            if on_request is not None:
+                on_request(index)
+            begin = time.monotonic()
+            text, _ = await provider.speech_to_text_wrapper(
+                [], f"test-{index}", "pcm", pcm=(PCM_FRAMES, b"".join(PCM_FRAMES))
+            )
+            if not text:
+                failures += 1
+            else:
+                latencies.append((time.monotonic() - begin) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(rounds)))
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return [
+        f"{statistics.median(latencies):.0f}",
+        f"{percentile(0.95):.0f}",
+        f"{percentile(0.99):.0f}",
+        failures,
+    ]
+
+
+def make_hedged(members, config):
+    # 每个场景使用独立的延迟与熔断状态
+    hedged._member_states.clear()
+    return hedged.HedgedASRProvider(config, members)
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="每种场景识别的语音条数")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="并发识别数")
+    parser.add_argument("--tail-rate", type=float, default=TAIL_RATE, help="长尾请求比例")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    config = {"min_samples": 20, "failure_threshold": 3, "open_seconds": 5}
+    rows = []
+
+    def vendors():
+        return {
+            "Primary": _MockVendorASR("Primary", rng, args.tail_rate),
+            "Secondary": _MockVendorASR("Secondary", rng, args.tail_rate),
+        }
+
+    print("测试 单供应商...")
+    members = vendors()
+    result = await run_case(members["Primary"], args.rounds, args.concurrency)
+    rows.append(["单供应商", *result, members["Primary"].calls, "-"])
+
+    print("测试 对冲...")
+    members = vendors()
+    provider = make_hedged(members, config)
+    result = await run_case(provider, args.rounds, args.concurrency)
+    calls = sum(member.calls for member in members.values())
+    rows.append(["对冲", *result, calls, "-"])
+
+    def outage(index):
+        members["Primary"].down = index >= OUTAGE_AFTER
+
+    print("测试 单供应商故障...")
+    members = vendors()
+    result = await run_case(members["Primary"], args.rounds, args.concurrency, outage)
+    rows.append(["单供应商，首选故障", *result, members["Primary"].calls, "-"])
+
+    print("测试 对冲+熔断故障...")
+    members = vendors()
+    provider = make_hedged(members, config)
+    result = await run_case(provider, args.rounds, args.concurrency, outage)
+    calls = sum(member.calls for member in members.values())
+    trips = provider.states["Primary"].breaker.trips
+    rows.append(["对冲+熔断，首选故障", *result, calls, trips])
+
+    # 首选识别为空（如VAD放过的咳嗽、背景声）属于正常结果，不应触发对冲和熔断
+    print("测试 对冲+熔断，首选识别为空...")
+    members = vendors()
+    members["Primary"].down_result = ""
+    provider = make_hedged(members, config)
+    result = await run_case(provider, args.rounds, args.concurrency, outage)
+    calls = sum(member.calls for member in members.values())
+    trips = provider.states["Primary"].breaker.trips
+    rows.append(["对冲+熔断，首选识别为空", *result, calls, trips])
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "方式",
+                "耗时P50(ms)",
+                "耗时P95(ms)",
+                "耗时P99(ms)",
+                "无识别结果",
+                "供应商请求数",
+                "熔断次数",
+            ],
+            tablefmt="github",
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,363 @@
+import json
+import time
+import base64
+import asyncio
+import argparse
+import importlib
+import statistics
+import threading
+import websockets
+from tabulate import tabulate
+from core.utils.uplink_audio import UplinkFrame
+
+description = "流式ASR预热连接池测试(本地模拟供应商服务，对比说话开始到首帧音频到达上游的耗时)"
+
+PROVIDERS = ["doubao_stream", "aliyun_stream", "aliyunbl_stream", "xunfei_stream"]
+# 每个供应商测试的语音条数
+ROUNDS = 5
+# 模拟的连接建立（TCP+TLS+WebSocket）耗时与初始化握手耗时（毫秒）
+CONNECT_DELAY_MS = 150
+INIT_DELAY_MS = 150
+# 收到音频后多久没有新音频视为说话结束（毫秒），模拟供应商的服务端断句
+END_SILENCE_MS = 400
+# 未发送音频的会话多久后被断开（秒），模拟供应商的空闲超时
+IDLE_TIMEOUT = 10
+MOCK_TEXT = "你好小智"
+# 60ms 16kHz 16位PCM
+FRAME_BYTES = 1920
+
+
+class MockASRVendor:
+    """
+    本地模拟的流式ASR供应商服务，按路径区分协议：
+    /doubao_stream、/aliyun_stream、/aliyunbl_stream、/xunfei_stream，
+    实现各家的初始化握手、音频接收和最终结果，可在ASR配置中用ws_url指向它联调
+    """
+
+    def __init__(
+        self,
+        connect_delay_ms=CONNECT_DELAY_MS,
+        init_delay_ms=INIT_DELAY_MS,
+        end_silence_ms=END_SILENCE_MS,
+        idle_timeout=IDLE_TIMEOUT,
+    ):
+        self.connect_delay = connect_delay_ms / 1000
+        self.init_delay = init_delay_ms / 1000
+        self.end_silence = end_silence_ms / 1000
+        self.idle_timeout = idle_timeout
+        # 每个会话第一帧音频的到达时间
+        self.first_audio = asyncio.Queue()
+        self.sessions = 0
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0) -> str:
+        self._server = await websockets.serve(
+            self._handler, host, port, process_request=self._process_request
+        )
+        port = self._server.sockets[0].getsockname()[1]
+        return f"ws://{host}:{port}"
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _process_request(self, connection, request):
+        # 模拟建立连接的网络耗时
+        await asyncio.sleep(self.connect_delay)
+        return None
+
+    async def _handler(self, ws):
+        self.sessions += 1
+        path = ws.request.path.split("?")[0].strip("/")
+        handler = getattr(self, f"_serve_{path}", None)
+        if handler is None:
+            await ws.close(1008, "unknown path")
+            return
+        try:
+            await handler(ws)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _receive_audio(self, ws, on_message):
+        """接收音频直到on_message返回True或音频中断超过end_silence，返回时发送最终结果"""
+        has_audio = False
+        while True:
+            timeout = self.end_silence if has_audio else self.idle_timeout
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if not has_audio:
+                    await ws.close(1000, "idle timeout")
+                    return False
+                return True
+            audio, finished = on_message(message)
+            if audio and not has_audio:
+                has_audio = True
+                self.first_audio.put_nowait(time.monotonic())
+            if finished:
+                return True
+
+    async def _serve_doubao_stream(self, ws):
+        await ws.recv()
+        await asyncio.sleep(self.init_delay)
+        await ws.send(self._doubao_response({"result": {"text": ""}}))
+
+        def on_message(message):
+            message_type = message[1] >> 4
+            flags = message[1] & 0x0F
+            return message_type == 0x02, bool(flags & 0x02)
+
+        if await self._receive_audio(ws, on_message):
+            await ws.send(
+                self._doubao_response(
+                    {
+                        "audio_info": {"duration": 1000},
+                        "result": {
+                            "text": MOCK_TEXT,
+                            "utterances": [{"text": MOCK_TEXT, "definite": True}],
+                        },
+                    }
+                )
+            )
+            await ws.wait_closed()
+
+    @staticmethod
+    def _doubao_response(payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        header = bytes([0x11, 0x90, 0x10, 0x00])
+        return header + (1).to_bytes(4, "big") + len(data).to_bytes(4, "big") + data
+
+    async def _serve_aliyun_stream(self, ws):
+        start = json.loads(await ws.recv())
+        task_id = start["header"]["task_id"]
+        await asyncio.sleep(self.init_delay)
+        await ws.send(self._aliyun_event(task_id, "TranscriptionStarted"))
+
+        def on_message(message):
+            if isinstance(message, bytes):
+                return True, False
+            return False, json.loads(message)["header"]["name"] == "StopTranscription"
+
+        if await self._receive_audio(ws, on_message):
+            await ws.send(self._aliyun_event(task_id, "SentenceEnd", {"result": MOCK_TEXT}))
+            await ws.send(self._aliyun_event(task_id, "TranscriptionCompleted"))
+            await ws.wait_closed()
+
+    @staticmethod
+    def _aliyun_event(task_id, name, payload=None):
+        return json.dumps(
+            {
+                "header": {"name": name, "status": 20000000, "task_id": task_id},
+                "payload": payload or {},
+            },
+            ensure_ascii=False,
+        )
+
+    async def _serve_aliyunbl_stream(self, ws):
+        run_task = json.loads(await ws.recv())
+        task_id = run_task["header"]["task_id"]
+        await asyncio.sleep(self.init_delay)
+        await ws.send(json.dumps({"header": {"event": "task-started", "task_id": task_id}}))
+
+        def on_message(message):
+            if isinstance(message, bytes):
+                return True, False
+            return False, json.loads(message)["header"].get("action") == "finish-task"
+
+        if await self._receive_audio(ws, on_message):
+            sentence = {"text": MOCK_TEXT, "sentence_end": True, "end_time": 1000}
+            await ws.send(
+                json.dumps(
+                    {
+                        "header": {"event": "result-generated", "task_id": task_id},
+                        "payload": {"output": {"sentence": sentence}},
+                    },
+                    ensure_ascii=False,
+                )
+            )
+            await ws.send(json.dumps({"header": {"event": "task-finished", "task_id": task_id}}))
+            await ws.wait_closed()
+
+    async def _serve_xunfei_stream(self, ws):
+        # 讯飞没有单独的初始化握手，首帧音频即开始识别
+        def on_message(message):
+            status = json.loads(message)["header"]["status"]
+            return status in (0, 1), status == 2
+
+        if await self._receive_audio(ws, on_message):
+            text = json.dumps({"ws": [{"cw": [{"w": MOCK_TEXT}]}]}, ensure_ascii=False)
+            await ws.send(
+                json.dumps(
+                    {
+                        "header": {"code": 0, "status": 2},
+                        "payload": {
+                            "result": {
+                                "text": base64.b64encode(text.encode("utf-8")).decode()
+                            }
+                        },
+                    }
+                )
+            )
+            await ws.wait_closed()
+
+
+class _MockConnection:
+    """只包含流式ASR用到的连接状态"""
+
+    def __init__(self):
+        self.asr = None
+        self.asr_audio = []
+        self.client_listen_mode = "auto"
+        self.client_have_voice = False
+        self.client_voice_stop = False
+        self.stop_event = threading.Event()
+        self.texts = asyncio.Queue()
+
+    def reset_audio_states(self):
+        self.asr_audio.clear()
+        self.client_have_voice = False
+        self.client_voice_stop = False
+
+
+def _make_frame(level):
+    frame = UplinkFrame(b"\x00")
+    frame.pcm = (int(level).to_bytes(2, "little", signed=True)) * (FRAME_BYTES // 2)
+    return frame
+
+
+def make_provider(kind, ws_url, warm_pool_size):
+    config = {
+        "type": kind,
+        "ws_url": ws_url,
+        "warm_pool_size": warm_pool_size,
+        "output_dir": "tmp/",
+        # 模拟服务不校验鉴权信息
+        "appid": "mock",
+        "access_token": "mock",
+        "appkey": "mock",
+        "token": "mock",
+        "api_key": "mock",
+        "app_id": "mock",
+        "api_secret": "mock",
+    }
+    module = importlib.import_module(f"core.providers.asr.{kind}")
+    return module.ASRProvider(config, True)
+
+
+async def run_provider(vendor, base_url, kind, warm_pool_size, rounds):
+    provider = make_provider(kind, f"{base_url}/{kind}", warm_pool_size)
+    conn = _MockConnection()
+    conn.asr = provider
+
+    async def capture_voice_stop(conn, asr_audio_task):
+        # 与ASRProviderBase.handle_voice_stop一致，取结果后关闭本次会话，不进入对话
+        text, _ = await provider.speech_to_text(asr_audio_task, "mock", "opus")
+        provider.stop_ws_connection()
+        conn.texts.put_nowait(text)
+
+    provider.handle_voice_stop = capture_voice_stop
+    provider.pool.start()
+    silence, speech = _make_frame(0), _make_frame(1000)
+
+    latencies = []
+    recognized = 0
+    for _ in range(rounds):
+        # 留出时间让预热池补充会话
+        await asyncio.sleep(1.5)
+        while not vendor.first_audio.empty():
+            vendor.first_audio.get_nowait()
+
+        for _ in range(10):
+            await provider.receive_audio(conn, silence, False)
+        onset_time = time.monotonic()
+        conn.client_have_voice = True
+        await provider.receive_audio(conn, speech, True)
+        try:
+            first_audio_time = await asyncio.wait_for(vendor.first_audio.get(), 5)
+            latencies.append((first_audio_time - onset_time) * 1000)
+        except asyncio.TimeoutError:
+            continue
+
+        for _ in range(10):
+            await provider.receive_audio(conn, speech, True)
+            await asyncio.sleep(0.06)
+        try:
+            text = await asyncio.wait_for(conn.texts.get(), 5)
+            recognized += text == MOCK_TEXT
+        except asyncio.TimeoutError:
+            pass
+        conn.reset_audio_states()
+
+    await provider.close()
+    return latencies, recognized, provider.pool.get_metrics()
+
+
+async def serve_forever(vendor, port):
+    base_url = await vendor.start("127.0.0.1", port)
+    print(f"模拟ASR供应商服务已启动: {base_url}/<供应商类型>，Ctrl-C退出")
+    await asyncio.Future()
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--providers", nargs="+", default=PROVIDERS, help="测试的流式ASR类型")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="每个供应商测试的语音条数")
+    parser.add_argument(
+        "--connect-delay-ms", type=float, default=CONNECT_DELAY_MS, help="模拟建立连接耗时"
+    )
+    parser.add_argument(
+        "--init-delay-ms", type=float, default=INIT_DELAY_MS, help="模拟初始化握手耗时"
+    )
+    parser.add_argument("--serve", action="store_true", help="只启动模拟供应商服务")
+    parser.add_argument("--port", type=int, default=0, help="模拟服务端口")
+    args = parser.parse_args(argv)
+
+    vendor = MockASRVendor(args.connect_delay_ms, args.init_delay_ms)
+    if args.serve:
+        await serve_forever(vendor, args.port)
+        return
+
+    base_url = await vendor.start("127.0.0.1", args.port)
+    rows = []
+    try:
+        for kind in args.providers:
+            for name, warm_pool_size in (("不预热", 0), ("预热连接池", 1)):
+                print(f"测试 {kind} - {name}...")
+                latencies, recognized, metrics = await run_provider(
+                    vendor, base_url, kind, warm_pool_size, args.rounds
+                )
+                latencies.sort()
+                rows.append(
+                    [
+                        kind,
+                        name,
+                        f"{recognized}/{args.rounds}",
+                        f"{statistics.median(latencies):.1f}" if latencies else "-",
+                        f"{latencies[-1]:.1f}" if latencies else "-",
+                        metrics["warm_hits"],
+                        metrics["cold_opens"],
+                    ]
+                )
+    finally:
+        await vendor.close()
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "供应商",
+                "方式",
+                "识别成功",
+                "首帧音频到达P50(ms)",
+                "首帧音频到达最大(ms)",
+                "预热命中",
+                "现场建连",
+            ],
+            tablefmt="github",
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+import gc
+import copy
+import time
+import tracemalloc
+import statistics
+from tabulate import tabulate
+from config.config_loader import read_config, get_project_dir
+from core.utils.layered_config import LayeredConfig
+
+description = "建立连接时配置拷贝开销测试(deepcopy与分层配置对比)"
+
+
+def _build_private_config(config):
+    """模拟智控台下发的私有配置，只覆盖少量模块"""
+    selected_module = config.get("selected_module", {})
+    private_config = {"selected_module": {}}
+    for module in ("TTS", "LLM"):
+        name = selected_module.get(module)
+        if name and name in config.get(module, {}):
+            private_config[module] = {name: dict(config[module][name])}
+            private_config["selected_module"][module] = name
+    private_config["prompt"] = "你是一个测试用的角色"
+    return private_config
+
+
+def _connect_deepcopy(config, private_config):
+    conn_config = copy.deepcopy(config)
+    welcome_msg = conn_config["xiaozhi"]
+    for module, name in private_config["selected_module"].items():
+        conn_config[module] = private_config[module]
+        conn_config["selected_module"][module] = name
+    conn_config["prompt"] = private_config["prompt"]
+    return conn_config, welcome_msg
+
+
+def _connect_layered(config, private_config):
+    conn_config = LayeredConfig(config)
+    welcome_msg = dict(conn_config["xiaozhi"])
+    selected_module = conn_config.section("selected_module")
+    for module, name in private_config["selected_module"].items():
+        conn_config[module] = private_config[module]
+        selected_module[module] = name
+    conn_config["prompt"] = private_config["prompt"]
+    return conn_config, welcome_msg
+
+
+def _measure(connect, config, private_config, rounds, connections):
+    # 单次连接的配置构建耗时
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        connect(config, private_config)
+        durations.append(time.perf_counter() - start)
+
+    # 同时保持多个连接时的内存占用
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    holders = [connect(config, private_config) for _ in range(connections)]
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del holders
+
+    durations.sort()
+    return {
+        "p50_us": statistics.median(durations) * 1e6,
+        "p99_us": durations[int(len(durations) * 0.99) - 1] * 1e6,
+        "mem_per_conn_kb": used / connections / 1024,
+    }
+
+
+def run_benchmark(rounds=2000, connections=500):
+    config = read_config(get_project_dir() + "config.yaml")
+    private_config = _build_private_config(config)
+
+    results = []
+    for name, connect in (
+        ("deepcopy", _connect_deepcopy),
+        ("layered", _connect_layered),
+    ):
+        print(f"测试 {name} ...")
+        result = _measure(connect, config, private_config, rounds, connections)
+        result["mode"] = name
+        results.append(result)
+    return results
+
+
+def print_results(results, connections=500):
+    headers = ["方式", "单次耗时p50(μs)", "单次耗时p99(μs)", f"每连接内存(KB, {connections}连接)"]
+    rows = [
+        [
+            r["mode"],
+            f"{r['p50_us']:.1f}",
+            f"{r['p99_us']:.1f}",
+            f"{r['mem_per_conn_kb']:.2f}",
+        ]
+        for r in results
+    ]
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+    if len(results) == 2 and results[1]["p50_us"] > 0:
+        print(f"\n建连配置耗时降低约 {results[0]['p50_us'] / results[1]['p50_us']:.0f} 倍")
+
+
+def main():
+    results = run_benchmark()
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+from multiprocessing.connection import Listener, Client
+import websockets
+from tabulate import tabulate
+from core.providers.vad.base import VADProviderBase
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+from core.providers.llm.base import LLMProviderBase
+from core.providers.tts.base import TTSProviderBase
+from core.providers.tts.dto.dto import SentenceType
+
+description = "单连接资源占用测试(空闲/说话会话的内存、线程、文件描述符、协程数和事件循环延迟)"
+
+# 命令行用法（CI中运行，输出JSON并与基线对比）：
+#   PYTHONPATH=. python performance_tester/performance_tester_connection_footprint.py \
+#       --sessions 10 50 100 --output footprint.json --baseline footprint_baseline.json
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTROL_AUTH_KEY = b"xiaozhi-footprint"
+
+# 模拟设备上行的PCM帧：16kHz、16bit、60ms
+FRAME_DURATION_MS = 60
+PCM_FRAME_BYTES = 16000 * 2 * FRAME_DURATION_MS // 1000
+# 说话会话的节奏：说话1.5秒，静音1.5秒，循环
+VOICE_FRAMES = 25
+SILENCE_FRAMES = 25
+# 桩VAD判定一句话结束的静音时长
+STUB_SILENCE_MS = 300
+STUB_ASR_TEXT = "你好，今天天气怎么样"
+STUB_LLM_REPLY = "好的，这是一条用于压测的固定回复，不会请求任何外部服务。"
+# 桩LLM每个token的生成间隔
+STUB_TOKEN_INTERVAL = 0.02
+# 桩TTS每个字生成的音频帧数
+STUB_FRAMES_PER_CHAR = 4
+STUB_OPUS_FRAME = bytes(80)
+
+# 各阶段等待时间（秒）
+SESSION_READY_TIMEOUT = 60
+COMPONENT_INIT_SECONDS = 2
+SETTLE_SECONDS = 2
+
+
+class StubVAD(VADProviderBase):
+    """首字节为1的音频帧视为有声音，有声后连续静音超过STUB_SILENCE_MS判定一句话结束"""
+
+    def is_vad(self, conn, data) -> bool:
+        if conn.client_listen_mode == "manual":
+            return True
+        have_voice = bool(data) and data[0] == 1
+        now = time.time() * 1000
+        if have_voice:
+            conn.client_have_voice = True
+            conn.last_activity_time = now
+        elif conn.client_have_voice and now - conn.last_activity_time >= STUB_SILENCE_MS:
+            conn.client_voice_stop = True
+        return have_voice
+
+
+class StubASR(ASRProviderBase):
+    """固定返回一句话的本地ASR，所有连接共享一个实例"""
+
+    def __init__(self):
+        super().__init__()
+        self.interface_type = InterfaceType.LOCAL
+        self.output_dir = "tmp/"
+
+    async def speech_to_text_wrapper(self, opus_data, session_id, audio_format="opus"):
+        return STUB_ASR_TEXT, None
+
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus", artifacts=None):
+        return STUB_ASR_TEXT, None
+
+
+class StubLLM(LLMProviderBase):
+    """按固定间隔逐字输出固定回复"""
+
+    def _tokens(self):
+        return [STUB_LLM_REPLY[i : i + 4] for i in range(0, len(STUB_LLM_REPLY), 4)]
+
+    def response(self, session_id, dialogue, **kwargs):
+        for token in self._tokens():
+            time.sleep(STUB_TOKEN_INTERVAL)
+            yield token
+
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        for token in self._tokens():
+            await asyncio.sleep(STUB_TOKEN_INTERVAL)
+            yield token
+
+
+class StubTTS(TTSProviderBase):
+    """不做合成，按文本长度生成静音opus帧，走完整的播放和上报流程"""
+
+    async def text_to_speak(self, text, output_file):
+        return b""
+
+    def to_tts_stream(self, text, opus_handler=None) -> None:
+        self.tts_audio_queue.put((SentenceType.FIRST, None, text))
+        for _ in range(len(text) * STUB_FRAMES_PER_CHAR):
+            opus_handler(STUB_OPUS_FRAME)
+
+    def to_tts(self, text):
+        return [STUB_OPUS_FRAME] * (len(text) * STUB_FRAMES_PER_CHAR)
+
+
+# ---------------------------------------------------------------------------
+# 服务端子进程：启动使用桩组件的WebSocketServer，通过控制连接上报资源占用
+# ---------------------------------------------------------------------------
+
+
+def _build_server_config(base_config, port, pipeline):
+    config = dict(base_config)
+    config["read_config_from_api"] = False
+    config["close_connection_no_voice_time"] = 3600
+
+    server = dict(config["server"])
+    server.update(
+        ip="127.0.0.1",
+        port=port,
+        session_pipeline=pipeline,
+        admission={},
+        hibernate_idle_seconds=0,
+        session_resume={"enabled": False},
+    )
+    server["auth"] = {**server.get("auth", {}), "enabled": False}
+    config["server"] = server
+
+    selected_module = dict(config["selected_module"])
+    selected_module.update(Memory="nomem", Intent="nointent")
+    config["selected_module"] = selected_module
+    config["Memory"] = {**config.get("Memory", {}), "nomem": {"type": "nomem"}}
+    config["Intent"] = {**config.get("Intent", {}), "nointent": {"type": "nointent"}}
+    return config
+
+
+def _install_stub_providers(connection_module, websocket_server_module):
+    original_initialize_modules = websocket_server_module.initialize_modules
+
+    def initialize_modules(logger, config, *flags):
+        # 记忆和意图使用真实的nomem/nointent，其余组件使用桩
+        modules = original_initialize_modules(
+            logger, config, False, False, False, False, True, True
+        )
+        modules.update(vad=StubVAD(), asr=StubASR(), llm=StubLLM())
+        return modules
+
+    websocket_server_module.initialize_modules = initialize_modules
+    connection_module.initialize_tts = lambda config: StubTTS({}, True)
+
+
+async def _sample_loop_lag(lags, interval=0.05):
+    """周期性休眠，记录实际唤醒时间与预期的偏差"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+
+
+def _percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _sample(process, ws_server, lags):
+    num_fds = getattr(process, "num_fds", None) or getattr(process, "num_handles")
+    return {
+        "rss_mb": process.memory_info().rss / 1024 / 1024,
+        "threads": process.num_threads(),
+        "fds": num_fds(),
+        "tasks": len(asyncio.all_tasks()),
+        "sessions": ws_server.active_connections,
+        "loop_lag_ms": {
+            "p50": _percentile(lags, 0.5) * 1000,
+            "p99": _percentile(lags, 0.99) * 1000,
+            "max": max(lags, default=0.0) * 1000,
+        },
+    }
+
+
+async def _serve(args):
+    import psutil
+    import core.connection as connection_module
+    import core.websocket_server as websocket_server_module
+    from config.config_loader import load_config
+    from core.utils.cache.manager import cache_manager
+    from core.utils.cache.config import CacheType
+
+    _install_stub_providers(connection_module, websocket_server_module)
+    config = _build_server_config(load_config(), args.port, args.pipeline)
+    # 本机地址不查询地理位置和天气，避免测试依赖外网
+    cache_manager.set(CacheType.LOCATION, "127.0.0.1", "")
+
+    ws_server = websocket_server_module.WebSocketServer(config)
+    server_task = asyncio.create_task(ws_server.start())
+    await ws_server.listening.wait()
+
+    loop = asyncio.get_running_loop()
+    process = psutil.Process()
+    lags = []
+    lag_task = asyncio.create_task(_sample_loop_lag(lags))
+    control = await loop.run_in_executor(
+        None,
+        lambda: Client(("127.0.0.1", args.control_port), authkey=CONTROL_AUTH_KEY),
+    )
+    try:
+        while True:
+            command = await loop.run_in_executor(None, control.recv)
+            if command == "stop":
+                break
+            if command == "reset":
+                lags.clear()
+                control.send({})
+            elif command == "sample":
+                control.send(_sample(process, ws_server, lags))
+    finally:
+        control.close()
+        lag_task.cancel()
+        server_task.cancel()
+
+
+# ---------------------------------------------------------------------------
+# 压测端：模拟设备连接并控制测试流程
+# ---------------------------------------------------------------------------
+
+
+class _FakeDevice:
+    def __init__(self, url, index, speaking):
+        self.url = url
+        self.device_id = f"footprint-{index:05d}"
+        self.speaking = speaking
+        self.ws = None
+        self.tasks = []
+
+    async def connect(self):
+        self.ws = await websockets.connect(
+            self.url,
+            additional_headers={"device-id": self.device_id, "client-id": "footprint"},
+            max_size=None,
+        )
+        await self.ws.send(
+            json.dumps(
+                {
+                    "type": "hello",
+                    "version": 1,
+                    "transport": "websocket",
+                    # 使用PCM上行，服务端不需要解码opus
+                    "audio_params": {
+                        "format": "pcm",
+                        "sample_rate": 16000,
+                        "channels": 1,
+                        "frame_duration": FRAME_DURATION_MS,
+                    },
+                }
+            )
+        )
+        self.tasks.append(asyncio.create_task(self._receive()))
+
+    async def _receive(self):
+        try:
+            async for _ in self.ws:
+                pass
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def _speak(self):
+        voice = b"\x01" * PCM_FRAME_BYTES
+        silence = b"\x00" * PCM_FRAME_BYTES
+        try:
+            while True:
+                for frame in [voice] * VOICE_FRAMES + [silence] * SILENCE_FRAMES:
+                    await self.ws.send(frame)
+                    await asyncio.sleep(FRAME_DURATION_MS / 1000)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    def start_speaking(self):
+        if self.speaking:
+            self.tasks.append(asyncio.create_task(self._speak()))
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.ws is not None:
+            await self.ws.close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _request(control, command):
+    loop = asyncio.get_running_loop()
+
+    def roundtrip():
+        control.send(command)
+        return control.recv()
+
+    return await loop.run_in_executor(None, roundtrip)
+
+
+async def _wait_sessions(control, expected, timeout):
+    deadline = time.monotonic() + timeout
+    sample = await _request(control, "sample")
+    while sample["sessions"] != expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+        sample = await _request(control, "sample")
+    return sample
+
+
+async def _measure(control, url, sessions, speaking, hold_seconds):
+    await asyncio.sleep(SETTLE_SECONDS)
+    baseline = await _request(control, "sample")
+
+    devices = [_FakeDevice(url, i, speaking) for i in range(sessions)]
+    # 分批建立连接，避免瞬时握手过多
+    for i in range(0, sessions, 50):
+        await asyncio.gather(*(d.connect() for d in devices[i : i + 50]))
+    await _wait_sessions(control, sessions, SESSION_READY_TIMEOUT)
+    # 等待各连接完成组件初始化
+    await asyncio.sleep(COMPONENT_INIT_SECONDS)
+
+    for device in devices:
+        device.start_speaking()
+    await _request(control, "reset")
+    await asyncio.sleep(hold_seconds)
+    loaded = await _request(control, "sample")
+
+    await asyncio.gather(*(d.close() for d in devices))
+    await _wait_sessions(control, 0, SESSION_READY_TIMEOUT)
+
+    def per_session(key):
+        return (loaded[key] - baseline[key]) / sessions
+
+    return {
+        "mode": "speaking" if speaking else "idle",
+        "sessions": sessions,
+        "connected": loaded["sessions"],
+        "rss_mb": loaded["rss_mb"],
+        "threads": loaded["threads"],
+        "fds": loaded["fds"],
+        "tasks": loaded["tasks"],
+        "per_session": {
+            "rss_kb": per_session("rss_mb") * 1024,
+            "threads": per_session("threads"),
+            "fds": per_session("fds"),
+            "tasks": per_session("tasks"),
+        },
+        "loop_lag_ms": loaded["loop_lag_ms"],
+    }
+
+
+async def run_benchmark(
+    session_counts=(10, 50, 100), hold_seconds=10, pipeline="thread", verbose=False
+):
+    port = _free_port()
+    listener = Listener(("127.0.0.1", 0), authkey=CONTROL_AUTH_KEY)
+    server_process = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--serve",
+            "--port",
+            str(port),
+            "--pipeline",
+            pipeline,
+            "--control-port",
+            str(listener.address[1]),
+        ],
+        cwd=PROJECT_DIR,
+        env={**os.environ, "PYTHONPATH": PROJECT_DIR},
+        stdout=None if verbose else subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.DEVNULL,
+    )
+    loop = asyncio.get_running_loop()
+    results = []
+    control = None
+    try:
+        # 服务端加载完成并开始监听后才会连接控制端口
+        control = await asyncio.wait_for(
+            loop.run_in_executor(None, listener.accept), SESSION_READY_TIMEOUT
+        )
+        url = f"ws://127.0.0.1:{port}/xiaozhi/v1/"
+        for speaking in (False, True):
+            for sessions in session_counts:
+                print(
+                    f"测试 {'说话' if speaking else '空闲'} 会话, {sessions} 个连接 ({pipeline}模式)..."
+                )
+                result = await _measure(control, url, sessions, speaking, hold_seconds)
+                result["pipeline"] = pipeline
+                results.append(result)
+    finally:
+        if control is not None:
+            try:
+                control.send("stop")
+            except OSError:
+                pass
+        listener.close()
+        try:
+            server_process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server_process.kill()
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """与基线对比每会话开销，返回超出容差的项"""
+    baseline_index = {(b["pipeline"], b["mode"], b["sessions"]): b for b in baseline}
+    # 线程数、文件描述符和协程数的绝对容差，避免小样本下的抖动
+    absolute_slack = {"rss_kb": 64, "threads": 0.2, "fds": 0.2, "tasks": 0.5}
+    violations = []
+    for result in results:
+        base = baseline_index.get((result["pipeline"], result["mode"], result["sessions"]))
+        if base is None:
+            continue
+        for key, slack in absolute_slack.items():
+            current = result["per_session"][key]
+            limit = base["per_session"][key] * (1 + tolerance) + slack
+            if current > limit:
+                violations.append(
+                    f"{result['pipeline']}/{result['mode']}/{result['sessions']}: "
+                    f"每会话{key} {current:.2f} 超过基线 {base['per_session'][key]:.2f}"
+                )
+    return violations
+
+
+def print_results(results):
+    headers = [
+        "模式",
+        "会话",
+        "连接数",
+        "RSS(MB)",
+        "每会话内存(KB)",
+        "每会话线程",
+        "每会话fd",
+        "每会话协程",
+        "循环延迟p99(ms)",
+        "循环延迟max(ms)",
+    ]
+    rows = [
+        [
+            r["pipeline"],
+            r["mode"],
+            r["sessions"],
+            f"{r['rss_mb']:.1f}",
+            f"{r['per_session']['rss_kb']:.1f}",
+            f"{r['per_session']['threads']:.2f}",
+            f"{r['per_session']['fds']:.2f}",
+            f"{r['per_session']['tasks']:.2f}",
+            f"{r['loop_lag_ms']['p99']:.1f}",
+            f"{r['loop_lag_ms']['max']:.1f}",
+        ]
+        for r in results
+    ]
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--hold", type=float, default=10, help="每组保持连接的秒数")
+    parser.add_argument(
+        "--pipeline", choices=["thread", "asyncio"], default="thread"
+    )
+    parser.add_argument("--output", help="结果JSON文件路径")
+    parser.add_argument("--baseline", help="基线JSON文件路径，超出容差时返回非0")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true", help="显示服务端日志")
+    # 以下参数仅供内部启动服务端子进程使用
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--control-port", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = _parse_args(argv)
+    results = await run_benchmark(
+        args.sessions, args.hold, args.pipeline, args.verbose
+    )
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        violations = compare_with_baseline(results, baseline, args.tolerance)
+        for violation in violations:
+            print(f"[回归] {violation}")
+        if violations:
+            return 1
+        print("每会话资源占用未超出基线")
+    return 0
+
+
+if __name__ == "__main__":
+    cli_args = _parse_args()
+    if cli_args.serve:
+        asyncio.run(_serve(cli_args))
+    else:
+        sys.exit(asyncio.run(main()))
@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+import argparse
+import statistics
+import numpy as np
+import onnxruntime
+from tabulate import tabulate
+from config.settings import load_config
+from core.inference_pool import InferencePool
+from core.providers.vad.silero import CONTEXT_SIZE, WINDOW_SIZE
+
+description = "推理进程池测试(进程内线程推理与进程池推理的吞吐及事件循环延迟对比)"
+
+# 每个任务推理的窗口数
+BATCH_WINDOWS = 64
+# 同时提交的任务数
+CONCURRENCY = 16
+# 每轮测试时长（秒）
+DURATION = 10
+WORKER_COUNTS = [1, 2, 4]
+# 事件循环心跳间隔（秒）
+TICK = 0.005
+
+
+def _get_model_path(model_dir=None):
+    if model_dir is None:
+        config = load_config()
+        vad_name = config["selected_module"]["VAD"]
+        model_dir = config["VAD"][vad_name]["model_dir"]
+    return os.path.join(model_dir, "src", "silero_vad", "data", "silero_vad.onnx")
+
+
+async def _heartbeat(stop, lags):
+    """记录事件循环心跳的延迟，反映事件循环是否被阻塞"""
+    while not stop.is_set():
+        due = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - due) * 1000)
+
+
+async def run_case(infer, duration, concurrency):
+    rng = np.random.default_rng(0)
+    inputs = rng.uniform(-0.3, 0.3, (BATCH_WINDOWS, CONTEXT_SIZE + WINDOW_SIZE))
+    inputs = inputs.astype(np.float32)
+    state = np.zeros((2, BATCH_WINDOWS, 128), dtype=np.float32)
+    deadline = time.perf_counter() + duration
+    done = 0
+
+    async def client():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            await infer(inputs, state)
+            done += 1
+
+    stop = asyncio.Event()
+    lags = []
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+    begin = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    wall = time.perf_counter() - begin
+    stop.set()
+    await heartbeat
+    lags.sort()
+    return {
+        "throughput": done * BATCH_WINDOWS / wall,
+        "lag_p50": statistics.median(lags),
+        "lag_p99": lags[int(len(lags) * 0.99)],
+        "lag_max": lags[-1],
+    }
+
+
+def make_thread_infer(model_path, threads):
+    """改造前的方式：服务进程内推理，放到线程池中执行"""
+    opts = onnxruntime.SessionOptions()
+    opts.inter_op_num_threads = 1
+    opts.intra_op_num_threads = 1
+    session = onnxruntime.InferenceSession(
+        model_path, providers=["CPUExecutionProvider"], sess_options=opts
+    )
+    sr = np.array(16000, dtype=np.int64)
+    semaphore = asyncio.Semaphore(threads)
+
+    async def infer(inputs, state):
+        async with semaphore:
+            return await asyncio.to_thread(
+                session.run, None, {"input": inputs, "state": state, "sr": sr}
+            )
+
+    return infer
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--model-dir", help="silero-vad模型目录，默认读取配置文件")
+    parser.add_argument("--duration", type=float, default=DURATION, help="每轮测试时长（秒）")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=WORKER_COUNTS, help="推理进程数/线程数"
+    )
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="并发任务数")
+    args = parser.parse_args(argv)
+
+    model_path = _get_model_path(args.model_dir)
+    rows = []
+    for workers in args.workers:
+        print(f"测试 {workers} 个推理线程 - 进程内...")
+        result = await run_case(
+            make_thread_infer(model_path, workers), args.duration, args.concurrency
+        )
+        rows.append(["进程内线程", workers, result])
+
+        print(f"测试 {workers} 个推理进程 - 进程池...")
+        pool = InferencePool(
+            {"vad": {"model_path": model_path, "threads": 1}}, workers=workers
+        )
+        try:
+            # 等待推理进程加载模型
+            await pool.run(
+                "vad",
+                [
+                    np.zeros((1, CONTEXT_SIZE + WINDOW_SIZE), dtype=np.float32),
+                    np.zeros((2, 1, 128), dtype=np.float32),
+                ],
+            )
+            result = await run_case(
+                lambda inputs, state: pool.run("vad", [inputs, state]),
+                args.duration,
+                args.concurrency,
+            )
+        finally:
+            pool.close()
+        rows.append(["推理进程池", workers, result])
+
+    headers = [
+        "方式",
+        "线程/进程数",
+        "吞吐(窗口/秒)",
+        "事件循环延迟P50(ms)",
+        "事件循环延迟P99(ms)",
+        "事件循环延迟最大(ms)",
+    ]
+    print(
+        tabulate(
+            [
+                [
+                    name,
+                    workers,
+                    f"{r['throughput']:.0f}",
+                    f"{r['lag_p50']:.2f}",
+                    f"{r['lag_p99']:.2f}",
+                    f"{r['lag_max']:.2f}",
+                ]
+                for name, workers, r in rows
+            ],
+            headers=headers,
+            tablefmt="github",
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
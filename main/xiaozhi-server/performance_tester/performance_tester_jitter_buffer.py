@@ -0,0 +1,183 @@
+import sys
+import time
+import random
+import argparse
+from tabulate import tabulate
+from core.utils.jitter_buffer import JitterBuffer
+
+description = "MQTT音频抖动缓冲测试(乱序/丢包/重复场景的输出顺序、丢包统计和处理耗时)"
+
+FRAME_DURATION = 60
+# 每个场景的音频包数（60ms一包，约10分钟音频）
+PACKETS = 10000
+# 网络传输的基础延迟（毫秒）
+BASE_DELAY = 40
+
+
+def make_trace(
+    packets,
+    reorder=0.0,
+    loss=0.0,
+    duplicate=0.0,
+    jitter=0,
+    pause_every=0,
+    pause_ms=0,
+    seed=0,
+):
+    """
+    生成合成的网关音频包序列，pause_every大于0时每发送该数量的包后停顿pause_ms毫秒（两句话之间）
+
+    Returns:
+        按到达时间排序的 (到达时间秒, 时间戳毫秒, 帧序号) 列表
+    """
+    rng = random.Random(seed)
+    arrivals = []
+    for seq in range(packets):
+        timestamp = seq * FRAME_DURATION
+        if pause_every:
+            timestamp += seq // pause_every * pause_ms
+        if rng.random() < loss:
+            continue
+        delay = BASE_DELAY + rng.uniform(0, jitter)
+        if rng.random() < reorder:
+            # 晚到1~3个包的时长
+            delay += FRAME_DURATION * rng.randint(1, 3)
+        arrivals.append(((timestamp + delay) / 1000, timestamp, seq))
+        if rng.random() < duplicate:
+            arrivals.append(((timestamp + delay + 5) / 1000, timestamp, seq))
+    arrivals.sort(key=lambda item: item[0])
+    return arrivals
+
+
+class LegacyReorder:
+    """改造前connection中基于字典排序的重排逻辑，用于对比"""
+
+    def __init__(self):
+        self.buffer = {}
+        self.last = 0
+        self.max_size = 20
+
+    def push(self, timestamp, data):
+        out = []
+        if timestamp >= self.last:
+            out.append(data)
+            self.last = timestamp
+            processed_any = True
+            while processed_any:
+                processed_any = False
+                for ts in sorted(self.buffer.keys()):
+                    if ts > self.last:
+                        out.append(self.buffer.pop(ts))
+                        self.last = ts
+                        processed_any = True
+                        break
+        elif len(self.buffer) < self.max_size:
+            self.buffer[timestamp] = data
+        else:
+            out.append(data)
+        return out
+
+
+def count_inversions(sequence):
+    """输出序列中比前一个包更早的包数"""
+    return sum(1 for prev, cur in zip(sequence, sequence[1:]) if cur < prev)
+
+
+def run_jitter_buffer(trace, playout_delay):
+    buffer = JitterBuffer(playout_delay=playout_delay, frame_duration=FRAME_DURATION)
+    output = []
+    hold_ms = []
+    arrived = {}
+    begin = time.perf_counter()
+    for now, timestamp, seq in trace:
+        arrived.setdefault(seq, now)
+        # 模拟连接中的定时输出
+        released = buffer.pop_ready(now) + buffer.push(timestamp, seq, now)
+        for item in released:
+            output.append(item)
+            hold_ms.append((now - arrived[item]) * 1000)
+    output.extend(buffer.flush())
+    elapsed = time.perf_counter() - begin
+    return output, buffer.stats, hold_ms, elapsed
+
+
+def run_legacy(trace):
+    legacy = LegacyReorder()
+    output = []
+    begin = time.perf_counter()
+    for _, timestamp, seq in trace:
+        output.extend(legacy.push(timestamp, seq))
+    elapsed = time.perf_counter() - begin
+    return output, elapsed
+
+
+SCENARIOS = [
+    ("顺序到达", {}),
+    ("5%乱序", {"reorder": 0.05, "jitter": 20}),
+    ("20%乱序", {"reorder": 0.2, "jitter": 40}),
+    ("3%丢包", {"loss": 0.03, "jitter": 20}),
+    ("乱序+丢包+重复", {"reorder": 0.1, "loss": 0.05, "duplicate": 0.02, "jitter": 40}),
+    ("说话间歇", {"pause_every": 50, "pause_ms": 2000, "jitter": 20}),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--packets", type=int, default=PACKETS, help="每个场景的音频包数")
+    parser.add_argument(
+        "--playout-delay", type=int, default=120, help="抖动缓冲等待空缺的毫秒数"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    rows = []
+    failed = False
+    for name, params in SCENARIOS:
+        trace = make_trace(args.packets, seed=args.seed, **params)
+        expected_loss = args.packets - len({seq for _, _, seq in trace})
+        output, stats, hold_ms, elapsed = run_jitter_buffer(trace, args.playout_delay)
+        legacy_output, legacy_elapsed = run_legacy(trace)
+        inversions = count_inversions(output)
+        # 输出必须严格有序且不重复
+        if inversions or len(output) != len(set(output)):
+            failed = True
+        hold_ms.sort()
+        rows.append(
+            [
+                name,
+                len(trace),
+                stats["reordered"],
+                stats["late"],
+                stats["duplicate"],
+                f"{stats['lost']}/{expected_loss}",
+                inversions,
+                count_inversions(legacy_output),
+                f"{hold_ms[len(hold_ms) // 2]:.0f}",
+                f"{hold_ms[int(len(hold_ms) * 0.99)]:.0f}",
+                f"{elapsed / len(trace) * 1e6:.2f}",
+                f"{legacy_elapsed / len(trace) * 1e6:.2f}",
+            ]
+        )
+
+    headers = [
+        "场景",
+        "到达包数",
+        "乱序",
+        "迟到丢弃",
+        "重复",
+        "跳过空缺/网络丢包",
+        "输出逆序",
+        "旧逻辑输出逆序",
+        "等待P50(ms)",
+        "等待P99(ms)",
+        "耗时(us/包)",
+        "旧逻辑耗时(us/包)",
+    ]
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+    if failed:
+        print("错误：抖动缓冲输出存在逆序或重复的音频包")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import wave
+import random
+import asyncio
+import argparse
+import statistics
+import numpy as np
+from tabulate import tabulate
+from config.settings import load_config
+from core.providers.asr.sherpa_onnx_stream import get_shared_recognizer
+
+description = "本地sherpa-onnx流式识别测试(边说边识别与说完再识别的首个中间结果及最终结果延迟对比)"
+
+SAMPLE_RATE = 16000
+# 每个音频包的采样点数（60ms）
+PACKET_SAMPLES = 960
+CONCURRENCY = [1, 4, 8]
+# 每路连接识别的语音条数
+ROUNDS = 5
+# 仓库自带的测试语音
+TEST_CLIPS = [
+    "config/assets/wakeup_words_short.wav",
+    "config/assets/bind_not_found.wav",
+    "config/assets/max_output_size.wav",
+] + [f"config/assets/bind_code/{digit}.wav" for digit in range(10)]
+
+
+def read_pcm(path):
+    """读取wav并转换为16kHz单声道16位PCM"""
+    with wave.open(path, "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        rate = wav_file.getframerate()
+        samples = np.frombuffer(
+            wav_file.readframes(wav_file.getnframes()), dtype=np.int16
+        )
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        duration = len(samples) / rate
+        target = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+        samples = np.interp(target, np.arange(len(samples)) / rate, samples)
+    return samples.astype(np.int16).tobytes()
+
+
+def split_packets(pcm_bytes):
+    size = PACKET_SAMPLES * 2
+    return [pcm_bytes[i : i + size] for i in range(0, len(pcm_bytes), size)]
+
+
+async def _client(index, shared, utterances, rounds, streaming, results):
+    """模拟一个连接：按实时速度发送音频包，发送完毕即视为VAD检测到说话结束"""
+    rng = random.Random(index)
+    packet_seconds = PACKET_SAMPLES / SAMPLE_RATE
+    for _ in range(rounds):
+        packets = rng.choice(utterances)
+        session = shared.create_session()
+        for packet in packets:
+            if streaming:
+                session.feed(packet)
+            await asyncio.sleep(packet_seconds)
+        if not streaming:
+            # 改造前的方式：说话结束后才把整段音频送去识别
+            for packet in packets:
+                session.feed(packet)
+        text = await session.finish()
+        results.append((session.first_partial_ms, session.final_ms, text))
+        await asyncio.sleep(rng.uniform(0, 0.5))
+
+
+async def run_case(shared, utterances, concurrency, rounds, streaming):
+    results = []
+    await asyncio.gather(
+        *[
+            _client(i, shared, utterances, rounds, streaming, results)
+            for i in range(concurrency)
+        ]
+    )
+    first_partials = sorted(r[0] for r in results if r[0] is not None)
+    finals = sorted(r[1] for r in results)
+    return {
+        "utterances": len(results),
+        "first_p50": statistics.median(first_partials) if first_partials else 0,
+        "final_p50": statistics.median(finals),
+        "final_p99": finals[min(len(finals) - 1, int(len(finals) * 0.99))],
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--asr", default="SherpaStreamASR", help="配置文件中的流式ASR名称"
+    )
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="每路连接识别的语音条数")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=CONCURRENCY, help="并发连接数"
+    )
+    args = parser.parse_args(argv)
+
+    utterances = [
+        split_packets(read_pcm(path)) for path in TEST_CLIPS if os.path.exists(path)
+    ]
+    if not utterances:
+        print("没有找到测试语音")
+        return
+
+    shared = get_shared_recognizer(load_config()["ASR"][args.asr])
+    # 预热
+    session = shared.create_session()
+    for packet in utterances[0]:
+        session.feed(packet)
+    await session.finish()
+
+    rows = []
+    for concurrency in args.concurrency:
+        for name, streaming in (("说完再识别", False), ("边说边识别", True)):
+            print(f"测试 {concurrency} 路并发 - {name}...")
+            result = await run_case(
+                shared, utterances, concurrency, args.rounds, streaming
+            )
+            rows.append(
+                [
+                    concurrency,
+                    name,
+                    result["utterances"],
+                    f"{result['first_p50']:.0f}" if streaming else "-",
+                    f"{result['final_p50']:.0f}",
+                    f"{result['final_p99']:.0f}",
+                ]
+            )
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "并发连接",
+                "方式",
+                "识别条数",
+                "首个中间结果P50(ms)",
+                "结束后出结果P50(ms)",
+                "结束后出结果P99(ms)",
+            ],
+            tablefmt="github",
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+import time
+import queue
+import asyncio
+import threading
+import statistics
+from tabulate import tabulate
+from core.utils.loop_queue import LoopQueue
+
+description = "会话流水线模式(thread/asyncio)线程数与单包延迟对比测试"
+
+# 设备上行音频包间隔（毫秒）
+PACKET_INTERVAL_MS = 60
+
+
+class _ThreadSession:
+    """模拟thread模式下的连接：ASR、TTS文本、音频播放、上报各一个线程"""
+
+    def __init__(self, loop, latencies):
+        self.loop = loop
+        self.latencies = latencies
+        self.stop_event = threading.Event()
+        self.asr_audio_queue = queue.Queue()
+        self.tts_text_queue = queue.Queue()
+        self.tts_audio_queue = queue.Queue()
+        self.report_queue = queue.Queue()
+        self.threads = [
+            threading.Thread(target=self._asr_thread, daemon=True),
+            threading.Thread(target=self._idle_thread, args=(self.tts_text_queue, 1), daemon=True),
+            threading.Thread(target=self._idle_thread, args=(self.tts_audio_queue, 0.1), daemon=True),
+            threading.Thread(target=self._idle_thread, args=(self.report_queue, 1), daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    async def _handle(self, enqueue_time):
+        self.latencies.append(time.perf_counter() - enqueue_time)
+
+    def _asr_thread(self):
+        while not self.stop_event.is_set():
+            try:
+                enqueue_time = self.asr_audio_queue.get(timeout=1)
+                asyncio.run_coroutine_threadsafe(
+                    self._handle(enqueue_time), self.loop
+                ).result()
+            except queue.Empty:
+                continue
+
+    def _idle_thread(self, q, timeout):
+        while not self.stop_event.is_set():
+            try:
+                q.get(timeout=timeout)
+            except queue.Empty:
+                continue
+
+    def feed(self):
+        self.asr_audio_queue.put(time.perf_counter())
+
+    async def close(self):
+        self.stop_event.set()
+
+
+class _AsyncSession:
+    """模拟asyncio模式下的连接：各阶段为协程，通过LoopQueue衔接"""
+
+    def __init__(self, loop, latencies):
+        self.latencies = latencies
+        self.asr_audio_queue = LoopQueue(loop)
+        self.tasks = [
+            asyncio.create_task(self._asr_task()),
+            asyncio.create_task(self._idle_task(LoopQueue(loop))),
+            asyncio.create_task(self._idle_task(LoopQueue(loop))),
+            asyncio.create_task(self._idle_task(LoopQueue(loop))),
+        ]
+
+    async def _asr_task(self):
+        while True:
+            enqueue_time = await self.asr_audio_queue.get()
+            self.latencies.append(time.perf_counter() - enqueue_time)
+
+    async def _idle_task(self, q):
+        while True:
+            await q.get()
+
+    def feed(self):
+        self.asr_audio_queue.put(time.perf_counter())
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+async def _run_mode(mode, sessions_count, duration):
+    loop = asyncio.get_running_loop()
+    latencies = []
+    base_threads = threading.active_count()
+    session_cls = _ThreadSession if mode == "thread" else _AsyncSession
+    sessions = [session_cls(loop, latencies) for _ in range(sessions_count)]
+    threads_per_conn = (threading.active_count() - base_threads) / sessions_count
+
+    cpu_start = time.process_time()
+    end_time = time.monotonic() + duration
+    while time.monotonic() < end_time:
+        for session in sessions:
+            session.feed()
+        await asyncio.sleep(PACKET_INTERVAL_MS / 1000)
+    # 等待剩余的包处理完成
+    await asyncio.sleep(0.5)
+    cpu_used = time.process_time() - cpu_start
+
+    for session in sessions:
+        await session.close()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "sessions": sessions_count,
+        "threads_per_conn": threads_per_conn,
+        "packets": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0,
+        "cpu_s": cpu_used,
+    }
+
+
+async def run_benchmark(session_counts=(10, 100, 300), duration=5):
+    results = []
+    for sessions_count in session_counts:
+        for mode in ("thread", "asyncio"):
+            print(f"测试 {mode} 模式, {sessions_count} 个连接...")
+            results.append(await _run_mode(mode, sessions_count, duration))
+            # 等待线程模式的线程退出
+            await asyncio.sleep(1.5)
+    return results
+
+
+def print_results(results):
+    headers = ["模式", "连接数", "每连接线程数", "处理包数", "单包延迟p50(ms)", "单包延迟p99(ms)", "CPU时间(s)"]
+    rows = [
+        [
+            r["mode"],
+            r["sessions"],
+            f"{r['threads_per_conn']:.1f}",
+            r["packets"],
+            f"{r['p50_ms']:.3f}",
+            f"{r['p99_ms']:.3f}",
+            f"{r['cpu_s']:.2f}",
+        ]
+        for r in results
+    ]
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+
+
+async def main():
+    results = await run_benchmark()
+    print_results(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
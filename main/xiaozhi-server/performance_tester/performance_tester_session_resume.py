@@ -0,0 +1,113 @@
+import json
+import time
+import asyncio
+import statistics
+import websockets
+from tabulate import tabulate
+from config.settings import load_config
+
+description = "断线重连首次响应耗时测试(会话恢复开启/未命中对比)"
+
+# 测试使用的设备ID，需要是已在智控台绑定的设备；未使用智控台时可以任意填写
+DEVICE_ID = "11:22:33:44:55:66"
+CLIENT_ID = "performance-tester"
+TEST_TEXT = "你好，今天天气怎么样"
+ROUNDS = 3
+# 等待首次响应的超时时间（秒）
+RESPONSE_TIMEOUT = 30
+
+
+def _get_server_url(config):
+    port = int(config["server"].get("port", 8000))
+    return f"ws://127.0.0.1:{port}/xiaozhi/v1/"
+
+
+async def _measure_first_response(url):
+    """
+    建立连接并发送一句文本，返回从开始连接到收到第一句TTS的耗时（毫秒）
+    连接建立后立即断开，模拟设备网络抖动
+    """
+    headers = {"device-id": DEVICE_ID, "client-id": CLIENT_ID}
+    start_time = time.perf_counter()
+    async with websockets.connect(url, additional_headers=headers) as ws:
+        await ws.send(
+            json.dumps(
+                {
+                    "type": "hello",
+                    "version": 1,
+                    "transport": "websocket",
+                    "audio_params": {
+                        "format": "opus",
+                        "sample_rate": 16000,
+                        "channels": 1,
+                        "frame_duration": 60,
+                    },
+                }
+            )
+        )
+        await ws.send(
+            json.dumps(
+                {"type": "listen", "state": "detect", "mode": "auto", "text": TEST_TEXT}
+            )
+        )
+        deadline = time.perf_counter() + RESPONSE_TIMEOUT
+        while time.perf_counter() < deadline:
+            message = await asyncio.wait_for(
+                ws.recv(), timeout=deadline - time.perf_counter()
+            )
+            if isinstance(message, bytes):
+                # 第一帧音频
+                return (time.perf_counter() - start_time) * 1000
+            msg_json = json.loads(message)
+            if msg_json.get("type") == "tts" and msg_json.get("state") == "sentence_start":
+                return (time.perf_counter() - start_time) * 1000
+    return None
+
+
+async def run_benchmark(url, resume_ttl):
+    cold, resumed = [], []
+    for i in range(ROUNDS):
+        # 等待快照过期，测量冷启动
+        print(f"第{i + 1}轮：等待{resume_ttl + 1:.0f}秒让会话快照过期...")
+        await asyncio.sleep(resume_ttl + 1)
+        latency = await _measure_first_response(url)
+        if latency is not None:
+            cold.append(latency)
+        # 断开后立即重连，命中会话快照
+        await asyncio.sleep(1)
+        latency = await _measure_first_response(url)
+        if latency is not None:
+            resumed.append(latency)
+    return cold, resumed
+
+
+def print_results(cold, resumed):
+    def summarize(name, samples):
+        if not samples:
+            return [name, 0, "-", "-", "-"]
+        return [
+            name,
+            len(samples),
+            f"{statistics.mean(samples):.0f}",
+            f"{statistics.median(samples):.0f}",
+            f"{max(samples):.0f}",
+        ]
+
+    headers = ["场景", "有效次数", "平均耗时(ms)", "中位数(ms)", "最大值(ms)"]
+    rows = [summarize("冷启动", cold), summarize("断线重连", resumed)]
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+
+
+async def main():
+    config = load_config()
+    resume_config = config["server"].get("session_resume", {})
+    if not resume_config.get("enabled", False):
+        print("提示：server.session_resume.enabled 未开启，两组结果都将是冷启动耗时")
+    cold, resumed = await run_benchmark(
+        _get_server_url(config), float(resume_config.get("ttl", 60))
+    )
+    print_results(cold, resumed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,389 @@
+import os
+import json
+import time
+import wave
+import asyncio
+import argparse
+import statistics
+from types import SimpleNamespace
+import numpy as np
+import opuslib_next
+from tabulate import tabulate
+from core.providers.vad.silero import VADProvider, WINDOW_SIZE
+from core.utils.vad_framer import VADFramer, VoiceWindow
+
+description = "Silero VAD吞吐与准确率测试(多路并发回放Opus音频流，统计单包延迟、窗口吞吐、CPU占用及语音起止时间误差)"
+
+MODEL_DIR = "models/snakers4_silero-vad"
+SAMPLE_RATE = 16000
+# 设备上传的Opus包时长
+FRAME_MS = 60
+FRAME_SIZE = SAMPLE_RATE * FRAME_MS // 1000
+CONNECTION_COUNTS = [1, 10, 50]
+# 检测到的起止时间与标注相差超过该毫秒数时视为未匹配
+MATCH_TOLERANCE_MS = 500
+
+# 未指定 --data 时，使用仓库自带的短音频拼接成带静音间隔的测试流
+BUILTIN_CLIPS = ["config/assets/wakeup_words_short.wav"] + [
+    f"config/assets/bind_code/{digit}.wav" for digit in range(10)
+]
+LEADING_SILENCE = 1.5
+GAP_SILENCE = 2.0
+
+USAGE = """
+可以通过 --data 指定标注录音目录，目录中每个录音为wav文件，并附带同名的json标注文件，
+标注语音段的起止秒数，例如 hello.wav 对应 hello.json：
+{"speech": [[0.8, 2.4], [5.1, 7.0]]}
+"""
+
+
+def read_wav(path):
+    """读取wav并转换为16kHz单声道int16"""
+    with wave.open(path, "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        rate = wav_file.getframerate()
+        if wav_file.getsampwidth() != 2:
+            raise ValueError(f"只支持16位wav: {path}")
+        samples = np.frombuffer(
+            wav_file.readframes(wav_file.getnframes()), dtype=np.int16
+        )
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        duration = len(samples) / rate
+        target = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+        samples = np.interp(target, np.arange(len(samples)) / rate, samples)
+    return samples.astype(np.int16)
+
+
+def trim_speech(samples, ratio=0.05):
+    """按能量找出片段中语音的起止采样点"""
+    frame = SAMPLE_RATE // 100
+    count = len(samples) // frame
+    rms = np.sqrt(
+        np.mean(
+            samples[: count * frame].astype(np.float32).reshape(count, frame) ** 2,
+            axis=1,
+        )
+    )
+    voiced = np.nonzero(rms > rms.max() * ratio)[0]
+    if len(voiced) == 0:
+        return None
+    return voiced[0] * frame, (voiced[-1] + 1) * frame
+
+
+def build_builtin_stream():
+    """把自带的短音频用静音隔开拼接成一条测试流，标注由各片段的能量自动得出"""
+    rng = np.random.default_rng(0)
+    parts = [np.zeros(int(LEADING_SILENCE * SAMPLE_RATE), dtype=np.int16)]
+    segments = []
+    offset = len(parts[0])
+    for path in BUILTIN_CLIPS:
+        if not os.path.exists(path):
+            continue
+        clip = read_wav(path)
+        bounds = trim_speech(clip)
+        if bounds is None:
+            continue
+        segments.append(
+            [(offset + bounds[0]) / SAMPLE_RATE, (offset + bounds[1]) / SAMPLE_RATE]
+        )
+        gap = np.zeros(int(GAP_SILENCE * SAMPLE_RATE), dtype=np.int16)
+        parts.extend([clip, gap])
+        offset += len(clip) + len(gap)
+    samples = np.concatenate(parts)
+    # 加入约-60dBFS的底噪，更接近真实设备
+    noise = rng.normal(0, 30, len(samples))
+    samples = np.clip(samples + noise, -32768, 32767).astype(np.int16)
+    return [("builtin", samples, segments)]
+
+
+def load_dataset(data_dir):
+    dataset = []
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith(".wav"):
+            continue
+        label_path = os.path.join(data_dir, name[:-4] + ".json")
+        if not os.path.exists(label_path):
+            print(f"跳过没有标注的录音: {name}")
+            continue
+        with open(label_path, "r", encoding="utf-8") as f:
+            segments = json.load(f)["speech"]
+        dataset.append((name, read_wav(os.path.join(data_dir, name)), segments))
+    return dataset
+
+
+def encode_opus(samples):
+    """按60ms编码为Opus包，与设备上传的音频一致"""
+    encoder = opuslib_next.Encoder(SAMPLE_RATE, 1, opuslib_next.APPLICATION_VOIP)
+    packets = []
+    for offset in range(0, len(samples) - FRAME_SIZE + 1, FRAME_SIZE):
+        packets.append(
+            encoder.encode(samples[offset : offset + FRAME_SIZE].tobytes(), FRAME_SIZE)
+        )
+    return packets
+
+
+def _new_conn():
+    return SimpleNamespace(
+        client_listen_mode="auto",
+        client_audio_buffer=VADFramer(),
+        client_voice_window=VoiceWindow(maxlen=5),
+        client_have_voice=False,
+        client_voice_stop=False,
+        last_is_voice=False,
+        last_activity_time=0.0,
+    )
+
+
+class StreamTracker:
+    """
+    按音频流时间（而非墙上时间）判断说话开始和结束，与连接中的流程一致：
+    VAD判断有人说话即为开始，之后连续静音达到min_silence_duration_ms即为结束，并重置VAD状态
+    """
+
+    def __init__(self, silence_threshold_ms):
+        self.silence_threshold_ms = silence_threshold_ms
+        self.segments = []
+        self._start = None
+        self._last_voice = 0.0
+
+    def update(self, conn, have_voice, stream_ms):
+        # 结束判断由这里按音频流时间完成，忽略VAD按墙上时间给出的结果
+        conn.client_voice_stop = False
+        if have_voice:
+            if self._start is None:
+                self._start = stream_ms
+            self._last_voice = stream_ms
+            return
+        if (
+            self._start is not None
+            and stream_ms - self._last_voice >= self.silence_threshold_ms
+        ):
+            self.segments.append((self._start, stream_ms))
+            self._start = None
+            conn.client_have_voice = False
+            conn.client_voice_window.clear()
+            conn.last_is_voice = False
+
+    def finish(self, stream_ms):
+        if self._start is not None:
+            self.segments.append((self._start, stream_ms))
+            self._start = None
+
+
+async def replay(vad, packets, realtime, latencies, tracker=None):
+    """回放一路音频流，记录每个音频包的处理延迟"""
+    conn = _new_conn()
+    begin = time.perf_counter()
+    for index, packet in enumerate(packets):
+        due = begin + index * FRAME_MS / 1000
+        if realtime:
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            # 让出事件循环，使各路音频流交替执行
+            await asyncio.sleep(0)
+            due = time.perf_counter()
+        have_voice = await vad.is_vad_async(conn, packet)
+        latencies.append((time.perf_counter() - due) * 1000)
+        if tracker is not None:
+            tracker.update(conn, have_voice, (index + 1) * FRAME_MS)
+    if tracker is not None:
+        tracker.finish(len(packets) * FRAME_MS)
+
+
+async def run_case(vad, packets, connections, realtime):
+    latencies = []
+    cpu_begin = time.process_time()
+    wall_begin = time.perf_counter()
+    await asyncio.gather(
+        *[replay(vad, packets, realtime, latencies) for _ in range(connections)]
+    )
+    wall = time.perf_counter() - wall_begin
+    cpu = time.process_time() - cpu_begin
+    latencies.sort()
+    windows = len(packets) * FRAME_SIZE // WINDOW_SIZE * connections
+    return {
+        "packets": len(latencies),
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "windows_per_second": windows / wall,
+        "cpu_per_stream": cpu / wall / connections * 100,
+        # 处理一路音频流的耗时相对音频时长的比例
+        "rtf": wall / (len(packets) * FRAME_MS / 1000),
+    }
+
+
+def match_segments(detected, labels):
+    """按起点最近原则把检测到的语音段与标注匹配，返回起止误差及漏检、误检数"""
+    start_errors, stop_errors = [], []
+    used = set()
+    for label_start, label_end in labels:
+        best = None
+        for i, (start, stop) in enumerate(detected):
+            if i in used:
+                continue
+            error = start - label_start * 1000
+            if abs(error) <= MATCH_TOLERANCE_MS and (
+                best is None or abs(error) < abs(best[1])
+            ):
+                best = (i, error)
+        if best is None:
+            continue
+        used.add(best[0])
+        start_errors.append(best[1])
+        stop_errors.append(detected[best[0]][1] - label_end * 1000)
+    return {
+        "labels": len(labels),
+        "detected": len(detected),
+        "matched": len(start_errors),
+        "missed": len(labels) - len(start_errors),
+        "false": len(detected) - len(start_errors),
+        "start_errors": start_errors,
+        "stop_errors": stop_errors,
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--data", help="标注录音目录，默认使用仓库自带的音频")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="silero-vad模型目录")
+    parser.add_argument(
+        "--connections",
+        type=int,
+        nargs="+",
+        default=CONNECTION_COUNTS,
+        help="并发连接数",
+    )
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="按60ms的实际间隔发送音频包（默认尽快发送，测试最大吞吐）",
+    )
+    parser.add_argument("--threshold", type=float, default=0.5, help="语音概率阈值")
+    parser.add_argument("--threshold-low", type=float, default=0.3, help="语音概率低阈值")
+    parser.add_argument(
+        "--min-silence-ms", type=int, default=1000, help="判定说话结束的静音毫秒数"
+    )
+    args = parser.parse_args(argv)
+
+    if args.data:
+        if not os.path.isdir(args.data):
+            print(USAGE)
+            return
+        dataset = load_dataset(args.data)
+    else:
+        dataset = build_builtin_stream()
+    if not dataset:
+        print("没有可用的测试音频")
+        return
+
+    vad = VADProvider(
+        {
+            "model_dir": args.model_dir,
+            "threshold": args.threshold,
+            "threshold_low": args.threshold_low,
+            "min_silence_duration_ms": args.min_silence_ms,
+        }
+    )
+
+    # 准确率：逐个录音单路回放，按音频流时间比较语音起止
+    accuracy_rows = []
+    start_errors, stop_errors = [], []
+    totals = {"labels": 0, "matched": 0, "missed": 0, "false": 0}
+    all_packets = []
+    for name, samples, segments in dataset:
+        packets = encode_opus(samples)
+        all_packets.extend(packets)
+        tracker = StreamTracker(args.min_silence_ms)
+        await replay(vad, packets, False, [], tracker)
+        result = match_segments(tracker.segments, segments)
+        start_errors.extend(result["start_errors"])
+        stop_errors.extend(result["stop_errors"])
+        for key in totals:
+            totals[key] += result[key]
+        accuracy_rows.append(
+            [
+                name,
+                result["labels"],
+                result["detected"],
+                result["matched"],
+                result["missed"],
+                result["false"],
+                _mean(result["start_errors"]),
+                _mean(result["stop_errors"]),
+            ]
+        )
+    accuracy_rows.append(
+        [
+            "合计",
+            totals["labels"],
+            sum(row[2] for row in accuracy_rows),
+            totals["matched"],
+            totals["missed"],
+            totals["false"],
+            _mean(start_errors),
+            _mean(stop_errors),
+        ]
+    )
+    print(
+        tabulate(
+            accuracy_rows,
+            headers=[
+                "录音",
+                "标注语音段",
+                "检测语音段",
+                "匹配",
+                "漏检",
+                "误检",
+                "起点误差均值(ms)",
+                "终点误差均值(ms)",
+            ],
+            tablefmt="github",
+        )
+    )
+    print(
+        f"终点误差包含判定说话结束所需的{args.min_silence_ms}ms静音；"
+        f"起点与标注相差超过{MATCH_TOLERANCE_MS}ms视为未匹配"
+    )
+
+    # 吞吐：多路连接同时回放全部录音
+    rows = []
+    for connections in args.connections:
+        print(f"测试 {connections} 路并发连接...")
+        result = await run_case(vad, all_packets, connections, args.realtime)
+        rows.append(
+            [
+                connections,
+                result["packets"],
+                f"{result['p50']:.3f}",
+                f"{result['p99']:.3f}",
+                f"{result['windows_per_second']:.0f}",
+                f"{result['cpu_per_stream']:.2f}%",
+                f"{result['rtf']:.3f}",
+            ]
+        )
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "并发连接",
+                "音频包数",
+                "单包延迟P50(ms)",
+                "单包延迟P99(ms)",
+                "窗口吞吐(个/秒)",
+                "单路CPU占用",
+                "实时率",
+            ],
+            tablefmt="github",
+        )
+    )
+
+
+def _mean(values):
+    return f"{statistics.mean(values):.0f}" if values else "-"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
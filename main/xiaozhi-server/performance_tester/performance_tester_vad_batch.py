@@ -0,0 +1,151 @@
+import os
+import time
+import asyncio
+import argparse
+import statistics
+import numpy as np
+import onnxruntime
+from tabulate import tabulate
+from config.settings import load_config
+from core.providers.vad.silero import BatchScheduler, CONTEXT_SIZE, WINDOW_SIZE
+
+description = "Silero VAD跨连接批量推理测试(10/100/500路实时音频流的延迟与吞吐)"
+
+STREAM_COUNTS = [10, 100, 500]
+# 每路音频流的测试时长（秒）
+DURATION = 10
+# 一个推理窗口对应的音频时长（秒）
+WINDOW_SECONDS = WINDOW_SIZE / 16000
+
+
+def _get_model_path(config, model_dir=None):
+    if model_dir is None:
+        vad_name = config["selected_module"]["VAD"]
+        model_dir = config["VAD"][vad_name]["model_dir"]
+    return os.path.join(model_dir, "src", "silero_vad", "data", "silero_vad.onnx")
+
+
+def _create_session(model_path, threads):
+    opts = onnxruntime.SessionOptions()
+    opts.inter_op_num_threads = 1
+    opts.intra_op_num_threads = threads
+    return onnxruntime.InferenceSession(
+        model_path, providers=["CPUExecutionProvider"], sess_options=opts
+    )
+
+
+def _make_window(rng):
+    """带上下文的随机输入窗口"""
+    return rng.uniform(-0.3, 0.3, (1, CONTEXT_SIZE + WINDOW_SIZE)).astype(np.float32)
+
+
+async def _stream(index, infer, duration, latencies):
+    """模拟一路实时音频流：每32ms产生一个窗口，记录从窗口产生到拿到结果的耗时"""
+    rng = np.random.default_rng(index)
+    state = np.zeros((2, 1, 128), dtype=np.float32)
+    # 错开各路音频流的起始时间
+    start = time.perf_counter() + (index % 32) * WINDOW_SECONDS / 32
+    tick = 0
+    while True:
+        due = start + tick * WINDOW_SECONDS
+        if due - start >= duration:
+            return
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        _, state = await infer(_make_window(rng), state)
+        latencies.append((time.perf_counter() - due) * 1000)
+        tick += 1
+
+
+async def run_case(streams, duration, infer):
+    latencies = []
+    cpu_begin = time.process_time()
+    wall_begin = time.perf_counter()
+    await asyncio.gather(
+        *[_stream(i, infer, duration, latencies) for i in range(streams)]
+    )
+    wall = time.perf_counter() - wall_begin
+    cpu = time.process_time() - cpu_begin
+    latencies.sort()
+    return {
+        "windows": len(latencies),
+        "throughput": len(latencies) / wall,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "cpu": cpu / wall * 100,
+        # 实时音频流需要的窗口数，吞吐跟不上时处理会越来越滞后
+        "realtime": len(latencies) / (streams * duration / WINDOW_SECONDS) * 100,
+    }
+
+
+def make_single_infer(session):
+    """改造前的方式：每个窗口在事件循环中单独推理"""
+    sr = np.array(16000, dtype=np.int64)
+
+    async def infer(audio_input, state):
+        out, new_state = session.run(
+            None, {"input": audio_input, "state": state, "sr": sr}
+        )
+        return out.item(), new_state
+
+    return infer
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--model-dir", help="silero-vad模型目录，默认读取配置文件")
+    parser.add_argument("--duration", type=float, default=DURATION, help="每轮测试时长（秒）")
+    parser.add_argument(
+        "--streams", type=int, nargs="+", default=STREAM_COUNTS, help="并发音频流数"
+    )
+    parser.add_argument("--max-wait-ms", type=float, default=3, help="批量等待时间（毫秒）")
+    parser.add_argument("--threads", type=int, default=2, help="批量推理线程数")
+    args = parser.parse_args(argv)
+
+    model_path = _get_model_path(
+        load_config() if args.model_dir is None else None, args.model_dir
+    )
+    single_session = _create_session(model_path, 1)
+    scheduler = BatchScheduler(
+        _create_session(model_path, args.threads), max_wait_ms=args.max_wait_ms
+    )
+
+    rows = []
+    for streams in args.streams:
+        for name, infer in (
+            ("逐窗口推理", make_single_infer(single_session)),
+            ("批量推理", scheduler.infer),
+        ):
+            print(f"测试 {streams} 路音频流 - {name}...")
+            result = await run_case(streams, args.duration, infer)
+            rows.append(
+                [
+                    streams,
+                    name,
+                    result["windows"],
+                    f"{result['throughput']:.0f}",
+                    f"{result['realtime']:.1f}%",
+                    f"{result['p50']:.2f}",
+                    f"{result['p99']:.2f}",
+                    f"{result['cpu']:.0f}%",
+                ]
+            )
+
+    headers = [
+        "音频流数",
+        "方式",
+        "窗口数",
+        "吞吐(窗口/秒)",
+        "实时完成率",
+        "延迟P50(ms)",
+        "延迟P99(ms)",
+        "CPU占用",
+    ]
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+    metrics = scheduler.get_metrics()
+    print(f"批量推理统计: 平均批大小 {metrics['avg_batch']:.1f}，最大批大小 {metrics['max_batch']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
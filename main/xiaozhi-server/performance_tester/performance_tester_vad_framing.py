@@ -0,0 +1,136 @@
+import time
+import argparse
+import tracemalloc
+from collections import deque
+import numpy as np
+from tabulate import tabulate
+from core.utils.vad_framer import VADFramer, VoiceWindow
+
+description = "VAD分帧微基准(改造前后每个音频包的处理耗时和临时内存分配，不含模型推理)"
+
+WINDOW_SIZE = 512
+CONTEXT_SIZE = 64
+# 60ms音频包
+PACKET_SAMPLES = 960
+PACKETS = 20000
+
+
+def legacy_framing(state, pcm):
+    """改造前silero.py中的分帧方式"""
+    state["buffer"].extend(pcm)
+    inputs = []
+    while len(state["buffer"]) >= WINDOW_SIZE * 2:
+        chunk = state["buffer"][: WINDOW_SIZE * 2]
+        state["buffer"] = state["buffer"][WINDOW_SIZE * 2 :]
+        audio_int16 = np.frombuffer(chunk, dtype=np.int16)
+        audio_float32 = audio_int16.astype(np.float32) / 32768.0
+        audio_input = np.concatenate(
+            [state["context"], audio_float32.reshape(1, -1)], axis=1
+        ).astype(np.float32)
+        state["context"] = audio_input[:, -CONTEXT_SIZE:]
+        inputs.append({"input": audio_input, "sr": np.array(16000, dtype=np.int64)})
+        state["window"].append(True)
+        state["window"].count(True) >= 3
+    return inputs
+
+
+def framer_framing(state, pcm):
+    """预分配缓冲区和输入张量的分帧方式"""
+    windows = state["framer"].push(pcm)[:, None, :]
+    inputs = []
+    for audio_input in windows:
+        inputs.append({"input": audio_input, "sr": state["sr"]})
+        state["window"].append(True)
+        state["window"].count(True) >= 3
+    return inputs
+
+
+def _check_same_output(packets):
+    legacy_state = {
+        "buffer": bytearray(),
+        "context": np.zeros((1, CONTEXT_SIZE), dtype=np.float32),
+        "window": deque(maxlen=5),
+    }
+    framer_state = {
+        "framer": VADFramer(WINDOW_SIZE, CONTEXT_SIZE),
+        "sr": np.array(16000, dtype=np.int64),
+        "window": VoiceWindow(maxlen=5),
+    }
+    for pcm in packets[:200]:
+        expected = [item["input"] for item in legacy_framing(legacy_state, pcm)]
+        actual = [item["input"] for item in framer_framing(framer_state, pcm)]
+        if len(expected) != len(actual) or not all(
+            np.array_equal(e, a) for e, a in zip(expected, actual)
+        ):
+            return False
+    return True
+
+
+def measure(framing, state, packets):
+    # 耗时
+    begin = time.perf_counter()
+    for pcm in packets:
+        framing(state, pcm)
+    elapsed = time.perf_counter() - begin
+
+    # 临时内存分配：每个包处理过程中的峰值增量
+    tracemalloc.start()
+    transient = 0
+    for pcm in packets[:2000]:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        framing(state, pcm)
+        _, peak = tracemalloc.get_traced_memory()
+        transient += peak - before
+    tracemalloc.stop()
+    return elapsed / len(packets) * 1e6, transient / 2000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--packets", type=int, default=PACKETS, help="音频包数")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    packets = [
+        rng.integers(-3000, 3000, PACKET_SAMPLES, dtype=np.int16).tobytes()
+        for _ in range(args.packets)
+    ]
+    if not _check_same_output(packets):
+        print("错误：两种分帧方式的输出不一致")
+        return
+
+    legacy_us, legacy_bytes = measure(
+        legacy_framing,
+        {
+            "buffer": bytearray(),
+            "context": np.zeros((1, CONTEXT_SIZE), dtype=np.float32),
+            "window": deque(maxlen=5),
+        },
+        packets,
+    )
+    framer_us, framer_bytes = measure(
+        framer_framing,
+        {
+            "framer": VADFramer(WINDOW_SIZE, CONTEXT_SIZE),
+            "sr": np.array(16000, dtype=np.int64),
+            "window": VoiceWindow(maxlen=5),
+        },
+        packets,
+    )
+    rows = [
+        ["bytearray切片", f"{legacy_us:.2f}", f"{legacy_bytes:.0f}"],
+        ["预分配缓冲区", f"{framer_us:.2f}", f"{framer_bytes:.0f}"],
+    ]
+    print(
+        tabulate(
+            rows,
+            headers=["分帧方式", "耗时(us/包)", "临时分配(字节/包)"],
+            tablefmt="github",
+        )
+    )
+    print(f"两种方式输出一致，耗时降低 {(1 - framer_us / legacy_us) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
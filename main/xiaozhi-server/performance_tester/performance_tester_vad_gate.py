@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import wave
+import argparse
+from types import SimpleNamespace
+import numpy as np
+from tabulate import tabulate
+from config.settings import load_config
+from core.providers.vad.silero import VADProvider, WINDOW_SIZE, CONTEXT_SIZE
+from core.utils.uplink_audio import UplinkFrame
+from core.utils.vad_framer import VADFramer, VoiceWindow
+
+description = "Silero VAD能量预判测试(跳过的窗口比例及在标注录音上的检测准确率)"
+
+# 一个推理窗口对应的毫秒数
+WINDOW_MS = WINDOW_SIZE / 16
+
+USAGE = """
+请通过 --data 指定标注录音目录，目录中每个录音为16kHz单声道16位wav文件，
+并附带同名的json标注文件，标注语音段的起止秒数，例如 hello.wav 对应 hello.json：
+{"speech": [[0.8, 2.4], [5.1, 7.0]]}
+"""
+
+
+def load_dataset(data_dir):
+    """读取标注录音，返回 [(文件名, int16采样, 语音段列表)]"""
+    dataset = []
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith(".wav"):
+            continue
+        label_path = os.path.join(data_dir, name[:-4] + ".json")
+        if not os.path.exists(label_path):
+            print(f"跳过没有标注的录音: {name}")
+            continue
+        with wave.open(os.path.join(data_dir, name), "rb") as wav_file:
+            if (
+                wav_file.getframerate() != 16000
+                or wav_file.getnchannels() != 1
+                or wav_file.getsampwidth() != 2
+            ):
+                print(f"跳过格式不是16kHz单声道16位的录音: {name}")
+                continue
+            samples = wav_file.readframes(wav_file.getnframes())
+        with open(label_path, "r", encoding="utf-8") as f:
+            segments = json.load(f)["speech"]
+        dataset.append((name, samples, segments))
+    return dataset
+
+
+def window_labels(num_windows, segments):
+    """窗口中心落在语音段内即标注为语音"""
+    labels = np.zeros(num_windows, dtype=bool)
+    centers = (np.arange(num_windows) + 0.5) * WINDOW_MS / 1000
+    for start, end in segments:
+        labels |= (centers >= start) & (centers < end)
+    return labels
+
+
+def _new_conn():
+    return SimpleNamespace(
+        client_listen_mode="auto",
+        client_audio_buffer=VADFramer(WINDOW_SIZE, CONTEXT_SIZE),
+        client_voice_window=VoiceWindow(maxlen=5),
+        client_have_voice=False,
+        client_voice_stop=False,
+        last_is_voice=False,
+        last_activity_time=0.0,
+    )
+
+
+def run_file(vad, samples):
+    """
+    逐窗口送入VAD，返回每个窗口的判断结果和总耗时
+    按窗口数模拟说话结束后的状态重置（对应连接中ASR完成后的reset_audio_states）
+    """
+    conn = _new_conn()
+    silence_windows = int(np.ceil(vad.silence_threshold_ms / WINDOW_MS))
+    quiet = 0
+    decisions = []
+    elapsed = 0.0
+    step = WINDOW_SIZE * 2
+    for offset in range(0, len(samples) - step + 1, step):
+        frame = UplinkFrame(b"")
+        frame.pcm = samples[offset : offset + step]
+        begin = time.perf_counter()
+        have_voice = vad.is_vad(conn, frame)
+        elapsed += time.perf_counter() - begin
+        decisions.append(conn.last_is_voice)
+        if conn.client_have_voice and not have_voice:
+            quiet += 1
+            if quiet >= silence_windows:
+                conn.client_have_voice = False
+                conn.client_voice_window.clear()
+                conn.last_is_voice = False
+                quiet = 0
+        else:
+            quiet = 0
+    return np.array(decisions, dtype=bool), elapsed
+
+
+def summarize(decisions, labels):
+    accuracy = np.mean(decisions == labels) * 100
+    speech = labels.sum()
+    recall = (decisions & labels).sum() / speech * 100 if speech else 100.0
+    false_alarm = (decisions & ~labels).sum() / max(1, (~labels).sum()) * 100
+    return accuracy, recall, false_alarm
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--data", help="标注录音目录")
+    parser.add_argument("--floor-ratio", type=float, default=1.0, help="噪声基底倍数（最大为1）")
+    parser.add_argument("--min-rms", type=float, default=0.001, help="绝对静音RMS阈值")
+    parser.add_argument("--zcr-threshold", type=float, default=0.3, help="过零率阈值")
+    parser.add_argument("--hangover-ms", type=float, default=300, help="拖尾毫秒数")
+    args = parser.parse_args(argv)
+    if not args.data or not os.path.isdir(args.data):
+        print(USAGE)
+        return
+
+    dataset = load_dataset(args.data)
+    if not dataset:
+        print("没有可用的标注录音")
+        return
+
+    config = load_config()
+    vad_config = dict(config["VAD"][config["selected_module"]["VAD"]])
+    vad_config.pop("batch", None)
+    vad_config["pre_gate"] = {"enabled": False}
+    baseline_vad = VADProvider(vad_config)
+    vad_config["pre_gate"] = {
+        "enabled": True,
+        "floor_ratio": args.floor_ratio,
+        "min_rms": args.min_rms,
+        "zcr_threshold": args.zcr_threshold,
+        "hangover_ms": args.hangover_ms,
+    }
+    gated_vad = VADProvider(vad_config)
+
+    rows = []
+    all_labels, all_baseline, all_gated = [], [], []
+    baseline_time = gated_time = 0.0
+    skipped_before = 0
+    for name, samples, segments in dataset:
+        baseline, b_elapsed = run_file(baseline_vad, samples)
+        gated, g_elapsed = run_file(gated_vad, samples)
+        labels = window_labels(len(baseline), segments)
+        skipped = gated_vad.pre_gate.skipped_windows - skipped_before
+        skipped_before = gated_vad.pre_gate.skipped_windows
+        b_acc, b_recall, _ = summarize(baseline, labels)
+        g_acc, g_recall, _ = summarize(gated, labels)
+        rows.append(
+            [
+                name,
+                len(labels),
+                f"{skipped / len(labels) * 100:.1f}%",
+                f"{b_acc:.1f}%",
+                f"{g_acc:.1f}%",
+                f"{b_recall:.1f}%",
+                f"{g_recall:.1f}%",
+                f"{np.mean(baseline == gated) * 100:.1f}%",
+            ]
+        )
+        all_labels.append(labels)
+        all_baseline.append(baseline)
+        all_gated.append(gated)
+        baseline_time += b_elapsed
+        gated_time += g_elapsed
+
+    labels = np.concatenate(all_labels)
+    baseline = np.concatenate(all_baseline)
+    gated = np.concatenate(all_gated)
+    b_acc, b_recall, b_false = summarize(baseline, labels)
+    g_acc, g_recall, g_false = summarize(gated, labels)
+    metrics = gated_vad.pre_gate.get_metrics()
+    rows.append(
+        [
+            "合计",
+            len(labels),
+            f"{metrics['skip_ratio'] * 100:.1f}%",
+            f"{b_acc:.1f}%",
+            f"{g_acc:.1f}%",
+            f"{b_recall:.1f}%",
+            f"{g_recall:.1f}%",
+            f"{np.mean(baseline == gated) * 100:.1f}%",
+        ]
+    )
+    headers = [
+        "录音",
+        "窗口数",
+        "跳过推理",
+        "准确率(仅模型)",
+        "准确率(预判)",
+        "语音召回(仅模型)",
+        "语音召回(预判)",
+        "判断一致率",
+    ]
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+    print(
+        f"误报率: 仅模型 {b_false:.1f}% / 预判 {g_false:.1f}%；"
+        f"VAD总耗时: 仅模型 {baseline_time * 1000:.0f}ms / 预判 {gated_time * 1000:.0f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()